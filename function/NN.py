@@ -1,4 +1,5 @@
 from import_libraries.libraries import  *
+from function.pipeline import own
 
 def prepare_data(data, window_size=25, y_column="Close_diff", test_size=0.2):
     """
@@ -40,7 +41,7 @@ def prepare_data(data, window_size=25, y_column="Close_diff", test_size=0.2):
             y.append(target)
         return np.array(X), np.array(y)
 
-    data = data.copy()
+    data = own(data)
     datetime_columns = data.select_dtypes(include=['datetime64']).columns
     if not datetime_columns.empty:
         data = data.drop(columns=datetime_columns)
@@ -0,0 +1,219 @@
+from import_libraries.libraries import *
+from function.function_for_MT5 import *
+import os
+from datetime import timedelta, timezone
+from function.mt5_replay import RATES_DTYPE
+
+
+class BarStore:
+    """
+    On-disk bar store with one memory-mapped file per symbol and timeframe.
+
+    Bars are kept as raw `RATES_DTYPE` records in `<root>/<symbol>/<timeframe>.bin`.
+    Reads return memory-mapped slices, so nothing is copied until the caller
+    builds a DataFrame. `sync()` downloads only the bars newer than the last
+    stored one and appends them.
+
+    Attributes:
+        root (str): Directory holding the bar files.
+    """
+
+    def __init__(self, root: str = "data/bars"):
+        """
+        Initializes the BarStore.
+
+        Args:
+            root (str, optional): Directory holding the bar files. Defaults to "data/bars".
+        """
+        self.root = root
+
+    def path(self, symbol: str, timeframe: int) -> str:
+        """
+        Returns the file path of the given symbol and timeframe.
+        """
+        return os.path.join(self.root, symbol, f"{timeframe}.bin")
+
+    def __len_on_disk(self, symbol, timeframe):
+        path = self.path(symbol, timeframe)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // RATES_DTYPE.itemsize
+
+    def bars(self, symbol: str, timeframe: int) -> np.ndarray:
+        """
+        Returns all stored bars as a read-only memory map.
+
+        Returns:
+            np.ndarray: Structured array with `RATES_DTYPE` records (empty if nothing is stored).
+        """
+        n = self.__len_on_disk(symbol, timeframe)
+        if n == 0:
+            return np.empty(0, dtype=RATES_DTYPE)
+        return np.memmap(self.path(symbol, timeframe), dtype=RATES_DTYPE, mode='r', shape=(n,))
+
+    def last_time(self, symbol: str, timeframe: int):
+        """
+        Returns the epoch time (seconds) of the last stored bar or None if the store is empty.
+        """
+        bars = self.bars(symbol, timeframe)
+        if len(bars) == 0:
+            return None
+        return int(bars['time'][-1])
+
+    def read(self, symbol: str, timeframe: int, start=None, end=None, last: int = None) -> np.ndarray:
+        """
+        Returns a zero-copy slice of the stored bars.
+
+        Args:
+            symbol (str): The symbol of the bars.
+            timeframe (int): The MetaTrader 5 timeframe of the bars.
+            start (datetime | int, optional): First bar time (inclusive). Defaults to None.
+            end (datetime | int, optional): Last bar time (inclusive). Defaults to None.
+            last (int, optional): Number of bars to keep from the end of the range. Defaults to None.
+
+        Returns:
+            np.ndarray: Memory-mapped slice of `RATES_DTYPE` records.
+        """
+        lo, hi = self.__bounds(symbol, timeframe, start, end, last)
+        return self.bars(symbol, timeframe)[lo:hi]
+
+    def __bounds(self, symbol, timeframe, start, end, last):
+        times = self.bars(symbol, timeframe)['time']
+
+        lo = 0 if start is None else int(np.searchsorted(times, _to_epoch(start), side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, _to_epoch(end), side='right'))
+        if last is not None:
+            lo = max(lo, hi - last)
+
+        return lo, min(max(lo, hi), len(times))
+
+    def append(self, symbol: str, timeframe: int, rates: np.ndarray) -> int:
+        """
+        Appends bars to the store.
+
+        Bars older than the last stored bar are ignored. A bar with the same time as
+        the last stored one replaces it, because it may have been stored while still forming.
+
+        Args:
+            symbol (str): The symbol of the bars.
+            timeframe (int): The MetaTrader 5 timeframe of the bars.
+            rates (np.ndarray): Bars returned by `copy_rates_*`.
+
+        Returns:
+            int: Number of new bars added.
+        """
+        if rates is None or len(rates) == 0:
+            return 0
+
+        rates = np.asarray(rates).astype(RATES_DTYPE, copy=False)
+        path = self.path(symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        last = self.last_time(symbol, timeframe)
+        offset = self.__len_on_disk(symbol, timeframe) * RATES_DTYPE.itemsize
+        added = len(rates)
+
+        if last is not None:
+            rates = rates[rates['time'] >= last]
+            added = len(rates)
+            if len(rates) and rates['time'][0] == last:
+                # Overwrite the last stored bar instead of duplicating it
+                offset -= RATES_DTYPE.itemsize
+                added -= 1
+
+        if len(rates) == 0:
+            return 0
+
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.seek(offset)
+            f.write(rates.tobytes())
+
+        return added
+
+    def sync(self, symbol: str, timeframe: int, count: int = 30_000) -> int:
+        """
+        Downloads the bars missing in the store and appends them.
+
+        An empty store is filled with the last `count` bars. Otherwise only the bars
+        starting at the last stored bar time are requested from the broker.
+
+        Args:
+            symbol (str): The symbol of the bars.
+            timeframe (int): The MetaTrader 5 timeframe of the bars.
+            count (int, optional): Number of bars for the initial download. Defaults to 30_000.
+
+        Returns:
+            int: Number of bars added, or None if the bars could not be received.
+        """
+        if not connect_to_mt5():
+            print("Error connecting to MetaTrader 5.")
+            return None
+
+        last = self.last_time(symbol, timeframe)
+        try:
+            if last is None:
+                rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+            else:
+                # Server time may be ahead of UTC, so the range end has a margin
+                date_from = datetime.fromtimestamp(last, tz=timezone.utc)
+                date_to = datetime.now(tz=timezone.utc) + timedelta(days=1)
+                rates = mt5.copy_rates_range(symbol, timeframe, date_from, date_to)
+        except Exception as e:
+            print(f"Error while receiving data: {e}")
+            return None
+
+        if rates is None:
+            print("Error while receiving data.", mt5.last_error())
+            return None
+
+        return self.append(symbol, timeframe, rates)
+
+    def frame(self, symbol: str, timeframe: int, start=None, end=None, last: int = None) -> pd.DataFrame:
+        """
+        Returns stored bars as the DataFrame produced by `get_historical_data`.
+
+        One extra bar before the range is read so that 'PriceChange' of the first
+        returned row is defined, as it is when slicing a full history.
+
+        Returns:
+            pd.DataFrame: DataFrame with the same columns as `get_historical_data`.
+        """
+        lo, hi = self.__bounds(symbol, timeframe, start, end, last)
+        bars = self.bars(symbol, timeframe)
+
+        # The very first stored bar has no previous close and is dropped
+        rates_frame = rates_to_frame(bars[max(lo - 1, 0):hi])
+        return rates_frame.reset_index(drop=True)
+
+
+def _to_epoch(value):
+    # datetime, pandas Timestamp or epoch seconds
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).timestamp())
+
+
+def get_stored_historical_data(symbol="GER30", timeframe=mt5.TIMEFRAME_D1, count=30_000,
+                               store: BarStore = None, sync: bool = True):
+    """
+     Retrieves historical data through the local bar store.
+
+     Only the bars newer than the stored ones are downloaded. With `sync=False`
+     the broker is not contacted at all.
+
+     Arguments:
+     symbol (str): The symbol for which you want to get historical data.
+     timeframe (int): Time frame for historical data.
+     count (int): Number of candles requested.
+     store (BarStore): Store to use. Defaults to BarStore().
+     sync (bool): Whether to download new bars before reading.
+
+     Returns:
+     pd.DataFrame: DataFrame with the same columns as `get_historical_data`.
+     """
+    store = store if store else BarStore()
+
+    if sync and store.sync(symbol, timeframe, count=count) is None:
+        print("Bar store sync failed, using stored bars.")
+
+    return store.frame(symbol, timeframe, last=count)
@@ -0,0 +1,149 @@
+from import_libraries.libraries import *
+from function.preprocess_function import Preprocessing_stock_data
+from function.function_for_MT5 import rates_to_frame
+from function.bar_store import BarStore, _to_epoch
+import os
+import shutil
+
+
+def feature_warmup(periods: list[int] = None, warmup_factor: int = 30) -> int:
+    """
+    Bars computed before every chunk and thrown away.
+
+    The longest lookback of the registry, dependencies included, makes every
+    windowed feature exact. Recursive features (EMA, KAMA, Wilder smoothing of
+    RSI / ADX, ...) forget their start at least as fast as (1 - 1 / period) ** n,
+    so `warmup_factor` times the longest period is added, e^-30 with the default.
+    """
+    preprocessing = Preprocessing_stock_data(pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume", "Date"]),
+                                             periods)
+    registry = preprocessing.registry
+    return registry.warmup(registry.names()) + warmup_factor * max(preprocessing.periods)
+
+
+class FeatureFile:
+    """
+    Feature rows on disk, one raw column file per feature and a `meta.json`.
+
+    Rows are appended chunk by chunk, so a file can be written without the
+    whole feature matrix ever being in memory. `frame()` maps the columns
+    back without reading them.
+
+    Attributes:
+        path (str): Directory of the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def meta(self) -> dict:
+        with open(self._meta_path()) as f:
+            return json.load(f)
+
+    def create(self, columns, dtypes) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        self._write_meta({"columns": list(columns), "dtypes": [np.dtype(d).str for d in dtypes], "rows": 0})
+
+    def _write_meta(self, meta):
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path())
+
+    def append(self, frame: pd.DataFrame) -> int:
+        """
+        Appends rows with the columns given to `create`.
+
+        Returns:
+            int: Rows in the file.
+        """
+        meta = self.meta()
+        for i, (column, dtype) in enumerate(zip(meta["columns"], meta["dtypes"])):
+            values = frame[column].to_numpy()
+            with open(os.path.join(self.path, f"c{i}.bin"), "ab") as f:
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        # The row count is written last, a chunk interrupted halfway is not counted
+        meta["rows"] += len(frame)
+        self._write_meta(meta)
+        return meta["rows"]
+
+    def frame(self, columns: list = None) -> pd.DataFrame:
+        """
+        Returns the stored rows as a DataFrame of read-only memory maps.
+        """
+        meta = self.meta()
+        rows = meta["rows"]
+        data = {}
+        for i, (column, dtype) in enumerate(zip(meta["columns"], meta["dtypes"])):
+            if columns is not None and column not in columns:
+                continue
+            values = np.memmap(os.path.join(self.path, f"c{i}.bin"), dtype=dtype, mode="r", shape=(rows,)) \
+                if rows else np.empty(0, dtype=dtype)
+            data[column] = values
+        return pd.DataFrame(data, copy=False)
+
+
+def chunked_feature_matrix(store: BarStore, symbol: str, timeframe: int, path: str, periods: list[int] = None,
+                           chunk_size: int = 100_000, start=None, end=None, warmup_factor: int = 30,
+                           backend=None) -> FeatureFile:
+    """
+    Computes `Preprocessing_stock_data.feature_matrix` of stored bars chunk by chunk and streams the rows to disk.
+
+    Every chunk of `chunk_size` bars is computed together with the
+    `feature_warmup` bars before it, which are then dropped. MAXINDEX / MININDEX
+    are shifted to positions in the whole history. Only one chunk and its
+    warm-up are in memory at a time.
+
+    Windowed features are equal to the in-memory computation up to the rounding
+    of TA-Lib's running sums. Recursive features differ by less than the decay
+    of their start over the warm-up (about 1e-13 relative with the default factor).
+
+    Args:
+        store (BarStore): Store holding the bars.
+        symbol (str): The symbol of the bars.
+        timeframe (int): The MetaTrader 5 timeframe of the bars.
+        path (str): Directory of the output `FeatureFile`, replaced if it exists.
+        periods (list, optional): Indicator periods. Defaults to the periods of `Preprocessing_stock_data`.
+        chunk_size (int, optional): Bars per chunk. Defaults to 100_000.
+        start, end (datetime | int, optional): Range of bars, as in `BarStore.frame`.
+        warmup_factor (int, optional): See `feature_warmup`. Defaults to 30.
+        backend (module, optional): Indicator backend of `Preprocessing_stock_data`.
+
+    Returns:
+        FeatureFile: The written rows, the same rows as `store.frame(symbol, timeframe, start, end)`.
+    """
+    bars = store.bars(symbol, timeframe)
+    times = bars["time"]
+    lo = 0 if start is None else int(np.searchsorted(times, _to_epoch(start), side="left"))
+    hi = len(times) if end is None else int(np.searchsorted(times, _to_epoch(end), side="right"))
+    # As in `BarStore.frame`, the first row needs a previous bar for 'PriceChange'
+    first = max(lo, 1)
+    warmup = feature_warmup(periods, warmup_factor)
+
+    output = FeatureFile(path)
+    created = False
+    for chunk_start in range(first, max(first, hi), chunk_size):
+        chunk_end = min(chunk_start + chunk_size, hi)
+        read_start = max(chunk_start - warmup, first)
+
+        data = rates_to_frame(np.array(bars[read_start - 1:chunk_end])).reset_index(drop=True)
+        frame = Preprocessing_stock_data(data, periods, backend).feature_matrix()
+        del data
+        frame = frame.iloc[chunk_start - read_start:]
+        for column in frame.columns:
+            if column.startswith(("MAXINDEX", "MININDEX")):
+                frame[column] = frame[column] + frame[column].dtype.type(read_start - first)
+
+        if not created:
+            output.create(frame.columns, frame.dtypes)
+            created = True
+        output.append(frame)
+        del frame
+
+    if not created:
+        output.create([], [])
+    return output
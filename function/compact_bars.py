@@ -0,0 +1,153 @@
+from import_libraries.libraries import *
+
+# Frame column -> CompactBars attribute
+COLUMNS = {
+    "Date": "time",
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Tick_volume": "tick_volume",
+    "Spread": "spread",
+    "Real_volume": "real_volume",
+    "Volume": "volume",
+    "MaxPositivePriceChange": "max_positive_price_change",
+    "MaxNegativePriceChange": "max_negative_price_change",
+    "PriceChange": "price_change",
+}
+
+# Bytes per row of the float64 frame returned by `get_historical_data`
+FRAME_ROW_BYTES = 8 * len(COLUMNS) - 4
+
+
+class CompactBars:
+    """
+    Compact struct-of-arrays container of bars.
+
+    Prices are float32, times int64 epoch seconds, tick volume and spread int32. The
+    derived columns of `get_historical_data` ('Volume', 'MaxPositivePriceChange',
+    'MaxNegativePriceChange', 'PriceChange') are computed on first access and cached.
+    float32 keeps about 7 significant digits, enough for scans and signals but
+    not for order prices.
+
+    Columns can be read by attribute (`bars.close`) or by frame name (`bars["Close"]`).
+    """
+
+    def __init__(self, time, open, high, low, close, tick_volume=None, spread=None, real_volume=None):
+        n = len(time)
+        self.time = np.asarray(time, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float32)
+        self.high = np.asarray(high, dtype=np.float32)
+        self.low = np.asarray(low, dtype=np.float32)
+        self.close = np.asarray(close, dtype=np.float32)
+        self.tick_volume = np.asarray(tick_volume if tick_volume is not None else np.zeros(n), dtype=np.int32)
+        self.spread = np.asarray(spread if spread is not None else np.zeros(n), dtype=np.int32)
+        self.real_volume = np.asarray(real_volume if real_volume is not None else np.zeros(n), dtype=np.int64)
+        self._derived = {}
+
+    @classmethod
+    def from_rates(cls, rates: np.ndarray) -> "CompactBars":
+        """
+        Builds the container from the structured array returned by `copy_rates_*`.
+        """
+        return cls(rates['time'], rates['open'], rates['high'], rates['low'], rates['close'],
+                   rates['tick_volume'], rates['spread'], rates['real_volume'])
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "CompactBars":
+        """
+        Builds the container from a DataFrame returned by `get_historical_data`.
+        """
+        optional = {name: data[column].to_numpy() for column, name in COLUMNS.items()
+                    if name in ("tick_volume", "spread", "real_volume") and column in data}
+        time = data["Date"].to_numpy().astype("datetime64[s]").astype(np.int64)
+        return cls(time, data["Open"].to_numpy(), data["High"].to_numpy(), data["Low"].to_numpy(),
+                   data["Close"].to_numpy(), **optional)
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            # Views of the base arrays, the derived columns are rebuilt on access
+            return CompactBars(self.time[key], self.open[key], self.high[key], self.low[key], self.close[key],
+                               self.tick_volume[key], self.spread[key], self.real_volume[key])
+        return getattr(self, COLUMNS[key])
+
+    # Derived columns
+    def __cached(self, name, compute):
+        if name not in self._derived:
+            self._derived[name] = compute()
+        return self._derived[name]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.__cached("volume", lambda: self.high - self.low)
+
+    @property
+    def max_positive_price_change(self) -> np.ndarray:
+        return self.__cached("max_positive_price_change", lambda: self.high - self.open)
+
+    @property
+    def max_negative_price_change(self) -> np.ndarray:
+        return self.__cached("max_negative_price_change", lambda: self.open - self.low)
+
+    @property
+    def price_change(self) -> np.ndarray:
+        def compute():
+            change = np.empty(len(self), dtype=np.float32)
+            change[:1] = np.nan
+            np.abs(np.diff(self.close), out=change[1:])
+            return change
+        return self.__cached("price_change", compute)
+
+    # Conversion
+    def to_frame(self, columns=None, dropna: bool = True) -> pd.DataFrame:
+        """
+        Returns the bars as a DataFrame with the columns of `get_historical_data`.
+
+        Columns are passed to pandas without copying where pandas allows it, so
+        the frame keeps the float32 dtypes.
+
+        Args:
+            columns (list, optional): Frame columns to include. Defaults to all of them.
+            dropna (bool, optional): Drop the first row, whose 'PriceChange' is undefined,
+                as `get_historical_data` does. Defaults to True.
+
+        Returns:
+            pd.DataFrame: The bars.
+        """
+        columns = columns if columns else list(COLUMNS)
+        start = 1 if dropna and "PriceChange" in columns else 0
+
+        data = {}
+        for column in columns:
+            values = self[column][start:]
+            if column == "Date":
+                values = values.astype("datetime64[s]")
+            data[column] = values
+        return pd.DataFrame(data, index=pd.RangeIndex(start, len(self)), copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the base arrays and the derived columns computed so far.
+        """
+        base = (self.time, self.open, self.high, self.low, self.close, self.tick_volume, self.spread, self.real_volume)
+        return sum(array.nbytes for array in base) + sum(array.nbytes for array in self._derived.values())
+
+    def memory_report(self) -> dict:
+        """
+        Compares the memory of this container with the float64 frame of `get_historical_data`.
+
+        Returns:
+            dict: 'compact_bytes', 'frame_bytes', 'saved_bytes' and 'ratio' (frame / compact).
+        """
+        compact = self.nbytes
+        frame = len(self) * FRAME_ROW_BYTES
+        return {
+            "compact_bytes": compact,
+            "frame_bytes": frame,
+            "saved_bytes": frame - compact,
+            "ratio": frame / compact if compact else 0.0,
+        }
@@ -0,0 +1,303 @@
+from import_libraries.libraries import *
+from function.preprocess_function import Preprocessing_stock_data, FEATURE_FAMILIES, cleaned_data, \
+    create_lagged_features_and_target
+import hashlib
+import os
+import shutil
+
+# Bump when the stored layout or the feature code changes
+CACHE_VERSION = 2
+
+# Columns the features are computed from
+BAR_COLUMNS = ("Open", "High", "Low", "Close", "Volume", "Date")
+
+
+def _hash_bars(data: pd.DataFrame, rows: int = None) -> str:
+    digest = hashlib.sha1()
+    for column in BAR_COLUMNS:
+        values = data[column].to_numpy()
+        if column == "Date":
+            values = values.astype("datetime64[ns]")
+        digest.update(np.ascontiguousarray(values[:rows]).tobytes())
+    return digest.hexdigest()
+
+
+def _save_values(path: str, values) -> dict:
+    # Writes one column (or the index) without pickle and returns how to read it back
+    values = pd.Series(values, copy=False)
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        np.save(path + ".npy", values.to_numpy())
+        return {"format": "npy"}
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        np.save(path + ".npy", values.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy().view(np.int64))
+        return {"format": "datetime_tz", "tz": str(dtype.tz), "unit": dtype.unit}
+    # Strings and other objects as JSON values, missing values as null
+    with open(path + ".json", "w") as f:
+        json.dump([None if pd.isna(value) else value for value in values.tolist()], f, default=str)
+    return {"format": "json", "dtype": str(dtype)}
+
+
+def _load_values(path: str, spec: dict):
+    if spec["format"] == "npy":
+        return np.load(path + ".npy", allow_pickle=False)
+    if spec["format"] == "datetime_tz":
+        values = np.load(path + ".npy", allow_pickle=False).view(f"datetime64[{spec['unit']}]")
+        return pd.Series(values).dt.tz_localize("UTC").dt.tz_convert(spec["tz"]).array
+    with open(path + ".json") as f:
+        values = json.load(f)
+    return pd.array([np.nan if value is None else value for value in values], dtype=spec["dtype"])
+
+
+def _backend_name(backend) -> str:
+    return "talib" if backend is None else getattr(backend, "__name__", type(backend).__name__)
+
+
+def _registry_config(registry) -> list:
+    # Registered features as JSON values, callables by name (their repr holds a memory address)
+    return [[spec.name, spec.function if isinstance(spec.function, str) else
+             f"{spec.function.__module__}.{spec.function.__qualname__}",
+             list(spec.inputs), spec.params, spec.warmup, spec.family] for spec in registry.specs.values()]
+
+
+def _hash_frame(data: pd.DataFrame) -> str:
+    digest = hashlib.sha1(json.dumps([str(column) for column in data.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    On-disk cache of computed feature frames, addressed by the content of their input.
+
+    The key of an entry is a hash of the input bars (or frame), the stage, its
+    parameters (`periods`, indicator families, the registered features, ...),
+    the indicator backend and the versions of TA-Lib, pandas and of the cache
+    itself. Every entry is a directory with one `.npy` file per column and a
+    `meta.json`, so columns load without parsing. Nothing is pickled: datetimes
+    with a time zone are stored as int64 and object / string columns as JSON,
+    so a file written to a shared cache directory cannot run code when it is
+    loaded.
+
+    When the bars of a feature request start with the bars of a cached entry,
+    only the new tail plus a warm-up window is computed and appended to the
+    cached rows. Windowed indicators are exact; recursive ones (EMA, DEMA,
+    KAMA, ...) restart at the warm-up window and match within a relative error
+    of about (1 - 1 / period) ** warmup for the slowest, Wilder-smoothed ones (RSI, ADX).
+
+    The least recently used entries are removed once the cache grows above `max_bytes`.
+
+    Attributes:
+        root (str): Directory of the cache.
+        max_bytes (int): Size limit of the cache.
+        warmup_factor (int): Warm-up window as a multiple of the longest period.
+        hits, misses, prefix_hits, evictions (int): Statistics since creation.
+    """
+
+    def __init__(self, root: str = "data/features", max_bytes: int = 2 * 1024 ** 3, warmup_factor: int = 20):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.warmup_factor = warmup_factor
+        self.hits = 0
+        self.misses = 0
+        self.prefix_hits = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+
+    # Keys
+    @staticmethod
+    def versions() -> dict:
+        try:
+            talib_version = tl.__version__
+        except ImportError:
+            talib_version = None
+        return {"cache": CACHE_VERSION, "talib": talib_version, "pandas": pd.__version__}
+
+    def _config(self, stage: str, backend=None, **params) -> str:
+        config = json.dumps({"stage": stage, "backend": _backend_name(backend), "params": params,
+                             "versions": self.versions()}, sort_keys=True, default=str)
+        return hashlib.sha1(config.encode()).hexdigest()
+
+    @staticmethod
+    def _key(config: str, content: str) -> str:
+        return hashlib.sha1((config + content).encode()).hexdigest()
+
+    # Storage
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _entries(self):
+        for key in os.listdir(self.root):
+            meta = os.path.join(self.root, key, "meta.json")
+            if os.path.isfile(meta):
+                yield key, meta
+
+    def _load(self, key: str):
+        path = self._path(key)
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.isfile(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        data = {name: _load_values(os.path.join(path, f"c{i}"), spec)
+                for i, (name, spec) in enumerate(zip(meta["columns"], meta["formats"]))}
+        index = pd.RangeIndex(meta["rows"]) if meta["index"] == "range" else \
+            pd.Index(_load_values(os.path.join(path, "index"), meta["index"]))
+        # Access time for the eviction
+        os.utime(meta_path)
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def _store(self, key: str, frame: pd.DataFrame, **meta) -> None:
+        path = self._path(key)
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        formats = [_save_values(os.path.join(tmp, f"c{i}"), frame.iloc[:, i]) for i in range(frame.shape[1])]
+        range_index = frame.index.equals(pd.RangeIndex(len(frame)))
+        index = "range" if range_index else _save_values(os.path.join(tmp, "index"), frame.index)
+        meta.update({"columns": list(frame.columns), "formats": formats, "rows": len(frame), "index": index})
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, default=str)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        self.evict()
+
+    # Cached stages
+    def feature_matrix(self, data: pd.DataFrame, periods: list[int] = None, backend=None) -> pd.DataFrame:
+        """
+        Returns `Preprocessing_stock_data(data, periods, backend).feature_matrix()`, from the cache when possible.
+        """
+        preprocessing = Preprocessing_stock_data(data.iloc[:0], periods, backend)
+        periods = preprocessing.periods
+        config = self._config("feature_matrix", backend, periods=periods, families=list(FEATURE_FAMILIES),
+                              specs=_registry_config(preprocessing.registry))
+        key = self._key(config, _hash_bars(data))
+
+        frame = self._load(key)
+        if frame is not None:
+            self.hits += 1
+            return frame
+        self.misses += 1
+
+        frame = self.__extend_prefix(data, periods, config, backend)
+        if frame is None:
+            frame = Preprocessing_stock_data(data, periods, backend).feature_matrix()
+        self._store(key, frame, config=config, bars=_hash_bars(data))
+        return frame
+
+    def __extend_prefix(self, data, periods, config, backend):
+        # Longest cached entry of the same configuration whose bars start `data`
+        candidates = []
+        for key, meta_path in self._entries():
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("config") == config and meta["rows"] < len(data):
+                candidates.append((meta["rows"], key, meta["bars"]))
+
+        for rows, key, bars in sorted(candidates, reverse=True):
+            if _hash_bars(data, rows) != bars:
+                continue
+            cached = self._load(key)
+            if cached is None:
+                continue
+
+            start = max(0, rows - self.warmup_factor * max(periods))
+            tail = Preprocessing_stock_data(data.iloc[start:].reset_index(drop=True), periods, backend).feature_matrix()
+            tail = tail.iloc[rows - start:]
+            # Index features are positions in the input
+            for column in tail.columns:
+                if column.startswith(("MAXINDEX", "MININDEX")):
+                    tail[column] = tail[column] + tail[column].dtype.type(start)
+
+            self.prefix_hits += 1
+            return pd.concat([cached, tail], ignore_index=True)
+        return None
+
+    def cached(self, stage: str, data: pd.DataFrame, compute, **params) -> pd.DataFrame:
+        """
+        Returns `compute(data.copy(), **params)`, from the cache when the same frame was seen before.
+
+        Args:
+            stage (str): Name of the computation, part of the key.
+            data (pd.DataFrame): Input frame.
+            compute (callable): Function returning a DataFrame.
+            **params: Keyword arguments of `compute`, part of the key.
+        """
+        key = self._key(self._config(stage, **params), _hash_frame(data))
+        frame = self._load(key)
+        if frame is not None:
+            self.hits += 1
+            return frame
+        self.misses += 1
+
+        frame = compute(data.copy(), **params)
+        self._store(key, frame, stage=stage)
+        return frame
+
+    def cleaned_data(self, df: pd.DataFrame, variance_threshold: float = 0.1,
+                     correlation_threshold: float = None) -> pd.DataFrame:
+        return self.cached("cleaned_data", df, cleaned_data, variance_threshold=variance_threshold,
+                           correlation_threshold=correlation_threshold)
+
+    def create_lagged_features_and_target(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.cached("lagged_features_and_target", df, create_lagged_features_and_target)
+
+    # Maintenance
+    def size(self) -> int:
+        """
+        Returns the bytes stored in the cache.
+        """
+        total = 0
+        for key, _ in self._entries():
+            path = self._path(key)
+            total += sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        return total
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used entries until the cache fits into `max_bytes`.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        entries = []
+        for key, meta_path in self._entries():
+            path = self._path(key)
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+            entries.append((os.path.getmtime(meta_path), size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        for key, _ in list(self._entries()):
+            shutil.rmtree(self._path(key), ignore_errors=True)
+
+    def stats(self) -> dict:
+        """
+        Returns hits, misses, prefix hits, evictions, hit rate, entries and bytes.
+        """
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "prefix_hits": self.prefix_hits,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "entries": sum(1 for _ in self._entries()),
+            "bytes": self.size(),
+        }
@@ -1,37 +1,348 @@
 from import_libraries.libraries import *
+from import_libraries.libraries import _MetaTrader5
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import namedtuple
+from function.mt5_replay import ReplayMT5
+from function.compact_bars import CompactBars
 
-with open('data/private_data.json', 'r') as f:
-    private_data = json.load(f)
+# Account data, read from `data/private_data.json` on the first connection
+account = None
+password = None
+server = None
 
-account = private_data["account"]
-password = private_data["password"]
-server = private_data["server"]
 
-
-def connect_to_mt5():
+def load_credentials(path='data/private_data.json'):
     """
-    Łączy się z MetaTrader 5 i loguje przy użyciu podanych danych konta.
+    Reads the account data used to log in to MetaTrader 5.
 
-    Zwraca:
-    bool: True, jeśli połączenie jest udane, w przeciwnym razie False.
+    Args:
+        path (str, optional): JSON file with 'account', 'password' and 'server'.
+
+    Returns:
+    bool: True, if the file was read, otherwise False.
     """
     global account, password, server
 
-    # Inicjalizacja połączenia z MetaTrader 5
-    if not mt5.initialize():
-        print("Initialization error")
-        mt5.shutdown()
-        return None
+    try:
+        with open(path, 'r') as f:
+            private_data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error while reading account data: {e}")
+        return False
 
-    authorized = mt5.login(account, password=password, server=server)
+    account = private_data["account"]
+    password = private_data["password"]
+    server = private_data["server"]
+    return True
 
-    if authorized:
-        print(f"Connected to your account: {account}")
-        return True
-    else:
-        print("Failed to connect. Error code:", mt5.last_error())
+
+class BrokerBackend:
+    """
+    Forwards MetaTrader 5 calls to the selected backend.
+
+    Every module imports the same `mt5` object, so switching the backend with
+    `set_backend()` affects all of them at once. Without a backend (MetaTrader5
+    not installed and none chosen) only the constants can be read, every broker
+    call raises RuntimeError.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        if self.backend is None:
+            if name.isupper():
+                # The replay backend uses the constants of the MetaTrader5 package
+                return getattr(ReplayMT5, name)
+            raise RuntimeError(f"No broker backend for mt5.{name}: MetaTrader5 is not installed. "
+                               "Choose one with set_backend(), e.g. set_backend(ReplayMT5(...)).")
+        return getattr(self.backend, name)
+
+
+mt5 = BrokerBackend(_MetaTrader5)
+
+
+class MT5Session:
+    """
+    Keeps a single MetaTrader 5 terminal session alive for the whole module.
+
+    The terminal is initialized and logged in once. Before every broker call the
+    session is checked with a cheap `account_info()` request and a new handshake
+    is made only if the terminal or the login is actually gone.
+
+    Attributes:
+        connected (bool): True while a logged in session is believed to be alive.
+        handshakes (int): Number of initialize + login handshakes performed.
+        reconnects (int): Number of handshakes made after a session was lost.
+        handshake_time (float): Total seconds spent in handshakes.
+        last_handshake_time (float): Seconds spent in the most recent handshake.
+        checks (int): Number of health checks made before broker calls.
+    """
+
+    def __init__(self):
+        self.connected = False
+        self.handshakes = 0
+        self.reconnects = 0
+        self.handshake_time = 0.0
+        self.last_handshake_time = 0.0
+        self.checks = 0
+        # Worker threads share the session, only one of them may reconnect
+        self._lock = threading.RLock()
+
+    def connect(self):
+        """
+        Initializes the terminal and logs in with the account data.
+
+        Returns:
+        bool: True, if the handshake is successful, otherwise False.
+        """
+        global account, password, server
+
+        if account is None:
+            load_credentials()
+
+        start = time.perf_counter()
+        try:
+            # Inicjalizacja połączenia z MetaTrader 5
+            if not mt5.initialize():
+                print("Initialization error")
+                mt5.shutdown()
+                self.connected = False
+                return False
+
+            authorized = mt5.login(account, password=password, server=server)
+        finally:
+            self.last_handshake_time = time.perf_counter() - start
+            self.handshake_time += self.last_handshake_time
+            self.handshakes += 1
+
+        if authorized:
+            print(f"Connected to your account: {account}")
+            self.connected = True
+            return True
+        else:
+            print("Failed to connect. Error code:", mt5.last_error())
+            mt5.shutdown()
+            self.connected = False
+            return False
+
+    def is_alive(self):
+        """
+        Checks whether the terminal is still running and logged in to the account.
+
+        Returns:
+        bool: True, if the session can be used without a new handshake.
+        """
+        self.checks += 1
+        try:
+            info = mt5.account_info()
+        except Exception:
+            return False
+        return info is not None and info.login == account
+
+    def ensure(self):
+        """
+        Makes sure there is a working session, reconnecting only when it is lost.
+
+        Returns:
+        bool: True, if the session is ready for broker calls, otherwise False.
+        """
+        with self._lock:
+            if self.connected and self.is_alive():
+                return True
+
+            if self.connected:
+                self.reconnects += 1
+                self.connected = False
+
+            return self.connect()
+
+    def shutdown(self):
+        """
+        Closes the terminal connection. The next `ensure()` call opens a new session.
+        """
         mt5.shutdown()
-        return False
+        self.connected = False
+
+    def stats(self):
+        """
+        Returns the session counters.
+
+        Returns:
+        dict: Handshake and reconnect counters together with the handshake time.
+        """
+        return {
+            "connected": self.connected,
+            "handshakes": self.handshakes,
+            "reconnects": self.reconnects,
+            "checks": self.checks,
+            "handshake_time": self.handshake_time,
+            "last_handshake_time": self.last_handshake_time,
+            "avg_handshake_time": self.handshake_time / self.handshakes if self.handshakes else 0.0,
+        }
+
+
+# Shared session used by every function in this module
+session = MT5Session()
+
+
+def set_backend(backend):
+    """
+    Switches the broker used by every function of the project.
+
+    Args:
+        backend: The MetaTrader5 module or an object with the same interface, e.g. `ReplayMT5`.
+    """
+    if mt5.backend is not None:
+        session.shutdown()
+    session.connected = False
+    symbol_cache.invalidate()
+    mt5.backend = backend
+
+
+class SymbolCache:
+    """
+    TTL cache for `mt5.symbol_info` and `mt5.symbol_info_tick`.
+
+    Every field has its own time to live. Contract specifications such as
+    `volume_min` or `swap_*` change rarely and are kept for `ttl` seconds, while
+    quote fields (`bid`, `ask`, ...) are read from the last tick and expire after
+    a fraction of a second.
+
+    Attributes:
+        ttl (float): Time to live of the fields without an entry in `field_ttls`.
+        field_ttls (dict): Time to live of single fields, in seconds.
+        hits (dict): Number of cache hits per source ('info', 'tick').
+        misses (dict): Number of broker requests per source ('info', 'tick').
+    """
+
+    # Fields served from `symbol_info_tick`, everything else comes from `symbol_info`
+    TICK_FIELDS = ("time", "bid", "ask", "last", "volume", "time_msc", "flags", "volume_real")
+
+    def __init__(self, ttl: float = 3600.0, field_ttls: dict = None):
+        self.ttl = ttl
+        self.field_ttls = {"time": 0.5, "bid": 0.5, "ask": 0.5, "last": 0.5, "time_msc": 0.5,
+                           **(field_ttls or {})}
+        self.hits = {"info": 0, "tick": 0}
+        self.misses = {"info": 0, "tick": 0}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __fetch(self, symbol, source):
+        if not connect_to_mt5():
+            print("Error connecting to MetaTrader 5.")
+            return None
+        if source == "tick":
+            return mt5.symbol_info_tick(symbol)
+        return mt5.symbol_info(symbol)
+
+    def __get(self, symbol, source, ttl):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((symbol, source))
+            if entry is not None and now - entry[0] <= ttl:
+                self.hits[source] += 1
+                return entry[1]
+            self.misses[source] += 1
+
+        value = self.__fetch(symbol, source)
+        if value is not None:
+            with self._lock:
+                self._entries[(symbol, source)] = (now, value)
+        return value
+
+    def info(self, symbol: str, ttl: float = None):
+        """
+        Returns `mt5.symbol_info(symbol)`, fetched again only after `ttl` seconds.
+        """
+        return self.__get(symbol, "info", self.ttl if ttl is None else ttl)
+
+    def tick(self, symbol: str, ttl: float = None):
+        """
+        Returns `mt5.symbol_info_tick(symbol)`, fetched again only after `ttl` seconds.
+        """
+        return self.__get(symbol, "tick", self.field_ttls["bid"] if ttl is None else ttl)
+
+    def get(self, symbol: str, field: str):
+        """
+        Returns one field of the symbol using the field's time to live.
+
+        Returns:
+            The field value, or None if the symbol information could not be received.
+        """
+        ttl = self.field_ttls.get(field, self.ttl)
+        value = self.tick(symbol, ttl) if field in self.TICK_FIELDS else self.info(symbol, ttl)
+        if value is None:
+            return None
+        return getattr(value, field)
+
+    def invalidate(self, symbol: str = None, source: str = None):
+        """
+        Drops cached entries.
+
+        Args:
+            symbol (str, optional): Only entries of this symbol. Defaults to all symbols.
+            source (str, optional): Only 'info' or 'tick' entries. Defaults to both.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if (symbol is None or key[0] == symbol) and (source is None or key[1] == source):
+                    del self._entries[key]
+
+    def stats(self):
+        """
+        Returns the hit and miss counters.
+
+        Returns:
+            dict: Hits, misses and hit rate per source.
+        """
+        stats = {}
+        for source in ("info", "tick"):
+            total = self.hits[source] + self.misses[source]
+            stats[source] = {
+                "hits": self.hits[source],
+                "misses": self.misses[source],
+                "hit_rate": self.hits[source] / total if total else 0.0,
+            }
+        return stats
+
+
+class CachedSymbolInfo:
+    """
+    Read-only view of a symbol whose attributes are served by `symbol_cache`.
+
+    It can be used wherever the result of `mt5.symbol_info` is read by
+    attribute, e.g. `info.volume_min` or `info.ask`.
+    """
+
+    def __init__(self, symbol: str, cache: SymbolCache):
+        self.symbol = symbol
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return self.cache.get(self.symbol, name)
+
+    def __repr__(self):
+        return f"CachedSymbolInfo({self.symbol!r})"
+
+
+# Shared symbol metadata and quote cache used by every function in this module
+symbol_cache = SymbolCache()
+
+
+def connect_to_mt5():
+    """
+    Łączy się z MetaTrader 5 i loguje przy użyciu podanych danych konta.
+
+    Połączenie jest utrzymywane przez `session`, więc ponowne wywołania
+    nie wykonują ponownie `initialize()` + `login()`, dopóki sesja działa.
+
+    Zwraca:
+    bool: True, jeśli połączenie jest udane, w przeciwnym razie False.
+    """
+    return session.ensure()
 
 
 def get_all_symbols():
@@ -56,11 +367,11 @@ def get_all_symbols():
         return symbols
     except Exception as e:
         print(f"Error when retrieving a list of symbols:{e}")
-        mt5.shutdown()
+        session.shutdown()
         return None
 
 
-def get_historical_data( symbol="GER30", timeframe=mt5.TIMEFRAME_D1, count=30_000):
+def get_historical_data( symbol="GER30", timeframe=mt5.TIMEFRAME_D1, count=30_000, compact=False):
     """
      Retrieves historical data from MetaTrader 5.
 
@@ -68,9 +379,10 @@ def get_historical_data( symbol="GER30", timeframe=mt5.TIMEFRAME_D1, count=30_00
      timeframe (int): Time frame for historical data.
      symbol (str): The symbol for which you want to get historical data.
      count (int): Number of candles requested.
+     compact (bool): Return a float32 CompactBars container instead of a DataFrame.
 
      Returns:
-     pd.DataFrame: DataFrame containing the received historical data.
+     pd.DataFrame | CompactBars: DataFrame containing the received historical data.
      """
     if not connect_to_mt5():
         print("Error connecting to MetaTrader 5.")
@@ -81,34 +393,151 @@ def get_historical_data( symbol="GER30", timeframe=mt5.TIMEFRAME_D1, count=30_00
     except Exception as e:
         print("initialize() failed, error code =",mt5.last_error())
         print(f"Error while receiving data: {e}")
-        mt5.shutdown()
+        session.shutdown()
         return None
 
     # Check the success of receiving data
     if rates is not None:
-        # Convert data to pandas DataFrame
-        rates_frame = pd.DataFrame(rates)
-        rates_frame['time'] = pd.to_datetime(rates_frame['time'], unit='s')
-        rates_frame = rates_frame.rename(columns=lambda x: x.capitalize())
-        rates_frame = rates_frame.rename(columns={"Time": "Date"})
-
-        
-        rates_frame['Volume'] = rates_frame['High'] - rates_frame['Low']
-        rates_frame['MaxPositivePriceChange'] = rates_frame['High'] - rates_frame['Open']
-        rates_frame['MaxNegativePriceChange'] = rates_frame['Open'] - rates_frame['Low']
-
-        rates_frame['PriceChange'] = abs(rates_frame['Close'] - rates_frame['Close'].shift(1))
-        rates_frame = rates_frame.dropna()
-        # Close the connection to MetaTrader 5
-        # mt5.shutdown()
-        return rates_frame
+        # The connection stays open in `session` for the next call
+        if compact:
+            return CompactBars.from_rates(rates)
+        return rates_to_frame(rates)
     else:
-        print("Error while receiving data.")
-        mt5.shutdown()
+        # The session is still usable, only this request failed
+        print("Error while receiving data.", mt5.last_error())
         return None
 
 
+def rates_to_frame(rates):
+    """
+     Converts raw MetaTrader 5 rates into the DataFrame used by the project.
+
+     Arguments:
+     rates (np.ndarray): Structured array returned by `copy_rates_*` functions.
+
+     Returns:
+     pd.DataFrame: DataFrame with capitalized columns, 'Date' and the derived price change columns.
+     """
+    # Convert data to pandas DataFrame
+    rates_frame = pd.DataFrame(rates)
+    rates_frame['time'] = pd.to_datetime(rates_frame['time'], unit='s')
+    rates_frame = rates_frame.rename(columns=lambda x: x.capitalize())
+    rates_frame = rates_frame.rename(columns={"Time": "Date"})
+
+    rates_frame['Volume'] = rates_frame['High'] - rates_frame['Low']
+    rates_frame['MaxPositivePriceChange'] = rates_frame['High'] - rates_frame['Open']
+    rates_frame['MaxNegativePriceChange'] = rates_frame['Open'] - rates_frame['Low']
+
+    rates_frame['PriceChange'] = abs(rates_frame['Close'] - rates_frame['Close'].shift(1))
+    rates_frame = rates_frame.dropna()
+    return rates_frame
+
+
+def get_historical_data_bulk(symbols, timeframes=(mt5.TIMEFRAME_D1,), count=30_000,
+                             max_workers=8, retries=3, retry_delay=0.5):
+    """
+     Retrieves historical data for many symbols and timeframes at once.
+
+     Requests run on a bounded thread pool over the shared `session`. Each
+     (symbol, timeframe) pair is retried on its own and failures are reported
+     per pair instead of stopping the whole download.
+
+     Arguments:
+     symbols (list): Symbols for which you want to get historical data.
+     timeframes (list): Time frames for historical data. Defaults to (TIMEFRAME_D1,).
+     count (int): Number of candles requested per symbol.
+     max_workers (int): Maximum number of concurrent requests.
+     retries (int): Number of attempts per (symbol, timeframe) pair.
+     retry_delay (float): Seconds to wait before the next attempt, doubled after every failure.
+
+     Returns:
+     tuple: (frames, failures) where frames maps (symbol, timeframe) to a DataFrame
+     like `get_historical_data` and failures maps (symbol, timeframe) to the error message.
+     """
+    frames, failures = {}, {}
+
+    # One handshake for the whole download
+    if not connect_to_mt5():
+        print("Error connecting to MetaTrader 5.")
+        return frames, {(symbol, timeframe): "Error connecting to MetaTrader 5."
+                        for symbol in symbols for timeframe in timeframes}
+
+    def fetch(symbol, timeframe):
+        delay = retry_delay
+        error = None
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(delay)
+                delay *= 2
+                # The session may have been lost between attempts
+                if not connect_to_mt5():
+                    error = "Error connecting to MetaTrader 5."
+                    continue
+            try:
+                rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+            except Exception as e:
+                error = f"Error while receiving data: {e}"
+                continue
+            if rates is None or len(rates) == 0:
+                error = f"Error while receiving data: {mt5.last_error()}"
+                continue
+            return rates_to_frame(rates)
+        raise RuntimeError(error)
+
+    tasks = [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, *task): task for task in tasks}
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            task = futures[future]
+            try:
+                frames[task] = future.result()
+            except Exception as e:
+                failures[task] = str(e)
+
+    if failures:
+        print(f"Failed to receive {len(failures)} of {len(tasks)} histories.")
+
+    return frames, failures
+
+
 # Orders f
+def _order_request(signal, symbol, lot, deviation):
+    # Define the order parameters based on the given signal
+    tick = symbol_cache.tick(symbol)
+    price = tick.ask if signal == "buy" else tick.bid
+    trade_type = mt5.ORDER_TYPE_BUY if signal == "buy" else mt5.ORDER_TYPE_SELL
+    request = {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": symbol,
+        "volume": float(1), 
+        "type": trade_type,
+        "price": price,
+        "deviation": deviation,
+        "magic": 234000,
+        "comment": f"python script open {signal}",
+        "type_time": mt5.ORDER_TIME_DAY,
+        "type_filling": mt5.TRADE_ACTION_DEAL,
+        "request_actions": mt5.TRADE_ACTION_DEAL
+    }
+    return request
+
+
+def _close_previous_deal(symbol, signal):
+    # Close any existing position opposite to the current signal
+    results = []
+    positions = mt5.positions_get(symbol)
+    if positions:
+        if signal == "buy":
+            for position in positions:
+                if position.type == mt5.ORDER_TYPE_SELL:
+                    results.append(mt5.position_close(position.ticket))
+        if signal == "sell":
+            for position in positions:
+                if position.type == mt5.ORDER_TYPE_BUY:
+                    results.append(mt5.position_close(position.ticket))
+    return results
+
+
 def automated_trading_from_signals(df, symbol="GER30", lot = None, deviation=10):
     """
     Executes automated trading operations based on buy and sell signals in the provided DataFrame.
@@ -123,60 +552,25 @@ def automated_trading_from_signals(df, symbol="GER30", lot = None, deviation=10)
     It opens a new position according to the latest signal and closes the previous deal if any.
 
     Note:
-    - The function assumes that there is a connection to MetaTrader 5 established before calling it.
-    - It utilizes the `connect_to_mt5` function to establish the connection.
+    - It utilizes the `connect_to_mt5` function, which reuses the shared `session`.
+    - The connection is left open so that the next call does not pay a new handshake.
     """
 
-    def order(signal, symbol, lot, deviation):
-        # Define the order parameters based on the given signal
-        price = mt5.symbol_info_tick(symbol).ask if signal == "buy" else mt5.symbol_info_tick(symbol).bid
-        trade_type = mt5.ORDER_TYPE_BUY if signal == "buy" else mt5.ORDER_TYPE_SELL
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "volume": float(1), 
-            "type": trade_type,
-            "price": price,
-            "deviation": deviation,
-            "magic": 234000,
-            "comment": f"python script open {signal}",
-            "type_time": mt5.ORDER_TIME_DAY,
-            "type_filling": mt5.TRADE_ACTION_DEAL,
-            "request_actions": mt5.TRADE_ACTION_DEAL
-        }
-        return request
-
-    def close_previous_deal(symbol, signal):
-        # Close any existing position opposite to the current signal
-        positions = mt5.positions_get(symbol)
-        if positions:
-            if signal == "buy":
-                for position in positions:
-                    if position.type == mt5.ORDER_TYPE_SELL:
-                        result = mt5.position_close(position.ticket)
-            if signal == "sell":
-                for position in positions:
-                    if position.type == mt5.ORDER_TYPE_BUY:
-                        result = mt5.position_close(position.ticket)
-
     try:
-        # Establish a connection to MetaTrader 5
-        connect_to_mt5()
+        # Establish a connection to MetaTrader 5 (reused if still alive)
+        if not connect_to_mt5():
+            print("Error connecting to MetaTrader 5.")
+            return None
         # Get the latest signal from the DataFrame
         signal = df["Signal"].iloc[-1]
         # Close the previous deal if any
-        close_previous_deal(symbol=symbol, signal=signal)
-        # Get the current market price based on the signal
-        price = mt5.symbol_info_tick(symbol).ask if signal == "buy" else mt5.symbol_info_tick(symbol).bid
-
+        _close_previous_deal(symbol=symbol, signal=signal)
         lot = lot if lot else get_min_volume(symbol)
         # Create an order request based on the signal and other parameters
-        request = order(signal=signal, symbol=symbol, lot=lot, deviation=deviation)
+        request = _order_request(signal=signal, symbol=symbol, lot=lot, deviation=deviation)
         # Send the order request to execute the trade
         result = mt5.order_send(request)
 
-        symbol_info = mt5.symbol_info(symbol)
- 
         # Check the result of the order execution
         if result is not None:
             if result.retcode != mt5.TRADE_RETCODE_DONE:
@@ -197,15 +591,106 @@ def automated_trading_from_signals(df, symbol="GER30", lot = None, deviation=10)
         # Handle any exceptions that may occur during the trading process
         print(f"Exception: {e}")
 
-    finally:
-        # Shut down the MetaTrader 5 connection
-        mt5.shutdown()
+
+ExecutionResult = namedtuple("ExecutionResult", "symbol signal retcode comment order price closed "
+                                                "signal_time request_time sent_time")
+ExecutionResult.__doc__ = """
+Result of one order sent by `execute_signals`.
+
+`signal_time`, `request_time` and `sent_time` are `time.perf_counter()` stamps of
+the signal, of the built request and of the return of `order_send`.
+"""
+
+
+def execute_signals(signals: dict, lot=None, deviation=10, max_workers=8, signal_time=None):
+    """
+    Executes the latest signals of many symbols concurrently over one session.
+
+    For every symbol the opposite positions are closed and a new position is
+    opened, as in `automated_trading_from_signals`, but all symbols are handled
+    at the same time on a thread pool.
+
+    Args:
+        signals (dict): Maps a symbol to "buy"/"sell" or to a DataFrame with a 'Signal' column.
+        lot (float, optional): The trading lot size. Defaults to the minimum volume of each symbol.
+        deviation (int, optional): The deviation parameter for order execution. Defaults to 10.
+        max_workers (int, optional): Maximum number of symbols handled at once. Defaults to 8.
+        signal_time (float, optional): `time.perf_counter()` stamp of the signal. Defaults to now.
+
+    Returns:
+        dict: Maps every symbol to its ExecutionResult. Latencies can be computed as
+        `request_time - signal_time` and `sent_time - request_time`.
+    """
+    signal_time = signal_time if signal_time is not None else time.perf_counter()
+
+    if not connect_to_mt5():
+        print("Error connecting to MetaTrader 5.")
+        return None
+
+    def execute(symbol, signal):
+        if isinstance(signal, pd.DataFrame):
+            signal = signal["Signal"].iloc[-1]
+
+        closed = _close_previous_deal(symbol=symbol, signal=signal)
+        volume = lot if lot else get_min_volume(symbol)
+        request = _order_request(signal=signal, symbol=symbol, lot=volume, deviation=deviation)
+        request_time = time.perf_counter()
+        result = mt5.order_send(request)
+        sent_time = time.perf_counter()
+
+        if result is None:
+            return ExecutionResult(symbol, signal, None, f"order_send returned None: {mt5.last_error()}",
+                                   None, request["price"], closed, signal_time, request_time, sent_time)
+        return ExecutionResult(symbol, signal, result.retcode, result.comment, result.order, result.price,
+                               closed, signal_time, request_time, sent_time)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(execute, symbol, signal): symbol for symbol, signal in signals.items()}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                print(f"Exception for {symbol}: {e}")
+                results[symbol] = ExecutionResult(symbol, signals[symbol], None, str(e), None, None, [],
+                                                  signal_time, None, None)
+
+    failed = [symbol for symbol, result in results.items() if result.retcode != mt5.TRADE_RETCODE_DONE]
+    if failed:
+        print(f"order_send failed for: {', '.join(failed)}")
+
+    return results
+
+
+def execution_latency(results: dict) -> pd.DataFrame:
+    """
+    Summarizes the latency of the orders sent by `execute_signals`.
+
+    Args:
+        results (dict): Result of `execute_signals`.
+
+    Returns:
+        pd.DataFrame: One row per symbol with 'build_ms', 'send_ms' and 'total_ms'.
+    """
+    rows = []
+    for symbol, result in results.items():
+        if result.sent_time is None:
+            continue
+        rows.append({
+            "symbol": symbol,
+            "retcode": result.retcode,
+            "build_ms": (result.request_time - result.signal_time) * 1000,
+            "send_ms": (result.sent_time - result.request_time) * 1000,
+            "total_ms": (result.sent_time - result.signal_time) * 1000,
+        })
+    return pd.DataFrame(rows)
 
 
 def get_min_volume(symbol):
-    symbol_info = mt5.symbol_info(symbol)
-    if symbol_info is not None:
-        return symbol_info.volume_min
+    volume_min = symbol_cache.get(symbol, "volume_min")
+    if volume_min is not None:
+        return volume_min
     else:
         print("get_min_volume:")
         print(f"Information about symbol {symbol} not found.")
@@ -213,9 +698,9 @@ def get_min_volume(symbol):
 
 
 def symbol_info(symbol):
-    symbol_info = mt5.symbol_info(symbol)
-    if symbol_info is not None:
-        return symbol_info
+    # Static fields are served from the cache, bid/ask expire after a fraction of a second
+    if symbol_cache.info(symbol) is not None:
+        return CachedSymbolInfo(symbol, symbol_cache)
     else:
         print("symbol_info:")
         print(f"Information about symbol {symbol} not found.")
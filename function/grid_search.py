@@ -0,0 +1,183 @@
+from import_libraries.libraries import *
+from function.preprocess_function import (define_level, rebound_analysis, calculate_accumulated_price_changes,
+                                          calculate_min_capital, simulate_capital, capital_costs, symbol_info,
+                                          NO_SIGNAL, SELL, BUY, BOTH, SIGNAL_NAMES)
+from function.rolling import ExtremaIndex
+import time
+
+
+def _parameters(window_size_range, bias_range) -> list:
+    # The order of the loops of `optimize_parameters`, window first
+    parameters = [(window_size, bias) for window_size in range(*window_size_range) for bias in range(*bias_range)]
+    if any(window_size <= 0 or bias < 0 for window_size, bias in parameters):
+        raise ValueError("Window sizes must be positive and biases non-negative.")
+    return parameters
+
+
+def signal_grid(data: pd.DataFrame, window_size_range, bias_range):
+    """
+    Signals of `define_level` + `rebound_analysis` for every (window_size, bias) at once.
+
+    The rolling extrema come from one `ExtremaIndex` of the data, every bias is an
+    offset into them, and the sell / buy conditions, the forward fill and the
+    dropped rows are evaluated for all biases of a window in one array pass.
+
+    Args:
+        data (pd.DataFrame): Input of `define_level`.
+        window_size_range (tuple): Arguments of `range` for the window sizes.
+        bias_range (tuple): Arguments of `range` for the biases.
+
+    Returns:
+        tuple: List of (window_size, bias) and an int8 matrix (parameters x rows of `data`) with the
+        forward-filled signal: 1 sell, 2 buy, 3 both, 0 where the row is not in the `rebound_analysis` output.
+    """
+    parameters = _parameters(window_size_range, bias_range)
+    high = data["High"].to_numpy(dtype=np.float64)
+    low = data["Low"].to_numpy(dtype=np.float64)
+    close = data["Close"].to_numpy(dtype=np.float64)
+    # `dropna` of `define_level` looks at every column
+    complete = data.notna().all(axis=1).to_numpy()
+    n = len(data)
+    positions = np.arange(n)
+
+    signals = np.zeros((len(parameters), n), dtype=np.int8)
+    biases = list(range(*bias_range))
+    extrema = ExtremaIndex.from_frame(data)
+    row = 0
+    for window_size in range(*window_size_range):
+        rolling_max = extrema.rolling_max(window_size)
+        rolling_min = extrema.rolling_min(window_size)
+
+        levels_max = np.full((len(biases), n), np.nan)
+        levels_min = np.full((len(biases), n), np.nan)
+        for i, bias in enumerate(biases):
+            levels_max[i, bias:] = rolling_max[:n - bias]
+            levels_min[i, bias:] = rolling_min[:n - bias]
+
+        valid = complete & ~np.isnan(levels_max) & ~np.isnan(levels_min)
+        codes = (((levels_max < high) & (levels_max > close)) * SELL
+                 + ((levels_min > low) & (levels_min < close)) * BUY).astype(np.int8)
+
+        # Forward fill over the kept rows, rows before the first signal are dropped
+        last = np.maximum.accumulate(np.where(valid & (codes != NO_SIGNAL), positions, -1), axis=1)
+        filled = np.take_along_axis(codes, np.maximum(last, 0), axis=1)
+        filled[~valid | (last < 0)] = NO_SIGNAL
+
+        signals[row:row + len(biases)] = filled
+        row += len(biases)
+    return parameters, signals
+
+
+def signal_score(close: np.ndarray, signals: np.ndarray) -> float:
+    """
+    `calculate_accumulated_price_changes` of one row of the signal matrix.
+
+    Every change from a sell run to a buy run, or back, books the price change
+    between the two run starts on the last row of the first run. The booked
+    values are summed over the sell rows and over the buy rows, as pandas does.
+    """
+    kept = np.flatnonzero(signals)
+    if len(kept) == 0:
+        return 0.0
+    signal = signals[kept]
+    price = close[kept]
+
+    starts = np.flatnonzero(np.concatenate(([True], signal[1:] != signal[:-1])))
+    first, second = signal[starts[:-1]], signal[starts[1:]]
+    sell_to_buy = (first == SELL) & (second == BUY)
+    buy_to_sell = (first == BUY) & (second == SELL)
+
+    accumulated = np.zeros(len(signal))
+    booked = starts[1:] - 1
+    accumulated[booked[sell_to_buy]] = price[starts[:-1][sell_to_buy]] - price[starts[1:][sell_to_buy]]
+    accumulated[booked[buy_to_sell]] = price[starts[1:][buy_to_sell]] - price[starts[:-1][buy_to_sell]]
+
+    all_sell = accumulated[signal == SELL].sum()
+    all_buy = accumulated[signal == BUY].sum()
+    return all_buy + all_sell
+
+
+def grid_scores(data: pd.DataFrame, window_size_range, bias_range, calculate=calculate_accumulated_price_changes,
+                symbol=None, batch_size: int = 256) -> pd.DataFrame:
+    """
+    Score of `calculate` for every (window_size, bias), from `signal_grid`.
+
+    `calculate_accumulated_price_changes` is scored row by row with `signal_score`,
+    `calculate_min_capital` by `simulate_capital` on `batch_size` rows at a time.
+
+    Returns:
+        pd.DataFrame: window_size, bias and score, in the order `optimize_parameters` tries them.
+    """
+    parameters, signals = signal_grid(data, window_size_range, bias_range)
+    close = data["Close"].to_numpy(dtype=np.float64)
+    if calculate is calculate_accumulated_price_changes:
+        scores = [signal_score(close, row) for row in signals]
+    elif calculate is calculate_min_capital:
+        costs = capital_costs(symbol_info(symbol))
+        scores = np.concatenate([simulate_capital(signals[i:i + batch_size], close, curves=False, **costs)[0]
+                                 for i in range(0, len(signals), batch_size)]) if len(signals) else []
+    else:
+        raise ValueError("calculate must be calculate_accumulated_price_changes or calculate_min_capital.")
+    return pd.DataFrame(parameters, columns=["window_size", "bias"]).assign(score=scores)
+
+
+def optimize_parameters_grid(data, window_size_range, bias_range, return_param=False, symbol=None,
+                             calculate=calculate_accumulated_price_changes):
+    """
+    `optimize_parameters` with `rebound_analysis`, evaluated as one grid.
+
+    Returns the same parameters: the first combination, windows first, with the
+    highest score.
+
+    Args:
+        data (pd.DataFrame): The input DataFrame.
+        window_size_range (tuple): Arguments of `range` for the window sizes.
+        bias_range (tuple): Arguments of `range` for the biases.
+        return_param (bool, optional): Return the parameters instead of the data. Defaults to False.
+        symbol (str, optional): The symbol, used by `calculate_min_capital`. Defaults to None.
+        calculate (function, optional): `calculate_accumulated_price_changes` or `calculate_min_capital`.
+            Defaults to `calculate_accumulated_price_changes`.
+
+    Returns:
+        dict or pd.DataFrame: The best parameters, or the `rebound_analysis` output for them, after `calculate`.
+    """
+    scores = grid_scores(data, window_size_range, bias_range, calculate, symbol)
+    best_params = None
+    if len(scores):
+        best = scores.iloc[int(np.argmax(scores["score"].to_numpy()))]
+        best_params = {'window_size': int(best["window_size"]), 'bias': int(best["bias"])}
+    print(best_params)
+
+    if return_param:
+        return best_params
+    if best_params is None:
+        return None
+    best_data = rebound_analysis(define_level(data, best_params["window_size"], best_params["bias"]))
+    # As in `optimize_parameters`, the returned data went through `calculate` ('Capital' column)
+    calculate(best_data, symbol=symbol)
+    return best_data
+
+
+def benchmark_grid(data: pd.DataFrame, window_size_range=(1, 30), bias_range=(1, 50), loop_combinations: int = 20,
+                   calculate=calculate_accumulated_price_changes, symbol=None):
+    """
+    Seconds of the grid engine for the whole grid against the per-combination pipeline.
+
+    The pipeline is timed on `loop_combinations` combinations and extrapolated.
+
+    Returns:
+        dict: Combinations, grid seconds, estimated loop seconds and the speed-up.
+    """
+    parameters = _parameters(window_size_range, bias_range)
+    start = time.perf_counter()
+    grid_scores(data, window_size_range, bias_range, calculate, symbol)
+    grid_seconds = time.perf_counter() - start
+
+    sample = parameters[:loop_combinations]
+    start = time.perf_counter()
+    for window_size, bias in sample:
+        calculate(rebound_analysis(define_level(data, window_size, bias)), symbol=symbol)
+    loop_seconds = (time.perf_counter() - start) / len(sample) * len(parameters)
+
+    return {"combinations": len(parameters), "grid_seconds": grid_seconds, "loop_seconds": loop_seconds,
+            "speedup": loop_seconds / grid_seconds}
@@ -0,0 +1,1056 @@
+from import_libraries.libraries import *
+from function.indicator_registry import default_registry, BASE_COLUMNS
+from function.rolling import StreamingMedian, StreamingMode
+from collections import deque, namedtuple
+import math
+
+Bar = namedtuple("Bar", ["open", "high", "low", "close", "volume"])
+
+NAN = float("nan")
+
+# TA_EPSILON of TA-Lib 0.6
+EPSILON = 0.00000000000001
+
+
+def _is_zero(value):
+    # TA_IS_ZERO of TA-Lib 0.6
+    return -EPSILON < value < EPSILON
+
+
+# Building blocks
+class RollingSum:
+    """
+    Sum of the last `period` values.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+
+    @property
+    def ready(self):
+        return len(self.window) == self.period
+
+    def update(self, value: float) -> float:
+        # The oldest value leaves before the new one is added, as in TA-Lib
+        self.window.append(value)
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        self.total += value
+        return self.total if self.ready else NAN
+
+
+class SMA:
+    """
+    Simple moving average (TA-Lib SMA, MA with matype=0).
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.sum = RollingSum(period)
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        total = self.sum.update(value)
+        self.value = total / self.period if self.sum.ready else NAN
+        return self.value
+
+
+class EMA:
+    """
+    Exponential moving average seeded with the SMA of the first `period` values, as TA-Lib does.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        if self.count < self.period:
+            self.count += 1
+            self.total += value
+            if self.count == self.period:
+                self.value = self.total / self.period
+        else:
+            self.value = ((value - self.value) * self.k) + self.value
+        return self.value
+
+
+class EMAChain:
+    """
+    `depth` EMAs, each fed with the output of the previous one once it is ready.
+    """
+
+    def __init__(self, period: int, depth: int):
+        self.emas = [EMA(period) for _ in range(depth)]
+
+    def update(self, value: float) -> list:
+        values = []
+        for ema in self.emas:
+            value = ema.update(value)
+            values.append(value)
+            if value != value:
+                values.extend([NAN] * (len(self.emas) - len(values)))
+                break
+        return values
+
+
+class WMA:
+    """
+    Linearly weighted moving average, the newest value has weight `period`.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+        self.weighted = 0.0
+        self.divider = period * (period + 1) / 2
+
+    def update(self, value: float) -> float:
+        if len(self.window) == self.period:
+            # Every weight drops by one, the oldest value drops out
+            self.weighted -= self.total
+            self.total -= self.window.popleft()
+        self.weighted += (len(self.window) + 1) * value
+        self.total += value
+        self.window.append(value)
+        return self.weighted / self.divider if len(self.window) == self.period else NAN
+
+
+class Extremum:
+    """
+    Maximum (or minimum) of the last `period` values and its bar index, kept in a monotonic deque.
+
+    Equal values follow TA-Lib: a new value equal to the extremum takes its
+    place, but when the extremum leaves the window MAX/MIN(INDEX) report the
+    oldest of the equal values in the window and AROON (`newest`) the newest.
+    Without `newest` the deque keeps equal values, so its front is the oldest one.
+    """
+
+    def __init__(self, period: int, maximum: bool = True, newest: bool = False):
+        self.period = period
+        self.maximum = maximum
+        self.newest = newest
+        self.window = deque()
+        self.index = -1
+        self.best = (-1, NAN)
+
+    def update(self, value: float):
+        self.index += 1
+        window = self.window
+        if self.maximum:
+            while window and (window[-1][1] < value or self.newest and window[-1][1] == value):
+                window.pop()
+        else:
+            while window and (window[-1][1] > value or self.newest and window[-1][1] == value):
+                window.pop()
+        window.append((self.index, value))
+        trailing = self.index - self.period + 1
+        if window[0][0] < trailing:
+            window.popleft()
+        if trailing < 0:
+            return NAN, NAN
+        if self.best[0] < trailing:
+            self.best = window[0]
+        elif value >= self.best[1] if self.maximum else value <= self.best[1]:
+            self.best = (self.index, value)
+        return self.best[1], float(self.best[0])
+
+
+class Lag:
+    """
+    Keeps the last `period + 1` values to compare a value with the one `period` bars earlier.
+    """
+
+    def __init__(self, period: int):
+        self.window = deque(maxlen=period + 1)
+
+    def update(self, value: float):
+        self.window.append(value)
+        if len(self.window) < self.window.maxlen:
+            return NAN
+        return self.window[0]
+
+
+# Indicators, every one maps a Bar to a tuple of values in the order of `names`
+class MovingAverages:
+    """
+    SMA, MA, EMA, DEMA, TEMA, T3 (vfactor=0), TRIMA and WMA of the close.
+    """
+
+    def __init__(self, period: int, vfactor: float = 0.0):
+        self.names = [name + str(period) for name in ("DEMA", "EMA", "SMA", "TRIMA", "WMA", "T3", "TEMA", "MA")]
+        self.sma = SMA(period)
+        self.ema = EMAChain(period, 3)
+        self.t3 = EMAChain(period, 6)
+        self.trima = (SMA((period + 1) // 2), SMA((period + 1) // 2)) if period % 2 else \
+            (SMA(period // 2), SMA(period // 2 + 1))
+        self.wma = WMA(period)
+        v = vfactor
+        self.t3_weights = (-v * v * v, 3 * v * v + 3 * v * v * v, -6 * v * v - 3 * v - 3 * v * v * v,
+                           1 + 3 * v + v * v * v + 3 * v * v)
+
+    def update(self, bar: Bar):
+        close = bar.close
+        sma = self.sma.update(close)
+        e1, e2, e3 = self.ema.update(close)
+        dema = 2 * e1 - e2
+        tema = 3 * e1 - 3 * e2 + e3
+
+        t = self.t3.update(close)
+        c1, c2, c3, c4 = self.t3_weights
+        t3 = c1 * t[5] + c2 * t[4] + c3 * t[3] + c4 * t[2]
+
+        trima = self.trima[0].update(close)
+        trima = self.trima[1].update(trima) if trima == trima else NAN
+        return dema, e1, sma, trima, self.wma.update(close), t3, tema, sma
+
+
+class PriceExtremes:
+    """
+    MAX, MAXINDEX, MIN, MININDEX and MIDPOINT of the close.
+    """
+
+    def __init__(self, period: int):
+        self.names = [name + str(period) for name in ("MIDPOINT", "MAX", "MAXINDEX", "MIN", "MININDEX")]
+        self.max = Extremum(period, True)
+        self.min = Extremum(period, False)
+
+    def update(self, bar: Bar):
+        highest, highest_index = self.max.update(bar.close)
+        lowest, lowest_index = self.min.update(bar.close)
+        return (highest + lowest) / 2, highest, highest_index, lowest, lowest_index
+
+
+class Summation:
+    """
+    SUM of the close.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["SUM" + str(period)]
+        self.sum = RollingSum(period)
+
+    def update(self, bar: Bar):
+        return (self.sum.update(bar.close),)
+
+
+class RateOfChange:
+    """
+    MOM, ROC, ROCP, ROCR and ROCR100 of the close.
+    """
+
+    def __init__(self, period: int):
+        self.names = [name + str(period) for name in ("MOM", "ROC", "ROCP", "ROCR", "ROCR100")]
+        self.lag = Lag(period)
+
+    def update(self, bar: Bar):
+        close = bar.close
+        previous = self.lag.update(close)
+        if previous != previous:
+            return NAN, NAN, NAN, NAN, NAN
+        if previous == 0.0:
+            return close - previous, 0.0, 0.0, 0.0, 0.0
+        return (close - previous, ((close / previous) - 1.0) * 100.0, (close - previous) / previous,
+                close / previous, (close / previous) * 100.0)
+
+
+class RelativeStrength:
+    """
+    RSI and CMO of the close, with Wilder smoothing.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["RSI" + str(period), "CMO" + str(period)]
+        self.period = period
+        self.previous = None
+        self.count = 0
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def update(self, bar: Bar):
+        close = bar.close
+        if self.previous is None:
+            self.previous = close
+            return NAN, NAN
+        change = close - self.previous
+        self.previous = close
+        period = self.period
+
+        self.count += 1
+        if self.count <= period:
+            if change < 0:
+                self.loss -= change
+            else:
+                self.gain += change
+            if self.count < period:
+                return NAN, NAN
+            self.loss /= period
+            self.gain /= period
+        else:
+            self.loss *= (period - 1)
+            self.gain *= (period - 1)
+            if change < 0:
+                self.loss -= change
+            else:
+                self.gain += change
+            self.loss /= period
+            self.gain /= period
+
+        # TA-Lib only gives 0 when both averages are exactly 0
+        total = self.gain + self.loss
+        if total == 0.0:
+            return 0.0, 0.0
+        return 100 * (self.gain / total), 100 * ((self.gain - self.loss) / total)
+
+
+class DirectionalMovement:
+    """
+    PLUS_DM, MINUS_DM, PLUS_DI, MINUS_DI, DX, ADX and ADXR, with Wilder smoothing.
+    """
+
+    def __init__(self, period: int):
+        self.names = [name + str(period) for name in
+                      ("ADX", "ADXR", "DX", "MINUS_DI", "MINUS_DM", "PLUS_DI", "PLUS_DM")]
+        self.period = period
+        self.previous = None
+        self.count = 0
+        self.plus_dm = self.minus_dm = self.true_range = 0.0
+        self.dx_count = 0
+        self.dx_sum = 0.0
+        self.adx = NAN
+        self.adx_window = deque(maxlen=period)
+
+    def update(self, bar: Bar):
+        high, low, close = bar.high, bar.low, bar.close
+        if self.previous is None:
+            self.previous = (high, low, close)
+            return (NAN,) * 7
+        previous_high, previous_low, previous_close = self.previous
+        self.previous = (high, low, close)
+        period = self.period
+
+        diff_plus = high - previous_high
+        diff_minus = previous_low - low
+        plus = diff_plus if diff_plus > 0 and diff_plus > diff_minus else 0.0
+        minus = diff_minus if diff_minus > 0 and diff_plus < diff_minus else 0.0
+        true_range = max(high - low, abs(high - previous_close), abs(low - previous_close))
+
+        self.count += 1
+        if self.count < period:
+            self.plus_dm += plus
+            self.minus_dm += minus
+            self.true_range += true_range
+            if self.count < period - 1:
+                return (NAN,) * 7
+            return NAN, NAN, NAN, NAN, self.minus_dm, NAN, self.plus_dm
+
+        self.plus_dm = self.plus_dm - (self.plus_dm / period) + plus
+        self.minus_dm = self.minus_dm - (self.minus_dm / period) + minus
+        self.true_range = self.true_range - (self.true_range / period) + true_range
+
+        # TA-Lib only gives 0 when the sums are exactly 0
+        plus_di = minus_di = dx = 0.0
+        if self.true_range != 0.0:
+            plus_di = 100 * (self.plus_dm / self.true_range)
+            minus_di = 100 * (self.minus_dm / self.true_range)
+            total = minus_di + plus_di
+            if total != 0.0:
+                dx = 100 * (abs(minus_di - plus_di) / total)
+
+        adx = adxr = NAN
+        self.dx_count += 1
+        if self.dx_count <= period:
+            self.dx_sum += dx
+            if self.dx_count == period:
+                self.adx = self.dx_sum / period
+        else:
+            self.adx = ((self.adx * (period - 1)) + dx) / period
+        if self.dx_count >= period:
+            adx = self.adx
+            self.adx_window.append(adx)
+            if len(self.adx_window) == period:
+                adxr = (adx + self.adx_window[0]) / 2
+        return adx, adxr, dx, minus_di, self.minus_dm, plus_di, self.plus_dm
+
+
+class Oscillators:
+    """
+    WILLR and AROONOSC.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["AROONOSC" + str(period), "WILLR" + str(period)]
+        self.period = period
+        self.high = Extremum(period, True)
+        self.low = Extremum(period, False)
+        # AROON looks at `period + 1` bars
+        self.aroon_high = Extremum(period + 1, True, newest=True)
+        self.aroon_low = Extremum(period + 1, False, newest=True)
+
+    def update(self, bar: Bar):
+        highest, _ = self.high.update(bar.high)
+        lowest, _ = self.low.update(bar.low)
+        willr = NAN
+        if highest == highest:
+            diff = (highest - lowest) / (-100.0)
+            willr = (highest - bar.close) / diff if diff != 0.0 else 0.0
+
+        _, highest_index = self.aroon_high.update(bar.high)
+        _, lowest_index = self.aroon_low.update(bar.low)
+        aroon = (100.0 / self.period) * (highest_index - lowest_index)
+        return aroon, willr
+
+
+class MoneyFlow:
+    """
+    MFI on the typical price and the 'Volume' column.
+
+    A sum whose window holds no money flow is set to 0, so the rounding left
+    by the running sums after a flat stretch is dropped as TA-Lib does.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["MFI" + str(period)]
+        self.previous = None
+        self.flows = deque(maxlen=period)
+        self.positive = RollingSum(period)
+        self.negative = RollingSum(period)
+        self.counts = [0, 0]
+
+    def update(self, bar: Bar):
+        typical = (bar.high + bar.low + bar.close) / 3.0
+        if self.previous is None:
+            self.previous = typical
+            return (NAN,)
+        change = typical - self.previous
+        self.previous = typical
+        flow = typical * bar.volume
+        flows = (flow if change > 0 else 0.0, flow if change < 0 else 0.0)
+
+        counts = self.counts
+        if len(self.flows) == self.flows.maxlen:
+            for side, value in enumerate(self.flows[0]):
+                counts[side] -= value != 0.0
+        self.flows.append(flows)
+        for side, value in enumerate(flows):
+            counts[side] += value != 0.0
+
+        positive = self.positive.update(flows[0])
+        negative = self.negative.update(flows[1])
+        if positive != positive:
+            return (NAN,)
+        if not counts[0]:
+            positive = self.positive.total = 0.0
+        if not counts[1]:
+            negative = self.negative.total = 0.0
+        total = positive + negative
+        return (0.0 if _is_zero(total) else 100.0 * (positive / total),)
+
+
+class Trix:
+    """
+    TRIX, the one bar rate of change of the triple EMA of the close.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["TRIX" + str(period)]
+        self.ema = EMAChain(period, 3)
+        self.previous = NAN
+
+    def update(self, bar: Bar):
+        value = self.ema.update(bar.close)[2]
+        previous, self.previous = self.previous, value
+        if previous != previous or value != value:
+            return (NAN,)
+        return (((value / previous) - 1.0) * 100.0 if previous != 0.0 else 0.0,)
+
+
+class LinearRegression:
+    """
+    LINEARREG, LINEARREG_ANGLE, LINEARREG_INTERCEPT, LINEARREG_SLOPE and TSF of the close.
+
+    The sums of the regression are updated when a value enters and leaves the
+    window, with x counted backwards from the newest bar as in TA-Lib.
+    """
+
+    def __init__(self, period: int):
+        self.names = [name + str(period) for name in
+                      ("LINEARREG", "LINEARREG_ANGLE", "LINEARREG_INTERCEPT", "LINEARREG_SLOPE", "TSF")]
+        self.period = period
+        self.window = deque()
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.sum_x = period * (period - 1) * 0.5
+        sum_x_sqr = period * (period - 1) * (2 * period - 1) / 6
+        self.divisor = self.sum_x * self.sum_x - period * sum_x_sqr
+
+    def update(self, bar: Bar):
+        value = bar.close
+        period = self.period
+        # Older values move one step back in x, the new one has x = 0
+        self.sum_xy += self.sum_y
+        self.sum_y += value
+        self.window.append(value)
+        if len(self.window) > period:
+            oldest = self.window.popleft()
+            self.sum_xy -= period * oldest
+            self.sum_y -= oldest
+        if len(self.window) < period:
+            return (NAN,) * 5
+
+        slope = (period * self.sum_xy - self.sum_x * self.sum_y) / self.divisor
+        intercept = (self.sum_y - slope * self.sum_x) / period
+        return (intercept + slope * (period - 1), math.atan(slope) * (180.0 / math.pi), intercept, slope,
+                intercept + slope * period)
+
+
+class Dispersion:
+    """
+    VAR and STDDEV of the close (nbdev=1).
+
+    The values are centered on the first close, the variance does not change
+    but the running sums lose less precision.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["STDDEV" + str(period), "VAR" + str(period)]
+        self.period = period
+        self.origin = None
+        self.sum = RollingSum(period)
+        self.squares = RollingSum(period)
+
+    def update(self, bar: Bar):
+        if self.origin is None:
+            self.origin = bar.close
+        close = bar.close - self.origin
+        total = self.sum.update(close)
+        squares = self.squares.update(close * close)
+        if total != total:
+            return NAN, NAN
+        mean = total / self.period
+        variance = squares / self.period - mean * mean
+        return (math.sqrt(variance) if not (variance < EPSILON) else 0.0), variance
+
+
+class Correlation:
+    """
+    CORREL of high and low, centered on the first bar as `Dispersion`.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["CORREL" + str(period)]
+        self.period = period
+        self.origin = None
+        self.sums = [RollingSum(period) for _ in range(5)]
+
+    def update(self, bar: Bar):
+        if self.origin is None:
+            self.origin = (bar.high, bar.low)
+        x, y = bar.high - self.origin[0], bar.low - self.origin[1]
+        sum_x, sum_y, sum_xy, sum_x2, sum_y2 = (rolling.update(value) for rolling, value in
+                                                 zip(self.sums, (x, y, x * y, x * x, y * y)))
+        if sum_x != sum_x:
+            return (NAN,)
+        period = self.period
+        denominator = (sum_x2 - ((sum_x * sum_x) / period)) * (sum_y2 - ((sum_y * sum_y) / period))
+        if denominator < EPSILON:
+            return (0.0,)
+        return ((sum_xy - ((sum_x * sum_y) / period)) / math.sqrt(denominator),)
+
+
+class PriceOscillator:
+    """
+    APO and PPO of the close with simple moving averages (matype=0).
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26):
+        self.names = ["APO", "PPO"]
+        self.fast = SMA(fast)
+        self.slow = SMA(slow)
+
+    def update(self, bar: Bar):
+        fast = self.fast.update(bar.close)
+        slow = self.slow.update(bar.close)
+        if slow != slow:
+            return NAN, NAN
+        return fast - slow, (((fast - slow) / slow) * 100.0 if not _is_zero(slow) else 0.0)
+
+
+class UltimateOscillator:
+    """
+    ULTOSC, stored as 'real' like in `momentum_indicator_functions`.
+    """
+
+    def __init__(self, periods=(7, 14, 28)):
+        self.names = ["real"]
+        self.periods = sorted(periods)
+        self.pressure = [RollingSum(period) for period in self.periods]
+        self.ranges = [RollingSum(period) for period in self.periods]
+        self.previous_close = None
+
+    def update(self, bar: Bar):
+        previous_close, self.previous_close = self.previous_close, bar.close
+        if previous_close is None:
+            return (NAN,)
+        true_low = min(bar.low, previous_close)
+        pressure = bar.close - true_low
+        true_range = max(bar.high - bar.low, abs(previous_close - bar.high), abs(previous_close - bar.low))
+
+        averages = []
+        for pressures, ranges in zip(self.pressure, self.ranges):
+            a = pressures.update(pressure)
+            b = ranges.update(true_range)
+            averages.append(NAN if b != b else (a / b if not _is_zero(b) else 0.0))
+        # Shortest period weighs 4, the middle one 2
+        return (100.0 * ((4.0 * averages[0] + 2.0 * averages[1] + averages[2]) / 7.0),)
+
+
+class Arithmetic:
+    """
+    Math transforms of the close and math operators of high and low, which have no state.
+    """
+
+    TRANSFORMS = {"ACOS": math.acos, "ASIN": math.asin, "ATAN": math.atan, "CEIL": math.ceil, "COS": math.cos,
+                  "FLOOR": math.floor, "LN": math.log, "LOG10": math.log10, "SIN": math.sin,
+                  "SQRT": math.sqrt, "TAN": math.tan, "TANH": math.tanh}
+
+    def __init__(self):
+        self.names = ["ADD", "DIV", "SUB"] + list(self.TRANSFORMS)
+
+    def update(self, bar: Bar):
+        values = [bar.high + bar.low, bar.high / bar.low if bar.low else NAN, bar.high - bar.low]
+        for function in self.TRANSFORMS.values():
+            try:
+                values.append(float(function(bar.close)))
+            except ValueError:
+                values.append(NAN)
+        return values
+
+
+class Kama:
+    """
+    KAMA of the close: an EMA whose smoothing constant follows the efficiency ratio.
+
+    The volatility (sum of absolute one bar changes over `period` bars) is a
+    running sum, so every bar is one step of the recurrence, as in TA-Lib.
+    """
+
+    FASTEST = 2.0 / (2.0 + 1.0)
+    SLOWEST = 2.0 / (30.0 + 1.0)
+
+    def __init__(self, period: int):
+        self.names = ["KAMA" + str(period)]
+        self.period = period
+        self.window = deque(maxlen=period + 1)
+        self.volatility = 0.0
+        self.value = NAN
+
+    def update(self, bar: Bar):
+        close = bar.close
+        window = self.window
+        if window:
+            if len(window) == window.maxlen:
+                # The change between the two oldest values leaves the sum
+                self.volatility -= abs(window[0] - window[1])
+            self.volatility += abs(window[-1] - close)
+            if len(window) == self.period:
+                self.value = window[-1]
+        window.append(close)
+        if len(window) < window.maxlen:
+            return (NAN,)
+
+        change = close - window[0]
+        if self.volatility <= change or _is_zero(self.volatility):
+            efficiency = 1.0
+        else:
+            efficiency = abs(change / self.volatility)
+        constant = (efficiency * (self.FASTEST - self.SLOWEST)) + self.SLOWEST
+        constant *= constant
+        self.value = ((close - self.value) * constant) + self.value
+        return (self.value,)
+
+
+class HilbertTrendline:
+    """
+    HT_TRENDLINE of the close, a port of TA-Lib's recursion.
+
+    The price is smoothed with a 4 bar WMA, a Hilbert transform of the smoothed
+    price estimates the dominant cycle period, and the trendline is a weighted
+    average of the mean close over that period (at most 50 bars). Every bar is
+    one step of the recursion, the values equal TA-Lib's. The indicator has no
+    period, its value is reported for every `HT_TRENDLINE{period}` column.
+    """
+
+    A, B = 0.0962, 0.5769
+    LOOKBACK = 63
+    RAD_TO_DEG = 45.0 / math.atan(1)
+
+    def __init__(self, periods):
+        self.names = ["HT_TRENDLINE" + str(period) for period in periods]
+        self.count = 0
+        self.prices = deque(maxlen=50)
+        self.trailing = deque()
+        self.trailing_value = 0.0
+        self.wma_sub = self.wma_sum = 0.0
+        self.hilbert_index = 0
+        # Per transform and bar parity: the 3 last scaled inputs, the previous output term and input
+        self.transforms = {name: {parity: [[0.0, 0.0, 0.0], 0.0, 0.0] for parity in (0, 1)}
+                           for name in ("detrender", "q1", "ji", "jq")}
+        self.period = self.smooth_period = 0.0
+        self.previous_i2 = self.previous_q2 = self.re = self.im = 0.0
+        self.i1_odd = [0.0, 0.0]
+        self.i1_even = [0.0, 0.0]
+        self.trend = [0.0, 0.0, 0.0]
+
+    def __smooth(self, price):
+        self.wma_sub += price
+        self.wma_sub -= self.trailing_value
+        self.wma_sum += price * 4.0
+        self.trailing_value = self.trailing.popleft()
+        smoothed = self.wma_sum * 0.1
+        self.wma_sum -= self.wma_sub
+        return smoothed
+
+    def __hilbert(self, name, value, parity, adjusted_period):
+        state = self.transforms[name][parity]
+        scaled = self.A * value
+        result = -state[0][self.hilbert_index]
+        state[0][self.hilbert_index] = scaled
+        result += scaled
+        result -= state[1]
+        state[1] = self.B * state[2]
+        result += state[1]
+        state[2] = value
+        return result * adjusted_period
+
+    def update(self, bar: Bar):
+        t = self.count
+        self.count += 1
+        price = bar.close
+        self.prices.append(price)
+        self.trailing.append(price)
+        if t < 3:
+            self.wma_sub += price
+            self.wma_sum += price * (t + 1)
+            return (NAN,) * len(self.names)
+        smoothed = self.__smooth(price)
+        if t < 37:
+            return (NAN,) * len(self.names)
+
+        adjusted_period = (0.075 * self.period) + 0.54
+        parity = t % 2
+        delayed = self.i1_even if parity == 0 else self.i1_odd
+        detrender = self.__hilbert("detrender", smoothed, parity, adjusted_period)
+        q1 = self.__hilbert("q1", detrender, parity, adjusted_period)
+        ji = self.__hilbert("ji", delayed[1], parity, adjusted_period)
+        jq = self.__hilbert("jq", q1, parity, adjusted_period)
+        if parity == 0 and self.hilbert_index == 2:
+            self.hilbert_index = 0
+        elif parity == 0:
+            self.hilbert_index += 1
+        q2 = (0.2 * (q1 + ji)) + (0.8 * self.previous_q2)
+        i2 = (0.2 * (delayed[1] - jq)) + (0.8 * self.previous_i2)
+        # The detrender delayed by 3 bars, kept per parity
+        other = self.i1_odd if parity == 0 else self.i1_even
+        other[1] = other[0]
+        other[0] = detrender
+
+        self.re = (0.2 * ((i2 * self.previous_i2) + (q2 * self.previous_q2))) + (0.8 * self.re)
+        self.im = (0.2 * ((i2 * self.previous_q2) - (q2 * self.previous_i2))) + (0.8 * self.im)
+        self.previous_q2, self.previous_i2 = q2, i2
+        previous = self.period
+        period = previous
+        if self.im != 0.0 and self.re != 0.0:
+            period = 360.0 / (math.atan(self.im / self.re) * self.RAD_TO_DEG)
+        if period > 1.5 * previous:
+            period = 1.5 * previous
+        if period < 0.67 * previous:
+            period = 0.67 * previous
+        if period < 6:
+            period = 6.0
+        elif period > 50:
+            period = 50.0
+        self.period = (0.2 * period) + (0.8 * previous)
+        self.smooth_period = (0.33 * self.period) + (0.67 * self.smooth_period)
+
+        length = int(self.smooth_period + 0.5)
+        average = 0.0
+        for i in range(length):
+            average += self.prices[-1 - i]
+        if length > 0:
+            average = average / length
+        value = (4.0 * average + 3.0 * self.trend[0] + 2.0 * self.trend[1] + self.trend[2]) / 10.0
+        self.trend = [average, self.trend[0], self.trend[1]]
+        return ((value if t >= self.LOOKBACK else NAN),) * len(self.names)
+
+
+class CommodityChannel:
+    """
+    CCI of the typical price.
+
+    The mean deviation has no running form, so it is computed over the
+    `period` values of a tail buffer, O(period) per bar. `push` only fills the
+    buffer, for bars whose value is not needed. As TA-Lib 0.6, CCI is 0 when
+    the difference or the mean deviation is zero relative to the average.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["CCI" + str(period)]
+        self.period = period
+        self.window = deque(maxlen=period)
+
+    def push(self, bar: Bar):
+        self.window.append((bar.high + bar.low + bar.close) / 3)
+
+    def update(self, bar: Bar):
+        self.push(bar)
+        if len(self.window) < self.period:
+            return (NAN,)
+        average = sum(self.window) / self.period
+        deviation = sum(abs(value - average) for value in self.window) / self.period
+        difference = self.window[-1] - average
+        epsilon = EPSILON * abs(average)
+        if abs(difference) < epsilon or deviation < epsilon:
+            return (0.0,)
+        return (difference / (0.015 * deviation),)
+
+
+class Beta:
+    """
+    BETA of the one bar returns of high (x) and low (y), from running sums.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["BETA" + str(period)]
+        self.period = period
+        self.previous = None
+        self.sums = [RollingSum(period) for _ in range(4)]
+
+    def update(self, bar: Bar):
+        previous, self.previous = self.previous, (bar.high, bar.low)
+        if previous is None:
+            return (NAN,)
+        x = (bar.high - previous[0]) / previous[0] if previous[0] != 0.0 else 0.0
+        y = (bar.low - previous[1]) / previous[1] if previous[1] != 0.0 else 0.0
+        sum_x, sum_y, sum_xx, sum_xy = (rolling.update(value) for rolling, value in
+                                        zip(self.sums, (x, y, x * x, x * y)))
+        if sum_x != sum_x:
+            return (NAN,)
+        period = self.period
+        denominator = period * sum_xx - sum_x * sum_x
+        if _is_zero(denominator):
+            return (0.0,)
+        return ((period * sum_xy - sum_x * sum_y) / denominator,)
+
+
+class RollingStatistics:
+    """
+    median, mode and std of `statistic_functions`: the rolling median and mode
+    of the close and the sample standard deviation of the median, over up to
+    `period` bars (min_periods=1).
+
+    The median and mode come from the heaps of `StreamingMedian` and
+    `StreamingMode`, O(log period) per bar. The standard deviation follows the
+    compensated Welford remove / add steps of pandas' rolling variance and is
+    0 when every value of the window is equal.
+    """
+
+    def __init__(self, period: int):
+        self.names = ["median" + str(period), "mode" + str(period), "std" + str(period)]
+        self.period = period
+        self.median = StreamingMedian(period)
+        self.mode = StreamingMode(period)
+        self.window = deque()
+        self.mean = 0.0
+        self.squares = 0.0
+        self.compensation = 0.0
+        # Length of the run of equal values at the end of the window
+        self.same = 0
+
+    def __step(self, value: float, count: int, sign: float):
+        # add_var / remove_var of pandas, `count` is the number of values after the step
+        previous = self.mean - self.compensation
+        y = value - self.compensation
+        t = y - self.mean
+        self.compensation = t + self.mean - y
+        self.mean += sign * t / count
+        self.squares += sign * (value - previous) * (value - self.mean)
+
+    def update(self, bar: Bar):
+        median = self.median.update(bar.close)
+        mode = self.mode.update(bar.close)
+
+        window = self.window
+        if len(window) == self.period:
+            self.__step(window.popleft(), len(window), -1.0)
+        self.same = self.same + 1 if window and window[-1] == median else 1
+        window.append(median)
+        count = len(window)
+        self.__step(median, count, 1.0)
+
+        std = NAN
+        if count > 1:
+            std = 0.0 if self.same >= count or self.squares <= 0.0 else math.sqrt(self.squares / (count - 1))
+        return median, mode, std
+
+
+class CandlePatterns:
+    """
+    Candlestick patterns of the registry, evaluated with TA-Lib on a tail buffer.
+
+    A pattern reads at most its lookback of bars before the current one, so
+    running it over the last `max(lookback) + 1` bars gives the value of the
+    whole history. `push` only fills the buffer, for bars whose value is not needed.
+    """
+
+    def __init__(self, specs):
+        self.specs = list(specs)
+        self.names = [spec.name for spec in self.specs]
+        self.bars = deque(maxlen=max(spec.warmup for spec in self.specs) + 1)
+
+    def push(self, bar: Bar):
+        self.bars.append(bar)
+
+    def update(self, bar: Bar):
+        self.push(bar)
+        open_, high, low, close = (np.array(values) for values in zip(*((b.open, b.high, b.low, b.close)
+                                                                         for b in self.bars)))
+        return tuple(int(getattr(tl, spec.function)(open_, high, low, close, **spec.params)[-1])
+                     for spec in self.specs)
+
+
+class IncrementalFeatures:
+    """
+    Stateful version of `Preprocessing_stock_data.feature_matrix`.
+
+    The engine is seeded once with the history and then advanced with
+    `update(bar)`, which returns the newest row with every column of
+    `feature_matrix`, in its order. Most indicators cost constant (amortized)
+    time per bar. The rolling median and mode cost O(log period), and
+    HT_TRENDLINE averages up to 50 closes. Two kinds of indicators are computed
+    on a bounded tail buffer. CCI uses the last `period` typical prices, because
+    its mean deviation has no running form. The candlestick patterns (TA-Lib)
+    use the last 15 bars, the longest pattern lookback. After the warm-up of an
+    indicator, its values match the batch output within floating point
+    tolerance. NaN before the warm-up is returned as 0, as in `feature_matrix`.
+
+    With `columns` (e.g. the features kept by `GradientRFE`) only the indicators
+    producing them are kept up to date and only those columns are returned.
+
+    Attributes:
+        periods (list): Periods of the indicators.
+        columns (list): Names of the produced columns, as in `feature_matrix`.
+        count (int): Number of bars processed.
+    """
+
+    def __init__(self, data: pd.DataFrame = None, periods: list[int] = None, columns: list = None):
+        from function.preprocess_function import FEATURE_FAMILIES
+
+        self.periods = periods if periods else [23, 115, 220]
+        registry = default_registry(self.periods)
+        self.indicators = [CandlePatterns(registry.specs[name] for name in registry.names("pattern")),
+                           HilbertTrendline(self.periods)]
+        for period in self.periods:
+            self.indicators += [MovingAverages(period), Kama(period), PriceExtremes(period), Summation(period),
+                                RateOfChange(period), RelativeStrength(period), DirectionalMovement(period),
+                                Oscillators(period), CommodityChannel(period), MoneyFlow(period), Trix(period),
+                                LinearRegression(period), Dispersion(period), Correlation(period), Beta(period),
+                                RollingStatistics(period)]
+        self.indicators += [PriceOscillator(), UltimateOscillator(), Arithmetic()]
+
+        # Every column of `feature_matrix`, in its order
+        all_columns = list(BASE_COLUMNS) + ["Date"] + [name for family in FEATURE_FAMILIES
+                                                       for name in registry.names(family)]
+        if columns is not None:
+            unknown = [name for name in columns if name not in all_columns]
+            if unknown:
+                raise ValueError(f"Unknown features: {unknown}")
+            self.indicators = [indicator for indicator in self.indicators if set(indicator.names) & set(columns)]
+        self.columns = list(columns) if columns is not None else all_columns
+
+        # Position of every column in [Open, High, Low, Close, Volume, indicator values...], Date is kept apart
+        produced = list(BASE_COLUMNS) + [name for indicator in self.indicators for name in indicator.names]
+        self._positions = [produced.index(name) if name != "Date" else None for name in self.columns]
+        self.count = 0
+        self._values = [0.0] * len(self.columns)
+
+        if data is not None:
+            self.seed(data)
+
+    def seed(self, data: pd.DataFrame) -> None:
+        """
+        Advances the engine over a history ('Open', 'High', 'Low', 'Close', 'Volume' columns), oldest first.
+
+        Indicators computed on a tail buffer only store the bars, the row is built for the last bar.
+        """
+        columns = [data[name].to_numpy(dtype=np.float64) for name in ("Open", "High", "Low", "Close", "Volume")]
+        dates = data["Date"].tolist() if "Date" in data else [pd.NaT] * len(data)
+        last = len(data) - 1
+        for i, values in enumerate(zip(*(column.tolist() for column in columns))):
+            self.__advance(Bar(*values), dates[i], emit=i == last)
+
+    def __advance(self, bar, date, emit=True):
+        self.count += 1
+        if not emit:
+            for indicator in self.indicators:
+                getattr(indicator, "push", indicator.update)(bar)
+            return
+
+        values = list(bar)
+        for indicator in self.indicators:
+            values.extend(indicator.update(bar))
+        # NaN are filled with 0 as in `feature_matrix`
+        self._values = [date if position is None else
+                        (0.0 if values[position] != values[position] else values[position])
+                        for position in self._positions]
+
+    def update(self, bar) -> pd.Series:
+        """
+        Adds a closed bar and returns the newest feature row.
+
+        Args:
+            bar: Mapping (dict, pd.Series) with 'Open', 'High', 'Low' and 'Close'. 'Volume'
+                defaults to High - Low, as in `get_historical_data`, 'Date' to NaT.
+
+        Returns:
+            pd.Series: Features of the bar, indexed by `columns`, like a row of `feature_matrix`.
+        """
+        volume = bar["Volume"] if "Volume" in bar else bar["High"] - bar["Low"]
+        date = bar["Date"] if "Date" in bar else pd.NaT
+        self.__advance(Bar(float(bar["Open"]), float(bar["High"]), float(bar["Low"]), float(bar["Close"]),
+                           float(volume)), date)
+        return self.row()
+
+    def row(self) -> pd.Series:
+        """
+        Returns the features of the last processed bar.
+        """
+        return pd.Series(list(self._values), index=self.columns)
+
+
+def compare_incremental_features(data: pd.DataFrame, periods: list[int] = None, seed_bars: int = None) -> pd.Series:
+    """
+    Largest relative difference per feature between `IncrementalFeatures` and `Preprocessing_stock_data.feature_matrix`.
+
+    The engine is seeded with the first `seed_bars` bars (default: half of the
+    data) and then updated bar by bar with the rest.
+
+    Returns:
+        pd.Series: Maximum of |incremental - batch| / max(1, |batch|) per feature.
+    """
+    from function.preprocess_function import Preprocessing_stock_data
+
+    seed_bars = seed_bars if seed_bars is not None else len(data) // 2
+    batch = Preprocessing_stock_data(data, periods).feature_matrix()
+    engine = IncrementalFeatures(data.iloc[:seed_bars], periods)
+    rows = [engine.update(bar) for _, bar in data.iloc[seed_bars:].iterrows()]
+
+    live = pd.DataFrame(rows, index=batch.index[seed_bars:]).drop(columns="Date").astype(np.float64)
+    expected = batch.loc[live.index, live.columns].astype(np.float64)
+    return ((live - expected).abs() / expected.abs().clip(lower=1.0)).max()
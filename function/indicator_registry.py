@@ -0,0 +1,342 @@
+from import_libraries.libraries import *
+from function.rolling import rolling_mode
+from collections import namedtuple
+from functools import lru_cache
+
+# Input columns of the bars, the rest of the inputs are other features
+BASE_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+OHLC = ("Open", "High", "Low", "Close")
+
+IndicatorSpec = namedtuple("IndicatorSpec", ["name", "function", "inputs", "params", "warmup", "family"])
+
+
+def rolling_median(values: pd.Series, window: int) -> pd.Series:
+    return values.rolling(window=window, min_periods=1).median()
+
+
+def rolling_mode_series(values: pd.Series, window: int) -> pd.Series:
+    return pd.Series(rolling_mode(values.to_numpy(), window), index=values.index)
+
+
+def rolling_std(values: pd.Series, window: int) -> pd.Series:
+    return values.rolling(window=window, min_periods=1).std()
+
+
+# TA-Lib 0.6 lookbacks (default candle settings, no unstable period) of the registered functions,
+# so that building the registry does not need TA-Lib
+_PERIOD_LOOKBACKS = {
+    **dict.fromkeys(("SMA", "EMA", "WMA", "TRIMA", "MIDPOINT", "MAX", "MIN", "MAXINDEX", "MININDEX", "SUM", "CCI",
+                     "MINUS_DM", "PLUS_DM", "WILLR", "CORREL", "LINEARREG", "LINEARREG_ANGLE",
+                     "LINEARREG_INTERCEPT", "LINEARREG_SLOPE", "TSF", "STDDEV", "VAR"), lambda p: p - 1),
+    **dict.fromkeys(("KAMA", "MOM", "ROC", "ROCP", "ROCR", "ROCR100", "RSI", "CMO", "AROONOSC", "DX", "MFI",
+                     "MINUS_DI", "PLUS_DI", "BETA"), lambda p: p),
+    "DEMA": lambda p: 2 * (p - 1),
+    "TEMA": lambda p: 3 * (p - 1),
+    "T3": lambda p: 6 * (p - 1),
+    "TRIX": lambda p: 3 * (p - 1) + 1,
+    "ADX": lambda p: 2 * p - 1,
+    "ADXR": lambda p: 3 * p - 2,
+}
+
+_FIXED_LOOKBACKS = {
+    "HT_TRENDLINE": 63, "ADD": 0, "SUB": 0, "DIV": 0,
+    **dict.fromkeys(("ACOS", "ASIN", "ATAN", "CEIL", "COS", "FLOOR", "LN", "LOG10", "SIN", "SQRT", "TAN", "TANH"), 0),
+    "CDL2CROWS": 12, "CDL3BLACKCROWS": 13, "CDL3INSIDE": 12, "CDL3LINESTRIKE": 8, "CDL3OUTSIDE": 3,
+    "CDL3STARSINSOUTH": 12, "CDL3WHITESOLDIERS": 12, "CDLABANDONEDBABY": 12, "CDLADVANCEBLOCK": 12,
+    "CDLBELTHOLD": 10, "CDLBREAKAWAY": 14, "CDLCLOSINGMARUBOZU": 10, "CDLCONCEALBABYSWALL": 13,
+    "CDLCOUNTERATTACK": 11, "CDLDARKCLOUDCOVER": 11, "CDLDOJI": 10, "CDLDOJISTAR": 11, "CDLDRAGONFLYDOJI": 10,
+    "CDLENGULFING": 2, "CDLEVENINGDOJISTAR": 12, "CDLEVENINGSTAR": 12, "CDLGAPSIDESIDEWHITE": 7,
+    "CDLGRAVESTONEDOJI": 10, "CDLHAMMER": 11, "CDLHANGINGMAN": 11, "CDLHARAMI": 11, "CDLHARAMICROSS": 11,
+    "CDLHIGHWAVE": 10, "CDLHIKKAKE": 5, "CDLHIKKAKEMOD": 10, "CDLHOMINGPIGEON": 11, "CDLIDENTICAL3CROWS": 12,
+    "CDLINNECK": 11, "CDLINVERTEDHAMMER": 11, "CDLKICKING": 11, "CDLKICKINGBYLENGTH": 11, "CDLLADDERBOTTOM": 14,
+    "CDLLONGLEGGEDDOJI": 10, "CDLLONGLINE": 10, "CDLMARUBOZU": 10, "CDLMATCHINGLOW": 6, "CDLMATHOLD": 14,
+    "CDLMORNINGDOJISTAR": 12, "CDLMORNINGSTAR": 12, "CDLONNECK": 11, "CDLPIERCING": 11, "CDLRICKSHAWMAN": 10,
+    "CDLRISEFALL3METHODS": 14, "CDLSEPARATINGLINES": 11, "CDLSHOOTINGSTAR": 11, "CDLSHORTLINE": 10,
+    "CDLSPINNINGTOP": 10, "CDLSTALLEDPATTERN": 12, "CDLSTICKSANDWICH": 7, "CDLTAKURI": 10, "CDLTASUKIGAP": 7,
+    "CDLTHRUSTING": 11, "CDLTRISTAR": 12, "CDLUNIQUE3RIVER": 12, "CDLUPSIDEGAP2CROWS": 12,
+    "CDLXSIDEGAP3METHODS": 2,
+}
+
+
+def _static_lookback(function: str, params: dict):
+    if function in _FIXED_LOOKBACKS:
+        return _FIXED_LOOKBACKS[function]
+    # nbdev (STDDEV, VAR) and vfactor (T3) do not change the lookback
+    if function in _PERIOD_LOOKBACKS and set(params) <= {"timeperiod", "nbdev", "vfactor"}:
+        return _PERIOD_LOOKBACKS[function](params["timeperiod"])
+    if function == "MA" and params.get("matype", 0) == 0:
+        return params["timeperiod"] - 1
+    if function in ("APO", "PPO") and params.get("matype", 0) == 0:
+        return max(params["fastperiod"], params["slowperiod"]) - 1
+    if function == "ULTOSC":
+        return max(params["timeperiod1"], params["timeperiod2"], params["timeperiod3"])
+    return None
+
+
+def _lookback(function: str, params: dict) -> int:
+    lookback = _static_lookback(function, params)
+    if lookback is not None:
+        return lookback
+    from talib import abstract
+
+    indicator = abstract.Function(function)
+    # TA-Lib checks the parameter types (vfactor=0 must be 0.0)
+    defaults = indicator.parameters
+    indicator.parameters = {key: type(defaults[key])(value) for key, value in params.items()}
+    return indicator.lookback
+
+
+def _talib_function(function: str, name: str):
+    try:
+        return getattr(tl, function)
+    except ImportError as e:
+        raise ImportError(f"{name} needs the TA-Lib function {function}, but TA-Lib is not installed.") from e
+
+
+class IndicatorRegistry:
+    """
+    Declarative list of the features of `Preprocessing_stock_data`.
+
+    Every feature has a name, a function (the name of a TA-Lib function or a
+    callable), the input columns it is computed from, its parameters and a
+    warm-up length: the number of bars before its first value over a full
+    window. Inputs that are not bar columns are other features, so asking for
+    a feature also computes what it depends on.
+    """
+
+    def __init__(self):
+        self.specs = {}
+
+    def __contains__(self, name):
+        return name in self.specs
+
+    def __len__(self):
+        return len(self.specs)
+
+    def copy(self) -> "IndicatorRegistry":
+        """
+        Returns a registry with the same features. Registering on the copy leaves this one unchanged.
+        """
+        registry = IndicatorRegistry()
+        registry.specs = dict(self.specs)
+        return registry
+
+    def register(self, name: str, function, inputs=("Close",), family: str = None, warmup: int = None,
+                 **params) -> IndicatorSpec:
+        """
+        Adds a feature.
+
+        Args:
+            name (str): Column name of the feature.
+            function (str | callable): TA-Lib function name, or a callable taking the inputs as Series and `params`.
+            inputs (tuple, optional): Bar columns or feature names. Defaults to ("Close",).
+            family (str, optional): Family of the feature, as in `FEATURE_FAMILIES`.
+            warmup (int, optional): Own warm-up length. Defaults to the TA-Lib lookback for TA-Lib functions
+                (from a static table for the functions of the default registry), else 0.
+            **params: Parameters of the function.
+
+        Returns:
+            IndicatorSpec: The registered feature.
+        """
+        if warmup is None:
+            warmup = _lookback(function, params) if isinstance(function, str) else 0
+        spec = IndicatorSpec(name, function, tuple(inputs), params, warmup, family)
+        self.specs[name] = spec
+        return spec
+
+    def names(self, family: str = None) -> list:
+        """
+        Returns the feature names, of one family if given, in registration order.
+        """
+        return [name for name, spec in self.specs.items() if family is None or spec.family == family]
+
+    def __check(self, names):
+        unknown = [name for name in names if name not in self.specs and name not in BASE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown features: {unknown}")
+
+    def resolve(self, names) -> list:
+        """
+        Returns the features to compute for `names`: their dependencies first, every feature once.
+        """
+        self.__check(names)
+        order = []
+
+        def visit(name):
+            if name in BASE_COLUMNS or name in order:
+                return
+            for dependency in self.specs[name].inputs:
+                visit(dependency)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def warmup(self, names) -> int:
+        """
+        Returns the bars needed before all `names` have a value over a full window, dependencies included.
+        """
+        self.__check(names)
+
+        def total(name):
+            if name in BASE_COLUMNS:
+                return 0
+            spec = self.specs[name]
+            return spec.warmup + max((total(dependency) for dependency in spec.inputs), default=0)
+
+        return max((total(name) for name in names), default=0)
+
+    def compute(self, inputs: dict, names, backend=None) -> dict:
+        """
+        Computes features.
+
+        Args:
+            inputs (dict): Bar column -> Series.
+            names (list): Features to return.
+            backend (module, optional): Module with TA-Lib named functions, e.g. `function.numpy_backend`.
+                Functions it does not have are taken from TA-Lib. Defaults to TA-Lib.
+
+        Returns:
+            dict: Feature name -> values, in the order of `names`, without the dependencies that were not asked for.
+
+        Raises:
+            ImportError: If a feature needs TA-Lib (not in `backend`) and TA-Lib is not installed.
+        """
+        values = dict(inputs)
+        for name in self.resolve(names):
+            spec = self.specs[name]
+            function = spec.function
+            if isinstance(function, str):
+                function = getattr(backend, function, None) or _talib_function(function, name)
+            values[name] = function(*(values[column] for column in spec.inputs), **spec.params)
+        return {name: values[name] for name in names if name not in BASE_COLUMNS}
+
+
+CANDLESTICK_PATTERNS = (
+    "CDL2CROWS", "CDL3BLACKCROWS", "CDL3INSIDE", "CDL3LINESTRIKE", "CDL3OUTSIDE", "CDL3STARSINSOUTH",
+    "CDL3WHITESOLDIERS", "CDLABANDONEDBABY", "CDLADVANCEBLOCK", "CDLBELTHOLD", "CDLBREAKAWAY",
+    "CDLCLOSINGMARUBOZU", "CDLCONCEALBABYSWALL", "CDLCOUNTERATTACK", "CDLDARKCLOUDCOVER", "CDLDOJI",
+    "CDLDOJISTAR", "CDLDRAGONFLYDOJI", "CDLENGULFING", "CDLEVENINGDOJISTAR", "CDLEVENINGSTAR",
+    "CDLGAPSIDESIDEWHITE", "CDLGRAVESTONEDOJI", "CDLHAMMER", "CDLHANGINGMAN", "CDLHARAMI", "CDLHARAMICROSS",
+    "CDLHIGHWAVE", "CDLHIKKAKE", "CDLHIKKAKEMOD", "CDLHOMINGPIGEON", "CDLIDENTICAL3CROWS", "CDLINNECK",
+    "CDLINVERTEDHAMMER", "CDLKICKING", "CDLKICKINGBYLENGTH", "CDLLADDERBOTTOM", "CDLLONGLEGGEDDOJI",
+    "CDLLONGLINE", "CDLMARUBOZU", "CDLMATCHINGLOW", "CDLMATHOLD", "CDLMORNINGDOJISTAR", "CDLMORNINGSTAR",
+    "CDLONNECK", "CDLPIERCING", "CDLRICKSHAWMAN", "CDLRISEFALL3METHODS", "CDLSEPARATINGLINES",
+    "CDLSHOOTINGSTAR", "CDLSHORTLINE", "CDLSPINNINGTOP", "CDLSTALLEDPATTERN", "CDLSTICKSANDWICH", "CDLTAKURI",
+    "CDLTASUKIGAP", "CDLTHRUSTING", "CDLTRISTAR", "CDLUNIQUE3RIVER", "CDLUPSIDEGAP2CROWS", "CDLXSIDEGAP3METHODS",
+)
+
+# Patterns called with penetration=0
+PENETRATION_PATTERNS = ("CDLEVENINGDOJISTAR", "CDLEVENINGSTAR", "CDLMATHOLD", "CDLMORNINGDOJISTAR", "CDLMORNINGSTAR")
+
+MATH_TRANSFORMS = ("ACOS", "ASIN", "ATAN", "CEIL", "COS", "FLOOR", "LN", "LOG10", "SIN", "SQRT", "TAN", "TANH")
+
+
+@lru_cache(maxsize=None)
+def _default_registry(periods: tuple) -> IndicatorRegistry:
+    registry = IndicatorRegistry()
+    hlc = ("High", "Low", "Close")
+    hl = ("High", "Low")
+
+    # Pattern recognition
+    for name in CANDLESTICK_PATTERNS:
+        params = {"penetration": 0} if name in PENETRATION_PATTERNS else {}
+        registry.register(name, name, OHLC, "pattern", **params)
+
+    # Overlap studies
+    for i in periods:
+        registry.register("DEMA" + str(i), "DEMA", family="overlap", timeperiod=i)
+        registry.register("EMA" + str(i), "EMA", family="overlap", timeperiod=i)
+        registry.register("KAMA" + str(i), "KAMA", family="overlap", timeperiod=i)
+        registry.register("MIDPOINT" + str(i), "MIDPOINT", family="overlap", timeperiod=i)
+        registry.register("SMA" + str(i), "SMA", family="overlap", timeperiod=i)
+        registry.register("TRIMA" + str(i), "TRIMA", family="overlap", timeperiod=i)
+        registry.register("WMA" + str(i), "WMA", family="overlap", timeperiod=i)
+        registry.register("T3" + str(i), "T3", family="overlap", timeperiod=i, vfactor=0)
+        registry.register("TEMA" + str(i), "TEMA", family="overlap", timeperiod=i)
+        registry.register("MA" + str(i), "MA", family="overlap", timeperiod=i, matype=0)
+        registry.register("HT_TRENDLINE" + str(i), "HT_TRENDLINE", family="overlap")
+
+    # Math transforms
+    for name in MATH_TRANSFORMS:
+        registry.register(name, name, family="math_transform")
+
+    # Momentum indicators
+    for i in periods:
+        registry.register("ADX" + str(i), "ADX", hlc, "momentum", timeperiod=i)
+        registry.register("ADXR" + str(i), "ADXR", hlc, "momentum", timeperiod=i)
+        registry.register("AROONOSC" + str(i), "AROONOSC", hl, "momentum", timeperiod=i)
+        registry.register("CCI" + str(i), "CCI", hlc, "momentum", timeperiod=i)
+        registry.register("CMO" + str(i), "CMO", family="momentum", timeperiod=i)
+        registry.register("DX" + str(i), "DX", hlc, "momentum", timeperiod=i)
+        registry.register("MFI" + str(i), "MFI", hlc + ("Volume",), "momentum", timeperiod=i)
+        registry.register("MINUS_DI" + str(i), "MINUS_DI", hlc, "momentum", timeperiod=i)
+        registry.register("MINUS_DM" + str(i), "MINUS_DM", hl, "momentum", timeperiod=i)
+        registry.register("MOM" + str(i), "MOM", family="momentum", timeperiod=i)
+        registry.register("PLUS_DI" + str(i), "PLUS_DI", hlc, "momentum", timeperiod=i)
+        registry.register("PLUS_DM" + str(i), "PLUS_DM", hl, "momentum", timeperiod=i)
+        registry.register("ROC" + str(i), "ROC", family="momentum", timeperiod=i)
+        registry.register("ROCP" + str(i), "ROCP", family="momentum", timeperiod=i)
+        registry.register("ROCR" + str(i), "ROCR", family="momentum", timeperiod=i)
+        registry.register("ROCR100" + str(i), "ROCR100", family="momentum", timeperiod=i)
+        registry.register("RSI" + str(i), "RSI", family="momentum", timeperiod=i)
+        registry.register("WILLR" + str(i), "WILLR", hlc, "momentum", timeperiod=i)
+        registry.register("TRIX" + str(i), "TRIX", family="momentum", timeperiod=i)
+    registry.register("APO", "APO", family="momentum", fastperiod=12, slowperiod=26, matype=0)
+    registry.register("PPO", "PPO", family="momentum", fastperiod=12, slowperiod=26, matype=0)
+    registry.register("real", "ULTOSC", hlc, "momentum", timeperiod1=7, timeperiod2=14, timeperiod3=28)
+
+    # Statistic functions
+    for i in periods:
+        registry.register("BETA" + str(i), "BETA", hl, "statistic", timeperiod=i)
+        registry.register("CORREL" + str(i), "CORREL", hl, "statistic", timeperiod=i)
+        registry.register("LINEARREG" + str(i), "LINEARREG", family="statistic", timeperiod=i)
+        registry.register("LINEARREG_ANGLE" + str(i), "LINEARREG_ANGLE", family="statistic", timeperiod=i)
+        registry.register("LINEARREG_INTERCEPT" + str(i), "LINEARREG_INTERCEPT", family="statistic", timeperiod=i)
+        registry.register("LINEARREG_SLOPE" + str(i), "LINEARREG_SLOPE", family="statistic", timeperiod=i)
+        registry.register("STDDEV" + str(i), "STDDEV", family="statistic", timeperiod=i, nbdev=1)
+        registry.register("TSF" + str(i), "TSF", family="statistic", timeperiod=i)
+        registry.register("VAR" + str(i), "VAR", family="statistic", timeperiod=i, nbdev=1)
+        registry.register("median" + str(i), rolling_median, family="statistic", warmup=i - 1, window=i)
+        registry.register("mode" + str(i), rolling_mode_series, family="statistic", warmup=i - 1, window=i)
+        registry.register("std" + str(i), rolling_std, ("median" + str(i),), "statistic", warmup=i - 1, window=i)
+
+    # Math operators
+    for i in periods:
+        registry.register("MAX" + str(i), "MAX", family="math_operator", timeperiod=i)
+        registry.register("MAXINDEX" + str(i), "MAXINDEX", family="math_operator", timeperiod=i)
+        registry.register("MIN" + str(i), "MIN", family="math_operator", timeperiod=i)
+        registry.register("MININDEX" + str(i), "MININDEX", family="math_operator", timeperiod=i)
+        registry.register("SUM" + str(i), "SUM", family="math_operator", timeperiod=i)
+    registry.register("ADD", "ADD", hl, "math_operator")
+    registry.register("DIV", "DIV", hl, "math_operator")
+    registry.register("SUB", "SUB", hl, "math_operator")
+
+    return registry
+
+
+def default_registry(periods: list[int] = None) -> IndicatorRegistry:
+    """
+    Returns the registry of every feature of `Preprocessing_stock_data` for the periods.
+
+    The registry is built once per periods and every call gets its own copy,
+    so features registered by one caller do not show up in the others.
+    """
+    return _default_registry(tuple(periods if periods else [23, 115, 220])).copy()
+
+
+def rfe_feature_names(data: pd.DataFrame, best_parameters: dict, y_column: str = "Close_diff") -> list:
+    """
+    Maps the column indices kept by `GradientRFE` ('num_features_to_keep') to column names.
+
+    Args:
+        data (pd.DataFrame): The frame `GradientRFE` was fitted on.
+        best_parameters (dict): `GradientRFE.best_parameters`.
+        y_column (str, optional): Target column dropped by `GradientRFE`. Defaults to "Close_diff".
+
+    Returns:
+        list: Names of the kept features.
+    """
+    columns = data.drop(y_column, axis=1).columns
+    return [columns[i] for i in best_parameters['num_features_to_keep']]
@@ -0,0 +1,477 @@
+import os
+import json
+import time
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# Record layouts of `copy_rates_*` and `copy_ticks_*` results
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('tick_volume', '<u8'),
+    ('spread', '<i4'),
+    ('real_volume', '<u8'),
+])
+
+TICKS_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('last', '<f8'),
+    ('volume', '<u8'),
+    ('time_msc', '<i8'),
+    ('flags', '<u4'),
+    ('volume_real', '<f8'),
+])
+
+# Structures returned by the MetaTrader5 package
+AccountInfo = namedtuple("AccountInfo", "login balance equity currency server")
+TerminalInfo = namedtuple("TerminalInfo", "connected trade_allowed name")
+SymbolInfo = namedtuple("SymbolInfo", "name bid ask point digits spread volume_min volume_max volume_step "
+                                      "swap_long swap_short trade_contract_size")
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+TradePosition = namedtuple("TradePosition", "ticket time type magic volume price_open price_current "
+                                            "profit symbol comment")
+TradeRequest = namedtuple("TradeRequest", "action symbol volume type price deviation magic comment "
+                                          "type_time type_filling position")
+OrderSendResult = namedtuple("OrderSendResult", "retcode deal order volume price bid ask comment "
+                                                "request_id retcode_external request")
+
+DEFAULT_SYMBOL_INFO = {
+    "point": 0.01,
+    "digits": 2,
+    "spread": 10,
+    "volume_min": 0.01,
+    "volume_max": 100.0,
+    "volume_step": 0.01,
+    "swap_long": -1.0,
+    "swap_short": -1.0,
+    "trade_contract_size": 1.0,
+}
+
+
+class ReplayMT5:
+    """
+    Offline stand-in for the MetaTrader5 package.
+
+    Bars and ticks are replayed from local files laid out like `BarStore`
+    (`<root>/<symbol>/<timeframe>.bin`, optional `<root>/<symbol>/ticks.bin` and
+    `<root>/<symbol>/info.json`) or from arrays added with `add_symbol()`.
+    Only data up to the replay clock is visible. Orders fill at the current
+    tick and are kept as in-memory positions.
+
+    The clock is controlled by `speed`:
+    - None: the clock stays at `start_time` and moves only with `advance()`.
+      With no `start_time` every stored bar is visible.
+    - float: the clock runs `speed` times faster than the wall clock from `start_time`.
+    """
+
+    # Constants used by the project, with the same values as in MetaTrader5
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M2 = 2
+    TIMEFRAME_M3 = 3
+    TIMEFRAME_M4 = 4
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M6 = 6
+    TIMEFRAME_M10 = 10
+    TIMEFRAME_M12 = 12
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M20 = 20
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 16385
+    TIMEFRAME_H2 = 16386
+    TIMEFRAME_H3 = 16387
+    TIMEFRAME_H4 = 16388
+    TIMEFRAME_H6 = 16390
+    TIMEFRAME_H8 = 16392
+    TIMEFRAME_H12 = 16396
+    TIMEFRAME_D1 = 16408
+    TIMEFRAME_W1 = 32769
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    POSITION_TYPE_BUY = 0
+    POSITION_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    ORDER_TIME_GTC = 0
+    ORDER_TIME_DAY = 1
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    ORDER_FILLING_RETURN = 2
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+    TRADE_RETCODE_NO_QUOTES = 10021
+    TRADE_RETCODE_POSITION_CLOSED = 10036
+    COPY_TICKS_ALL = -1
+    COPY_TICKS_INFO = 1
+    COPY_TICKS_TRADE = 2
+
+    # Bar length in seconds of every supported timeframe
+    TIMEFRAME_SECONDS = {
+        TIMEFRAME_M1: 60,
+        TIMEFRAME_M2: 120,
+        TIMEFRAME_M3: 180,
+        TIMEFRAME_M4: 240,
+        TIMEFRAME_M5: 300,
+        TIMEFRAME_M6: 360,
+        TIMEFRAME_M10: 600,
+        TIMEFRAME_M12: 720,
+        TIMEFRAME_M15: 900,
+        TIMEFRAME_M20: 1_200,
+        TIMEFRAME_M30: 1_800,
+        TIMEFRAME_H1: 3_600,
+        TIMEFRAME_H2: 7_200,
+        TIMEFRAME_H3: 10_800,
+        TIMEFRAME_H4: 14_400,
+        TIMEFRAME_H6: 21_600,
+        TIMEFRAME_H8: 28_800,
+        TIMEFRAME_H12: 43_200,
+        TIMEFRAME_D1: 86_400,
+        TIMEFRAME_W1: 604_800,
+    }
+
+    def __init__(self, root: str = "data/bars", speed: float = None, start_time: int = None,
+                 balance: float = 10_000.0):
+        """
+        Initializes the replay backend.
+
+        Args:
+            root (str, optional): Directory with recorded bars and ticks. Defaults to "data/bars".
+            speed (float, optional): Replay speed relative to the wall clock. Defaults to None.
+            start_time (int, optional): Epoch seconds the replay clock starts at. Defaults to None.
+            balance (float, optional): Balance of the simulated account. Defaults to 10_000.0.
+        """
+        self.root = root
+        self.speed = speed
+        self.start_time = start_time
+        self.balance = balance
+
+        self._clock = start_time
+        self._wall_start = time.perf_counter()
+        self._rates = {}
+        self._ticks = {}
+        self._info = {}
+        self._positions = {}
+        self._next_ticket = 1
+        # Orders may be sent from several threads (`execute_signals`)
+        self._lock = threading.Lock()
+        self._login = None
+        self._initialized = False
+        self._last_error = (1, "Success")
+
+    # Replay data
+    def add_symbol(self, symbol: str, rates: dict = None, ticks: np.ndarray = None, info: dict = None):
+        """
+        Adds in-memory data for a symbol.
+
+        Args:
+            symbol (str): The symbol name.
+            rates (dict, optional): Maps timeframe to an array of `RATES_DTYPE` bars. Defaults to None.
+            ticks (np.ndarray, optional): Array of `TICKS_DTYPE` ticks. Defaults to None.
+            info (dict, optional): Symbol specification overriding `DEFAULT_SYMBOL_INFO`. Defaults to None.
+        """
+        for timeframe, bars in (rates or {}).items():
+            self._rates[(symbol, timeframe)] = np.asarray(bars).astype(RATES_DTYPE, copy=False)
+        if ticks is not None:
+            self._ticks[symbol] = np.asarray(ticks).astype(TICKS_DTYPE, copy=False)
+        self._info[symbol] = {**DEFAULT_SYMBOL_INFO, **(info or {})}
+
+    def __symbols(self):
+        names = set(self._info)
+        if self.root and os.path.isdir(self.root):
+            names.update(name for name in os.listdir(self.root)
+                         if os.path.isdir(os.path.join(self.root, name)))
+        return sorted(names)
+
+    def __rates(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        if key not in self._rates:
+            path = os.path.join(self.root or "", symbol, f"{timeframe}.bin")
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                return None
+            self._rates[key] = np.memmap(path, dtype=RATES_DTYPE, mode='r')
+        return self._rates[key]
+
+    def __symbol_spec(self, symbol):
+        if symbol not in self._info:
+            path = os.path.join(self.root or "", symbol, "info.json")
+            info = {}
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    info = json.load(f)
+            elif not os.path.isdir(os.path.join(self.root or "", symbol)):
+                return None
+            self._info[symbol] = {**DEFAULT_SYMBOL_INFO, **info}
+        return self._info[symbol]
+
+    def __ticks(self, symbol):
+        if symbol not in self._ticks:
+            path = os.path.join(self.root or "", symbol, "ticks.bin")
+            if os.path.exists(path) and os.path.getsize(path):
+                self._ticks[symbol] = np.memmap(path, dtype=TICKS_DTYPE, mode='r')
+            else:
+                self._ticks[symbol] = self.__ticks_from_rates(symbol)
+        return self._ticks[symbol]
+
+    def __ticks_from_rates(self, symbol):
+        # Four ticks per bar of the shortest stored timeframe: open, high/low, low/high, close
+        spec = self.__symbol_spec(symbol)
+        for timeframe in sorted(self.TIMEFRAME_SECONDS, key=self.TIMEFRAME_SECONDS.get):
+            rates = self.__rates(symbol, timeframe)
+            if rates is not None and len(rates):
+                break
+        else:
+            return None
+
+        step = self.TIMEFRAME_SECONDS[timeframe] * 1000 // 4
+        up = rates['close'] >= rates['open']
+        prices = np.column_stack([
+            rates['open'],
+            np.where(up, rates['low'], rates['high']),
+            np.where(up, rates['high'], rates['low']),
+            rates['close'],
+        ]).ravel()
+
+        ticks = np.zeros(len(prices), dtype=TICKS_DTYPE)
+        ticks['time_msc'] = (rates['time'][:, None] * 1000 + np.arange(4) * step).ravel()
+        ticks['time'] = ticks['time_msc'] // 1000
+        ticks['bid'] = prices
+        ticks['ask'] = prices + spec["spread"] * spec["point"]
+        ticks['last'] = prices
+        ticks['volume'] = 1
+        ticks['volume_real'] = 1.0
+        return ticks
+
+    # Replay clock
+    def now(self):
+        """
+        Returns the replay clock in epoch seconds, or None if every bar is visible.
+        """
+        if self._clock is None:
+            return None
+        if self.speed is None:
+            return self._clock
+        return self._clock + (time.perf_counter() - self._wall_start) * self.speed
+
+    def advance(self, seconds: float):
+        """
+        Moves the replay clock forward.
+        """
+        self._clock = (self.now() or 0) + seconds
+        self._wall_start = time.perf_counter()
+
+    def set_time(self, epoch: int):
+        """
+        Sets the replay clock.
+        """
+        self._clock = epoch
+        self._wall_start = time.perf_counter()
+
+    def __visible(self, data, key='time'):
+        now = self.now()
+        if data is None or now is None:
+            return data
+        if key == 'time_msc':
+            now = now * 1000
+        return data[:int(np.searchsorted(data[key], now, side='right'))]
+
+    # MetaTrader5 API
+    def initialize(self, *args, **kwargs):
+        self._initialized = True
+        return True
+
+    def login(self, login=None, password=None, server=None, **kwargs):
+        if not self._initialized:
+            self._last_error = (-10004, "No IPC connection")
+            return False
+        self._login = login
+        return True
+
+    def shutdown(self):
+        self._initialized = False
+        self._login = None
+
+    def last_error(self):
+        return self._last_error
+
+    def terminal_info(self):
+        if not self._initialized:
+            return None
+        return TerminalInfo(connected=True, trade_allowed=True, name="ReplayMT5")
+
+    def account_info(self):
+        if not self._initialized:
+            return None
+        profit = sum(position.profit for position in self.positions_get())
+        return AccountInfo(login=self._login, balance=self.balance, equity=self.balance + profit,
+                           currency="USD", server="replay")
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        rates = self.__visible(self.__rates(symbol, timeframe))
+        if rates is None:
+            self._last_error = (-2, f"No bars for {symbol}")
+            return None
+        end = len(rates) - start_pos
+        return np.array(rates[max(end - count, 0):max(end, 0)])
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        rates = self.__visible(self.__rates(symbol, timeframe))
+        if rates is None:
+            self._last_error = (-2, f"No bars for {symbol}")
+            return None
+        end = int(np.searchsorted(rates['time'], _to_epoch(date_from), side='right'))
+        return np.array(rates[max(end - count, 0):end])
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        rates = self.__visible(self.__rates(symbol, timeframe))
+        if rates is None:
+            self._last_error = (-2, f"No bars for {symbol}")
+            return None
+        lo = int(np.searchsorted(rates['time'], _to_epoch(date_from), side='left'))
+        hi = int(np.searchsorted(rates['time'], _to_epoch(date_to), side='right'))
+        return np.array(rates[lo:hi])
+
+    def copy_ticks_from(self, symbol, date_from, count, flags=COPY_TICKS_ALL):
+        ticks = self.__visible(self.__ticks(symbol), key='time_msc')
+        if ticks is None:
+            self._last_error = (-2, f"No ticks for {symbol}")
+            return None
+        lo = int(np.searchsorted(ticks['time_msc'], _to_epoch(date_from) * 1000, side='left'))
+        return np.array(ticks[lo:lo + count])
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags=COPY_TICKS_ALL):
+        ticks = self.__visible(self.__ticks(symbol), key='time_msc')
+        if ticks is None:
+            self._last_error = (-2, f"No ticks for {symbol}")
+            return None
+        lo = int(np.searchsorted(ticks['time_msc'], _to_epoch(date_from) * 1000, side='left'))
+        hi = int(np.searchsorted(ticks['time_msc'], _to_epoch(date_to) * 1000, side='right'))
+        return np.array(ticks[lo:hi])
+
+    def symbols_get(self, group=None):
+        return tuple(info for info in map(self.symbol_info, self.__symbols()) if info is not None)
+
+    def symbol_info_tick(self, symbol):
+        ticks = self.__visible(self.__ticks(symbol), key='time_msc')
+        if ticks is None or len(ticks) == 0:
+            self._last_error = (-2, f"No ticks for {symbol}")
+            return None
+        return Tick(*ticks[-1].tolist())
+
+    def symbol_info(self, symbol):
+        spec = self.__symbol_spec(symbol)
+        if spec is None:
+            self._last_error = (-2, f"Unknown symbol {symbol}")
+            return None
+        tick = self.symbol_info_tick(symbol)
+        bid, ask = (tick.bid, tick.ask) if tick else (0.0, 0.0)
+        return SymbolInfo(name=symbol, bid=bid, ask=ask, **{field: spec[field] for field in SymbolInfo._fields
+                                                             if field not in ("name", "bid", "ask")})
+
+    def positions_get(self, symbol=None, ticket=None, **kwargs):
+        positions = []
+        with self._lock:
+            held = list(self._positions.values())
+        for position in held:
+            if symbol is not None and position.symbol != symbol:
+                continue
+            if ticket is not None and position.ticket != ticket:
+                continue
+            positions.append(self.__mark(position))
+        return tuple(positions)
+
+    def __mark(self, position):
+        tick = self.symbol_info_tick(position.symbol)
+        if tick is None:
+            return position
+        price = tick.bid if position.type == self.POSITION_TYPE_BUY else tick.ask
+        sign = 1 if position.type == self.POSITION_TYPE_BUY else -1
+        spec = self.__symbol_spec(position.symbol)
+        profit = sign * (price - position.price_open) * position.volume * spec["trade_contract_size"]
+        return position._replace(price_current=price, profit=profit)
+
+    def order_send(self, request):
+        request = TradeRequest(**{field: request.get(field) for field in TradeRequest._fields})
+        tick = self.symbol_info_tick(request.symbol)
+        if tick is None:
+            return self.__result(self.TRADE_RETCODE_NO_QUOTES, request, comment="No quotes")
+        if request.action != self.TRADE_ACTION_DEAL or request.type not in (self.ORDER_TYPE_BUY, self.ORDER_TYPE_SELL):
+            return self.__result(self.TRADE_RETCODE_INVALID, request, comment="Invalid request")
+
+        price = tick.ask if request.type == self.ORDER_TYPE_BUY else tick.bid
+        with self._lock:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+
+            if request.position:
+                # Closing deal for an existing position
+                position = self._positions.pop(request.position, None)
+                if position is None:
+                    return self.__result(self.TRADE_RETCODE_POSITION_CLOSED, request, comment="Position closed")
+                self.balance += self.__mark(position).profit
+            else:
+                self._positions[ticket] = TradePosition(
+                    ticket=ticket, time=int(tick.time), type=request.type, magic=request.magic,
+                    volume=request.volume, price_open=price, price_current=price, profit=0.0,
+                    symbol=request.symbol, comment=request.comment)
+
+        return self.__result(self.TRADE_RETCODE_DONE, request, deal=ticket, order=ticket, price=price,
+                             bid=tick.bid, ask=tick.ask, comment="Request executed")
+
+    def position_close(self, ticket):
+        position = self._positions.get(ticket)
+        if position is None:
+            self._last_error = (-2, f"Position {ticket} not found")
+            return False
+        close_type = self.ORDER_TYPE_SELL if position.type == self.POSITION_TYPE_BUY else self.ORDER_TYPE_BUY
+        result = self.order_send({"action": self.TRADE_ACTION_DEAL, "symbol": position.symbol,
+                                  "volume": position.volume, "type": close_type, "position": ticket})
+        return result.retcode == self.TRADE_RETCODE_DONE
+
+    def __result(self, retcode, request, deal=0, order=0, price=0.0, bid=0.0, ask=0.0, comment=""):
+        return OrderSendResult(retcode=retcode, deal=deal, order=order, volume=request.volume or 0.0,
+                               price=price, bid=bid, ask=ask, comment=comment, request_id=0,
+                               retcode_external=0, request=request)
+
+
+def _to_epoch(value):
+    # datetime or epoch seconds
+    if hasattr(value, "timestamp"):
+        return int(value.timestamp())
+    return int(value)
+
+
+def synthetic_rates(count: int = 30_000, timeframe: int = ReplayMT5.TIMEFRAME_D1, start_time: int = 946_684_800,
+                    price: float = 100.0, volatility: float = 0.01, seed: int = 0) -> np.ndarray:
+    """
+    Generates random-walk bars for load tests and benchmarks.
+
+    Args:
+        count (int, optional): Number of bars. Defaults to 30_000.
+        timeframe (int, optional): Timeframe of the bars. Defaults to TIMEFRAME_D1.
+        start_time (int, optional): Epoch seconds of the first bar. Defaults to 2000-01-01.
+        price (float, optional): First open price. Defaults to 100.0.
+        volatility (float, optional): Standard deviation of the close-to-close log return. Defaults to 0.01.
+        seed (int, optional): Seed of the random generator, for deterministic runs. Defaults to 0.
+
+    Returns:
+        np.ndarray: Array of `RATES_DTYPE` bars.
+    """
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0.0, volatility, count)))
+    open_ = np.concatenate([[price], close[:-1]])
+    wick = np.abs(rng.normal(0.0, volatility / 2, (2, count))) * close
+
+    rates = np.zeros(count, dtype=RATES_DTYPE)
+    rates['time'] = start_time + np.arange(count) * ReplayMT5.TIMEFRAME_SECONDS[timeframe]
+    rates['open'] = open_
+    rates['close'] = close
+    rates['high'] = np.maximum(open_, close) + wick[0]
+    rates['low'] = np.minimum(open_, close) - wick[1]
+    rates['tick_volume'] = rng.integers(1, 1_000, count)
+    rates['spread'] = 10
+    return rates
@@ -0,0 +1,875 @@
+"""
+NumPy implementations of the TA-Lib functions used by `Preprocessing_stock_data`.
+
+Every function takes the arguments of its TA-Lib namesake. Inputs can be 1-D
+(one series) or 2-D (symbols x time), so one call computes an indicator for a
+whole universe of equally long histories. Leading NaN are skipped like the
+TA-Lib wrapper does, aligned over all rows. The lookback region is NaN (0 for
+the index functions). Candlestick patterns and HT_TRENDLINE are not available
+(`talib_only`); everything else, the registry included, runs without TA-Lib
+installed. Only `compare_with_talib` and `benchmark_backend` import it.
+"""
+from import_libraries.libraries import *
+from numpy.lib.stride_tricks import sliding_window_view
+import sys
+import time
+
+# TA_EPSILON of TA-Lib 0.6, used by TA_IS_ZERO and TA_IS_ZERO_OR_NEG. RSI, CMO, BETA and the
+# directional indicators only test for an exact 0, CCI and CORREL relative to the values.
+_EPSILON = 0.00000000000001
+
+# Block length of the blocked linear recursions
+_BLOCK = 64
+
+# Number of values of the window chunks materialized at once
+_CHUNK = 1 << 22
+
+# Relative precision below which `_moments` computes a window again in two passes
+_PRECISION = 0.000001
+
+
+def _prepare(*inputs):
+    arrays = [np.asarray(x, dtype=np.float64) for x in inputs]
+    squeeze = arrays[0].ndim == 1
+    arrays = [np.atleast_2d(a) for a in arrays]
+    valid = np.ones(arrays[0].shape[1], dtype=bool)
+    for a in arrays:
+        valid &= ~np.isnan(a).any(axis=0)
+    start = int(np.argmax(valid)) if valid.any() else arrays[0].shape[1]
+    return arrays, start, squeeze
+
+
+def _finish(out, squeeze):
+    return out[0] if squeeze else out
+
+
+def _nan(x):
+    return np.full(x.shape, np.nan)
+
+
+def _where_nonzero(numerator, denominator, fill=0.0, exact=False):
+    zero = denominator == 0.0 if exact else (denominator > -_EPSILON) & (denominator < _EPSILON)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(zero, fill, numerator / denominator)
+
+
+# Building blocks, on 2-D arrays with the first valid column `start`
+def _rolling_sum(x, period, start=0):
+    out = _nan(x)
+    if x.shape[1] - start < period:
+        return out
+    c = np.cumsum(x[:, start:], axis=1)
+    sums = c[:, period - 1:].copy()
+    sums[:, 1:] -= c[:, :-period]
+    out[:, start + period - 1:] = sums
+    return out
+
+
+def _windows(x, period, start=0):
+    return sliding_window_view(x[:, start:], period, axis=1)
+
+
+def _moments(x, y, period, start=0, center=True):
+    """
+    Means, sums of squared deviations and the sum of cross deviations of every window of x and y.
+
+    The running sums are taken on the values centered on the first one (or
+    as they are, without `center`). They are exact to about 1e-16 of the
+    total of the row, so windows whose sum of squared deviations is below
+    `_PRECISION` of that total are computed again in two passes, as TA-Lib
+    0.6 does for every window.
+    """
+    origin_x, origin_y = (x[:, start:start + 1], y[:, start:start + 1]) if center else (0.0, 0.0)
+    x, y = x - origin_x, y - origin_y
+    first = start + period - 1
+    sum_x, sum_y, sum_xx, sum_yy, sum_xy = (_rolling_sum(values, period, start)[:, first:]
+                                            for values in (x, y, x * x, y * y, x * y))
+    moments = [sum_x / period, sum_y / period, sum_xx - sum_x * sum_x / period,
+               sum_yy - sum_y * sum_y / period, sum_xy - sum_x * sum_y / period]
+
+    loose = ((moments[2] < _PRECISION * (x[:, start:] ** 2).sum(axis=1, keepdims=True)) |
+             (moments[3] < _PRECISION * (y[:, start:] ** 2).sum(axis=1, keepdims=True)))
+    rows, columns = np.nonzero(loose)
+    windows_x, windows_y = _windows(x, period, start), _windows(y, period, start)
+    step = max(1, _CHUNK // period)
+    for a in range(0, len(rows), step):
+        chunk = (rows[a:a + step], columns[a:a + step])
+        mean_x, mean_y = windows_x[chunk].mean(axis=1), windows_y[chunk].mean(axis=1)
+        dx = windows_x[chunk] - mean_x[:, None]
+        dy = windows_y[chunk] - mean_y[:, None]
+        for out, values in zip(moments, (mean_x, mean_y, (dx * dx).sum(axis=1), (dy * dy).sum(axis=1),
+                                         (dx * dy).sum(axis=1))):
+            out[chunk] = values
+
+    moments[0] += origin_x
+    moments[1] += origin_y
+    return moments
+
+
+def _recurse(x, a, b, y0):
+    """
+    y[t] = a * y[t - 1] + b * x[t] for every column of `x`, starting from `y0`.
+
+    Blocks of `_BLOCK` steps are solved at once with a lower triangular matrix product.
+    """
+    m = x.shape[1]
+    out = np.empty_like(x)
+    if m == 0:
+        return out
+    j = np.arange(min(_BLOCK, m))
+    exponents = j[:, None] - j[None, :]
+    transfer = np.where(exponents >= 0, b * a ** np.maximum(exponents, 0), 0.0)
+    powers = a ** (j + 1)
+
+    previous = np.asarray(y0, dtype=np.float64)
+    for s in range(0, m, len(j)):
+        block = x[:, s:s + len(j)]
+        w = block.shape[1]
+        values = block @ transfer[:w, :w].T + previous[:, None] * powers[:w]
+        out[:, s:s + w] = values
+        previous = values[:, -1]
+    return out
+
+
+def _ema(x, period, start=0):
+    out = _nan(x)
+    first = start + period - 1
+    if x.shape[1] <= first:
+        return out
+    k = 2.0 / (period + 1)
+    out[:, first] = x[:, start:first + 1].sum(axis=1) / period
+    out[:, first + 1:] = _recurse(x[:, first + 1:], 1.0 - k, k, out[:, first])
+    return out
+
+
+def _ema_chain(x, period, depth, start=0):
+    chain = []
+    for _ in range(depth):
+        x = _ema(x, period, start)
+        start += period - 1
+        chain.append(x)
+    return chain
+
+
+def _sma(x, period, start=0):
+    return _rolling_sum(x, period, start) / period
+
+
+def _wilder(values, period, first, seed):
+    """
+    Wilder smoothing: out[first] = seed, then out[t] = out[t - 1] * (period - 1) / period + values[t] / period.
+    """
+    out = _nan(values)
+    if values.shape[1] <= first:
+        return out
+    out[:, first] = seed
+    out[:, first + 1:] = _recurse(values[:, first + 1:], (period - 1) / period, 1.0 / period, seed)
+    return out
+
+
+def _rolling_extreme(x, period, start, maximum):
+    """
+    Rolling maximum or minimum in O(n) whatever the period (van Herk / Gil-Werman).
+
+    Every window spans at most two blocks of `period` bars, its extreme is the
+    extreme of the suffix of the first block and the prefix of the second.
+    """
+    out = _nan(x)
+    values = x[:, start:]
+    rows, m = values.shape
+    if m < period:
+        return out
+    function = np.maximum if maximum else np.minimum
+    blocks = -(-m // period)
+    padded = np.full((rows, blocks * period), -np.inf if maximum else np.inf)
+    padded[:, :m] = values
+    padded = padded.reshape(rows, blocks, period)
+    prefix = function.accumulate(padded, axis=2).reshape(rows, -1)
+    suffix = function.accumulate(padded[:, :, ::-1], axis=2)[:, :, ::-1].reshape(rows, -1)
+    out[:, start + period - 1:] = function(suffix[:, :m - period + 1], prefix[:, period - 1:m])
+    return out
+
+
+def _extreme_index(x, period, start, maximum, newest=True):
+    """
+    Position of the extreme of every window.
+
+    AROON reports the newest of equal extremes. MAXINDEX / MININDEX (`newest`
+    False) follow the scan of TA-Lib: a new value equal to the extreme takes
+    its place, but when the extreme leaves the window the oldest of the equal
+    values is reported. Rows with equal extremes are replayed bar by bar.
+    """
+    windows = _windows(x, period, start)
+    last = start + period - 1 + np.arange(windows.shape[1])
+    argument = np.argmax if maximum else np.argmin
+    index = np.zeros(x.shape, dtype=np.int64)
+    index[:, start + period - 1:] = last - argument(windows[:, :, ::-1], axis=2)
+    if newest:
+        return index
+
+    oldest = last - (period - 1) + argument(windows, axis=2)
+    for row in np.nonzero((oldest != index[:, start + period - 1:]).any(axis=1))[0]:
+        values = x[row]
+        best = -1
+        for i, first_index in zip(last.tolist(), oldest[row].tolist()):
+            if best <= i - period:
+                best = first_index
+            elif values[i] >= values[best] if maximum else values[i] <= values[best]:
+                best = i
+            index[row, i] = best
+    return index
+
+
+# Overlap studies
+def SMA(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    return _finish(_sma(x, timeperiod, start), squeeze)
+
+
+def EMA(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    return _finish(_ema(x, timeperiod, start), squeeze)
+
+
+def DEMA(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    e1, e2 = _ema_chain(x, timeperiod, 2, start)
+    return _finish(2 * e1 - e2, squeeze)
+
+
+def TEMA(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    e1, e2, e3 = _ema_chain(x, timeperiod, 3, start)
+    return _finish(3 * e1 - 3 * e2 + e3, squeeze)
+
+
+def T3(close, timeperiod=5, vfactor=0.7):
+    (x,), start, squeeze = _prepare(close)
+    e = _ema_chain(x, timeperiod, 6, start)
+    v = vfactor
+    c1 = -v * v * v
+    c2 = 3 * v * v + 3 * v * v * v
+    c3 = -6 * v * v - 3 * v - 3 * v * v * v
+    c4 = 1 + 3 * v + v * v * v + 3 * v * v
+    return _finish(c1 * e[5] + c2 * e[4] + c3 * e[3] + c4 * e[2], squeeze)
+
+
+def WMA(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    out = _nan(x)
+    if x.shape[1] - start >= timeperiod:
+        weights = np.arange(1, timeperiod + 1) / (timeperiod * (timeperiod + 1) / 2)
+        out[:, start + timeperiod - 1:] = _windows(x, timeperiod, start) @ weights
+    return _finish(out, squeeze)
+
+
+def TRIMA(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    first, second = ((timeperiod + 1) // 2,) * 2 if timeperiod % 2 else (timeperiod // 2, timeperiod // 2 + 1)
+    out = _sma(_sma(x, first, start), second, start + first - 1)
+    return _finish(out, squeeze)
+
+
+def KAMA(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    out = _nan(x)
+    n = x.shape[1]
+    first = start + timeperiod
+    if n <= first:
+        return _finish(out, squeeze)
+
+    fastest, slowest = 2.0 / 3.0, 2.0 / 31.0
+    change = x[:, first:] - x[:, start:n - timeperiod]
+    volatility = _rolling_sum(np.abs(np.diff(x[:, start:], axis=1)), timeperiod)[:, timeperiod - 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efficiency = np.where((volatility <= change) | (np.abs(volatility) < _EPSILON), 1.0,
+                              np.abs(change / volatility))
+    constant = (efficiency * (fastest - slowest) + slowest) ** 2
+
+    # The smoothing constant changes every bar, so this recursion runs bar by bar
+    value = x[:, first - 1].copy()
+    xt, ct, ot = x.T, constant.T, out.T
+    for t in range(first, n):
+        value = (xt[t] - value) * ct[t - first] + value
+        ot[t] = value
+    return _finish(out, squeeze)
+
+
+def MA(close, timeperiod=30, matype=0):
+    functions = {0: SMA, 1: EMA, 2: WMA, 3: DEMA, 4: TEMA, 5: TRIMA, 6: KAMA}
+    if matype == 8:
+        return T3(close, timeperiod)
+    if matype not in functions:
+        raise ValueError(f"MA type {matype} is not available in the NumPy backend.")
+    return functions[matype](close, timeperiod)
+
+
+def MIDPOINT(close, timeperiod=14):
+    (x,), start, squeeze = _prepare(close)
+    out = (_rolling_extreme(x, timeperiod, start, True) + _rolling_extreme(x, timeperiod, start, False)) / 2
+    return _finish(out, squeeze)
+
+
+# Math operators
+def MAX(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    return _finish(_rolling_extreme(x, timeperiod, start, True), squeeze)
+
+
+def MIN(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    return _finish(_rolling_extreme(x, timeperiod, start, False), squeeze)
+
+
+def MAXINDEX(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    if x.shape[1] - start < timeperiod:
+        return _finish(np.zeros(x.shape, dtype=np.int32), squeeze)
+    return _finish(_extreme_index(x, timeperiod, start, True, newest=False).astype(np.int32), squeeze)
+
+
+def MININDEX(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    if x.shape[1] - start < timeperiod:
+        return _finish(np.zeros(x.shape, dtype=np.int32), squeeze)
+    return _finish(_extreme_index(x, timeperiod, start, False, newest=False).astype(np.int32), squeeze)
+
+
+def SUM(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    return _finish(_rolling_sum(x, timeperiod, start), squeeze)
+
+
+def ADD(high, low):
+    (h, l), _, squeeze = _prepare(high, low)
+    return _finish(h + l, squeeze)
+
+
+def SUB(high, low):
+    (h, l), _, squeeze = _prepare(high, low)
+    return _finish(h - l, squeeze)
+
+
+def DIV(high, low):
+    (h, l), _, squeeze = _prepare(high, low)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _finish(h / l, squeeze)
+
+
+# Math transforms
+def _transform(function):
+    def transform(close):
+        (x,), _, squeeze = _prepare(close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return _finish(function(x), squeeze)
+    return transform
+
+
+ACOS = _transform(np.arccos)
+ASIN = _transform(np.arcsin)
+ATAN = _transform(np.arctan)
+CEIL = _transform(np.ceil)
+COS = _transform(np.cos)
+FLOOR = _transform(np.floor)
+LN = _transform(np.log)
+LOG10 = _transform(np.log10)
+SIN = _transform(np.sin)
+SQRT = _transform(np.sqrt)
+TAN = _transform(np.tan)
+TANH = _transform(np.tanh)
+
+
+# Momentum indicators
+def _shifted(close, timeperiod, formula):
+    (x,), start, squeeze = _prepare(close)
+    out = _nan(x)
+    if x.shape[1] - start > timeperiod:
+        current, previous = x[:, start + timeperiod:], x[:, start:x.shape[1] - timeperiod]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, start + timeperiod:] = formula(current, previous)
+    return _finish(out, squeeze)
+
+
+def MOM(close, timeperiod=10):
+    return _shifted(close, timeperiod, lambda current, previous: current - previous)
+
+
+def ROC(close, timeperiod=10):
+    return _shifted(close, timeperiod, lambda c, p: np.where(p != 0.0, ((c / p) - 1.0) * 100.0, 0.0))
+
+
+def ROCP(close, timeperiod=10):
+    return _shifted(close, timeperiod, lambda c, p: np.where(p != 0.0, (c - p) / p, 0.0))
+
+
+def ROCR(close, timeperiod=10):
+    return _shifted(close, timeperiod, lambda c, p: np.where(p != 0.0, c / p, 0.0))
+
+
+def ROCR100(close, timeperiod=10):
+    return _shifted(close, timeperiod, lambda c, p: np.where(p != 0.0, (c / p) * 100.0, 0.0))
+
+
+def _gains_losses(close, timeperiod):
+    (x,), start, squeeze = _prepare(close)
+    first = start + timeperiod
+    if x.shape[1] <= first:
+        return None, None, first, squeeze, x
+    change = np.zeros(x.shape)
+    change[:, start + 1:] = np.diff(x[:, start:], axis=1)
+    gains, losses = np.maximum(change, 0.0), np.maximum(-change, 0.0)
+    gain = _wilder(gains, timeperiod, first, gains[:, start + 1:first + 1].sum(axis=1) / timeperiod)
+    loss = _wilder(losses, timeperiod, first, losses[:, start + 1:first + 1].sum(axis=1) / timeperiod)
+    return gain, loss, first, squeeze, x
+
+
+def RSI(close, timeperiod=14):
+    gain, loss, first, squeeze, x = _gains_losses(close, timeperiod)
+    out = _nan(x)
+    if gain is not None:
+        out[:, first:] = _where_nonzero(100 * gain[:, first:], gain[:, first:] + loss[:, first:], exact=True)
+    return _finish(out, squeeze)
+
+
+def CMO(close, timeperiod=14):
+    gain, loss, first, squeeze, x = _gains_losses(close, timeperiod)
+    out = _nan(x)
+    if gain is not None:
+        g, l = gain[:, first:], loss[:, first:]
+        out[:, first:] = _where_nonzero(100 * (g - l), g + l, exact=True)
+    return _finish(out, squeeze)
+
+
+def _directional(high, low, close, timeperiod):
+    """
+    Smoothed +DM, -DM and true range of TA-Lib, defined from `start + timeperiod - 1`.
+    """
+    (h, l, c), start, squeeze = _prepare(high, low, close)
+    n = h.shape[1]
+    first = start + timeperiod - 1
+    plus = np.zeros(h.shape)
+    minus = np.zeros(h.shape)
+    true_range = np.zeros(h.shape)
+    if n > start + 1:
+        up = h[:, start + 1:] - h[:, start:-1]
+        down = l[:, start:-1] - l[:, start + 1:]
+        plus[:, start + 1:] = np.where((up > 0) & (up > down), up, 0.0)
+        minus[:, start + 1:] = np.where((down > 0) & (up < down), down, 0.0)
+        previous_close = c[:, start:-1]
+        true_range[:, start + 1:] = np.maximum.reduce([h[:, start + 1:] - l[:, start + 1:],
+                                                      np.abs(h[:, start + 1:] - previous_close),
+                                                      np.abs(l[:, start + 1:] - previous_close)])
+
+    smoothed = []
+    for values in (plus, minus, true_range):
+        out = _nan(h)
+        if n > first:
+            out[:, first] = values[:, start + 1:first + 1].sum(axis=1)
+            out[:, first + 1:] = _recurse(values[:, first + 1:], (timeperiod - 1) / timeperiod, 1.0, out[:, first])
+        smoothed.append(out)
+    return smoothed, start, squeeze
+
+
+def PLUS_DM(high, low, timeperiod=14):
+    (plus, _, _), _, squeeze = _directional(high, low, high, timeperiod)
+    return _finish(plus, squeeze)
+
+
+def MINUS_DM(high, low, timeperiod=14):
+    (_, minus, _), _, squeeze = _directional(high, low, high, timeperiod)
+    return _finish(minus, squeeze)
+
+
+def _indicators(high, low, close, timeperiod):
+    (plus, minus, true_range), start, squeeze = _directional(high, low, close, timeperiod)
+    first = start + timeperiod
+    plus_di, minus_di, dx = _nan(plus), _nan(plus), _nan(plus)
+    if plus.shape[1] > first:
+        tr = true_range[:, first:]
+        plus_di[:, first:] = _where_nonzero(100 * plus[:, first:], tr, exact=True)
+        minus_di[:, first:] = _where_nonzero(100 * minus[:, first:], tr, exact=True)
+        total = plus_di[:, first:] + minus_di[:, first:]
+        dx[:, first:] = np.where(tr == 0.0, 0.0, _where_nonzero(100 * np.abs(minus_di[:, first:] - plus_di[:, first:]),
+                                                                total, exact=True))
+    return plus_di, minus_di, dx, first, squeeze
+
+
+def PLUS_DI(high, low, close, timeperiod=14):
+    plus_di, _, _, _, squeeze = _indicators(high, low, close, timeperiod)
+    return _finish(plus_di, squeeze)
+
+
+def MINUS_DI(high, low, close, timeperiod=14):
+    _, minus_di, _, _, squeeze = _indicators(high, low, close, timeperiod)
+    return _finish(minus_di, squeeze)
+
+
+def DX(high, low, close, timeperiod=14):
+    _, _, dx, _, squeeze = _indicators(high, low, close, timeperiod)
+    return _finish(dx, squeeze)
+
+
+def _adx(high, low, close, timeperiod):
+    _, _, dx, first, squeeze = _indicators(high, low, close, timeperiod)
+    out = _nan(dx)
+    start = first + timeperiod - 1
+    if dx.shape[1] > start:
+        out[:, start:] = _wilder(dx, timeperiod, start, dx[:, first:start + 1].sum(axis=1) / timeperiod)[:, start:]
+    return out, start, squeeze
+
+
+def ADX(high, low, close, timeperiod=14):
+    out, _, squeeze = _adx(high, low, close, timeperiod)
+    return _finish(out, squeeze)
+
+
+def ADXR(high, low, close, timeperiod=14):
+    adx, start, squeeze = _adx(high, low, close, timeperiod)
+    out = _nan(adx)
+    lag = timeperiod - 1
+    if adx.shape[1] > start + lag:
+        out[:, start + lag:] = (adx[:, start + lag:] + adx[:, start:adx.shape[1] - lag]) / 2
+    return _finish(out, squeeze)
+
+
+def AROONOSC(high, low, timeperiod=14):
+    (h, l), start, squeeze = _prepare(high, low)
+    out = _nan(h)
+    if h.shape[1] - start > timeperiod:
+        highest = _extreme_index(h, timeperiod + 1, start, True)
+        lowest = _extreme_index(l, timeperiod + 1, start, False)
+        first = start + timeperiod
+        out[:, first:] = (100.0 / timeperiod) * (highest[:, first:] - lowest[:, first:])
+    return _finish(out, squeeze)
+
+
+def CCI(high, low, close, timeperiod=14):
+    (h, l, c), start, squeeze = _prepare(high, low, close)
+    out = _nan(h)
+    if h.shape[1] - start >= timeperiod:
+        typical = (h + l + c) / 3
+        windows = _windows(typical, timeperiod, start)
+        average = windows.sum(axis=2) / timeperiod
+        deviation = np.abs(windows - average[:, :, None]).sum(axis=2) / timeperiod
+        difference = typical[:, start + timeperiod - 1:] - average
+        # 0 when the difference or the mean deviation is zero relative to the average
+        epsilon = _EPSILON * np.abs(average)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, start + timeperiod - 1:] = np.where((np.abs(difference) < epsilon) | (deviation < epsilon), 0.0,
+                                                       difference / (0.015 * deviation))
+    return _finish(out, squeeze)
+
+
+def MFI(high, low, close, volume, timeperiod=14):
+    (h, l, c, v), start, squeeze = _prepare(high, low, close, volume)
+    out = _nan(h)
+    first = start + timeperiod
+    if h.shape[1] > first:
+        typical = (h + l + c) / 3.0
+        change = np.zeros(h.shape)
+        change[:, start + 1:] = np.diff(typical[:, start:], axis=1)
+        flow = typical * v
+        positive = _rolling_sum(np.where(change > 0, flow, 0.0), timeperiod, start + 1)[:, first:]
+        negative = _rolling_sum(np.where(change < 0, flow, 0.0), timeperiod, start + 1)[:, first:]
+        out[:, first:] = _where_nonzero(100.0 * positive, positive + negative)
+    return _finish(out, squeeze)
+
+
+def WILLR(high, low, close, timeperiod=14):
+    (h, l, c), start, squeeze = _prepare(high, low, close)
+    out = _nan(h)
+    if h.shape[1] - start >= timeperiod:
+        highest = _rolling_extreme(h, timeperiod, start, True)[:, start + timeperiod - 1:]
+        lowest = _rolling_extreme(l, timeperiod, start, False)[:, start + timeperiod - 1:]
+        diff = (highest - lowest) / (-100.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, start + timeperiod - 1:] = np.where(diff != 0.0,
+                                                       (highest - c[:, start + timeperiod - 1:]) / diff, 0.0)
+    return _finish(out, squeeze)
+
+
+def TRIX(close, timeperiod=30):
+    (x,), start, squeeze = _prepare(close)
+    e3 = _ema_chain(x, timeperiod, 3, start)[2]
+    out = _nan(x)
+    first = start + 3 * (timeperiod - 1) + 1
+    if x.shape[1] > first:
+        previous = e3[:, first - 1:-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, first:] = np.where(previous != 0.0, ((e3[:, first:] / previous) - 1.0) * 100.0, 0.0)
+    return _finish(out, squeeze)
+
+
+def APO(close, fastperiod=12, slowperiod=26, matype=0):
+    fast, slow = MA(close, fastperiod, matype), MA(close, slowperiod, matype)
+    return fast - slow
+
+
+def PPO(close, fastperiod=12, slowperiod=26, matype=0):
+    fast, slow = MA(close, fastperiod, matype), MA(close, slowperiod, matype)
+    out = _where_nonzero((fast - slow) * 100.0, slow)
+    return np.where(np.isnan(slow), np.nan, out)
+
+
+def ULTOSC(high, low, close, timeperiod1=7, timeperiod2=14, timeperiod3=28):
+    (h, l, c), start, squeeze = _prepare(high, low, close)
+    out = _nan(h)
+    periods = sorted((timeperiod1, timeperiod2, timeperiod3))
+    first = start + periods[2]
+    if h.shape[1] > first:
+        previous_close = np.full(h.shape, np.nan)
+        previous_close[:, start + 1:] = c[:, start:-1]
+        true_low = np.minimum(l, previous_close)
+        pressure = c - true_low
+        true_range = np.maximum.reduce([h - l, np.abs(previous_close - h), np.abs(previous_close - l)])
+
+        total = 0.0
+        for weight, period in zip((4.0, 2.0, 1.0), periods):
+            a = _rolling_sum(pressure, period, start + 1)[:, first:]
+            b = _rolling_sum(true_range, period, start + 1)[:, first:]
+            total = total + weight * _where_nonzero(a, b)
+        out[:, first:] = 100.0 * (total / 7.0)
+    return _finish(out, squeeze)
+
+
+# Statistic functions
+def BETA(high, low, timeperiod=5):
+    (x, y), start, squeeze = _prepare(high, low)
+    out = _nan(x)
+    first = start + timeperiod
+    if x.shape[1] > first:
+        returns = []
+        for values in (x, y):
+            r = np.zeros(values.shape)
+            previous = values[:, start:-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r[:, start + 1:] = np.where(previous != 0.0, (values[:, start + 1:] - previous) / previous, 0.0)
+            returns.append(r)
+        # Returns are not centered, so the window of a flat stretch stays exactly 0
+        _, _, squares_x, _, products = _moments(*returns, timeperiod, start + 1, center=False)
+        out[:, first:] = _where_nonzero(products, squares_x, exact=True)
+    return _finish(out, squeeze)
+
+
+def CORREL(high, low, timeperiod=30):
+    (x, y), start, squeeze = _prepare(high, low)
+    out = _nan(x)
+    first = start + timeperiod - 1
+    if x.shape[1] > first:
+        mean_x, mean_y, squares_x, squares_y, products = _moments(x, y, timeperiod, start)
+        # 0 for a flat window, whose deviations are the rounding of its mean
+        flat = ((squares_x <= timeperiod * (_EPSILON * mean_x) ** 2) |
+                (squares_y <= timeperiod * (_EPSILON * mean_y) ** 2))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[:, first:] = np.where(flat, 0.0, products / np.sqrt(squares_x * squares_y))
+    return _finish(out, squeeze)
+
+
+def _variance(close, timeperiod):
+    (x,), start, squeeze = _prepare(close)
+    out = _nan(x)
+    first = start + timeperiod - 1
+    if x.shape[1] > first:
+        x = x - x[:, start:start + 1]
+        mean = _rolling_sum(x, timeperiod, start)[:, first:] / timeperiod
+        mean_square = _rolling_sum(x * x, timeperiod, start)[:, first:] / timeperiod
+        out[:, first:] = mean_square - mean * mean
+    return out, squeeze
+
+
+def VAR(close, timeperiod=5, nbdev=1):
+    out, squeeze = _variance(close, timeperiod)
+    return _finish(out, squeeze)
+
+
+def STDDEV(close, timeperiod=5, nbdev=1):
+    variance, squeeze = _variance(close, timeperiod)
+    with np.errstate(invalid='ignore'):
+        out = np.where(variance < _EPSILON, 0.0, np.sqrt(np.maximum(variance, 0.0))) * nbdev
+    return _finish(np.where(np.isnan(variance), np.nan, out), squeeze)
+
+
+def _regression(close, timeperiod):
+    (x,), start, squeeze = _prepare(close)
+    first = start + timeperiod - 1
+    if x.shape[1] <= first:
+        return None, None, x, first, squeeze
+    # x of TA-Lib counts bars back from the newest one
+    backwards = np.arange(timeperiod - 1, -1, -1, dtype=np.float64)
+    windows = _windows(x, timeperiod, start)
+    sum_y = windows.sum(axis=2)
+    sum_xy = windows @ backwards
+    sum_x = timeperiod * (timeperiod - 1) * 0.5
+    sum_x_sqr = timeperiod * (timeperiod - 1) * (2 * timeperiod - 1) / 6
+    divisor = sum_x * sum_x - timeperiod * sum_x_sqr
+    slope = (timeperiod * sum_xy - sum_x * sum_y) / divisor
+    intercept = (sum_y - slope * sum_x) / timeperiod
+    return slope, intercept, x, first, squeeze
+
+
+def _regression_output(close, timeperiod, formula):
+    slope, intercept, x, first, squeeze = _regression(close, timeperiod)
+    out = _nan(x)
+    if slope is not None:
+        out[:, first:] = formula(slope, intercept)
+    return _finish(out, squeeze)
+
+
+def LINEARREG(close, timeperiod=14):
+    return _regression_output(close, timeperiod, lambda m, b: b + m * (timeperiod - 1))
+
+
+def LINEARREG_SLOPE(close, timeperiod=14):
+    return _regression_output(close, timeperiod, lambda m, b: m)
+
+
+def LINEARREG_INTERCEPT(close, timeperiod=14):
+    return _regression_output(close, timeperiod, lambda m, b: b)
+
+
+def LINEARREG_ANGLE(close, timeperiod=14):
+    return _regression_output(close, timeperiod, lambda m, b: np.arctan(m) * (180.0 / np.pi))
+
+
+def TSF(close, timeperiod=14):
+    return _regression_output(close, timeperiod, lambda m, b: b + m * timeperiod)
+
+
+def available(function: str) -> bool:
+    """
+    Whether a TA-Lib function name has an implementation in this backend.
+    """
+    return function.isupper() and callable(globals().get(function))
+
+
+def talib_only(periods: list[int] = None) -> list:
+    """
+    Features of `default_registry(periods)` that still need TA-Lib: the candlestick patterns and HT_TRENDLINE.
+    """
+    from function.indicator_registry import default_registry
+
+    registry = default_registry(periods)
+    return [name for name, spec in registry.specs.items()
+            if isinstance(spec.function, str) and not available(spec.function)]
+
+
+def compute_universe(inputs: dict, names: list, periods: list[int] = None) -> dict:
+    """
+    Computes registry features for a universe of symbols in one call per feature.
+
+    Args:
+        inputs (dict): Bar column ("Open", "High", "Low", "Close", "Volume") -> 2-D array (symbols x time).
+        names (list): Feature names of `default_registry(periods)`.
+        periods (list, optional): Indicator periods. Defaults to the periods of `Preprocessing_stock_data`.
+
+    Returns:
+        dict: Feature name -> 2-D array.
+
+    Raises:
+        ValueError: If a feature, or one it depends on, has no implementation in this backend (see `talib_only`).
+    """
+    from function.indicator_registry import default_registry
+
+    registry = default_registry(periods)
+    missing = [name for name in registry.resolve(names)
+               if not (isinstance(registry.specs[name].function, str) and available(registry.specs[name].function))]
+    if missing:
+        raise ValueError(f"Not available in the NumPy backend: {missing}")
+    inputs = {column: np.atleast_2d(np.asarray(values, dtype=np.float64)) for column, values in inputs.items()}
+    return registry.compute(inputs, names, sys.modules[__name__])
+
+
+# Equivalence checks and benchmark
+def compare_with_talib(bars: int = 5_000, symbols: int = 3, periods: list[int] = None, seed: int = 0) -> pd.Series:
+    """
+    Largest relative difference between this backend and TA-Lib for every feature of the registry it implements.
+
+    The features are computed for all symbols in one 2-D call and compared with
+    TA-Lib row by row, NaN positions included.
+
+    Returns:
+        pd.Series: Maximum of |numpy - talib| / max(1, |talib|) per feature, inf where the NaN positions differ.
+    """
+    from function.indicator_registry import default_registry
+
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, (symbols, bars)), axis=1)
+    high = close + rng.uniform(0, 0.002, (symbols, bars))
+    low = close - rng.uniform(0, 0.002, (symbols, bars))
+    open_ = low + (high - low) * rng.uniform(0, 1, (symbols, bars))
+    inputs = {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": high - low}
+
+    registry = default_registry(periods)
+    errors = {}
+    for name, spec in registry.specs.items():
+        if not isinstance(spec.function, str) or not available(spec.function):
+            continue
+        batch = globals()[spec.function](*(inputs[column] for column in spec.inputs), **spec.params)
+        error = 0.0
+        for row in range(symbols):
+            expected = getattr(tl, spec.function)(*(inputs[column][row] for column in spec.inputs), **spec.params)
+            expected = np.asarray(expected, dtype=np.float64)
+            actual = np.asarray(batch[row], dtype=np.float64)
+            if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+                error = np.inf
+                break
+            valid = ~np.isnan(expected)
+            if valid.any():
+                difference = np.abs(actual[valid] - expected[valid]) / np.maximum(1.0, np.abs(expected[valid]))
+                error = max(error, float(difference.max()))
+        errors[name] = error
+    return pd.Series(errors)
+
+
+def benchmark_backend(symbols=(1, 10, 100), bars: int = 10_000, functions=("EMA", "RSI", "ADX", "SMA", "LINEARREG",
+                                                                            "STDDEV", "MAX", "WILLR"),
+                      timeperiod: int = 23, seed: int = 0) -> pd.DataFrame:
+    """
+    Compares one 2-D call of this backend with TA-Lib called once per symbol.
+
+    The inputs and parameters of every function are those of its feature in
+    `default_registry([timeperiod])`.
+
+    Returns:
+        pd.DataFrame: Per universe size, seconds of both, their ratio and symbol-bars per second of the backend.
+
+    Raises:
+        ValueError: If a function has no feature in the registry or no implementation in this backend.
+    """
+    from function.indicator_registry import default_registry
+
+    registry = default_registry([timeperiod])
+    specs = {}
+    for spec in registry.specs.values():
+        if isinstance(spec.function, str) and spec.params.get("timeperiod") == timeperiod:
+            specs.setdefault(spec.function, spec)
+    missing = [name for name in functions if name not in specs or not available(name)]
+    if missing:
+        raise ValueError(f"No registry feature with timeperiod={timeperiod} in the NumPy backend for: {missing}")
+
+    rng = np.random.default_rng(seed)
+    rows = []
+    for count in symbols:
+        close = 1.1 + np.cumsum(rng.normal(0, 0.001, (count, bars)), axis=1)
+        high = close + rng.uniform(0, 0.002, (count, bars))
+        low = close - rng.uniform(0, 0.002, (count, bars))
+        open_ = low + (high - low) * rng.uniform(0, 1, (count, bars))
+        inputs = {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": high - low}
+
+        numpy_time = talib_time = 0.0
+        for name in functions:
+            spec = specs[name]
+            arrays = [inputs[column] for column in spec.inputs]
+
+            start = time.perf_counter()
+            globals()[name](*arrays, **spec.params)
+            numpy_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            for row in range(count):
+                getattr(tl, name)(*(values[row] for values in arrays), **spec.params)
+            talib_time += time.perf_counter() - start
+
+        rows.append({"symbols": count, "numpy": numpy_time, "talib": talib_time, "ratio": numpy_time / talib_time,
+                     "symbol_bars_per_second": count * bars * len(functions) / numpy_time})
+    return pd.DataFrame(rows)
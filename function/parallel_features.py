@@ -0,0 +1,154 @@
+from import_libraries.libraries import *
+from function.preprocess_function import Preprocessing_stock_data, FEATURE_FAMILIES
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import os
+
+# Columns passed to the workers, 'Date' as int64 nanoseconds
+SHARED_COLUMNS = ("Open", "High", "Low", "Close", "Volume", "Date")
+
+# Families with one task per period, the others run as one task
+PERIOD_FAMILIES = ("overlap", "math_operator", "momentum", "statistic")
+
+
+class SharedBars:
+    """
+    Copies the input columns of a frame into one shared memory block.
+
+    Workers attach to the block by name and read the columns without the frame
+    being pickled. Use as a context manager, the block is released on exit.
+
+    Attributes:
+        spec (tuple): (block name, number of rows), enough for a worker to attach.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        rows = len(data)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * rows * len(SHARED_COLUMNS)))
+        block = np.ndarray((len(SHARED_COLUMNS), rows), dtype=np.float64, buffer=self.shm.buf)
+        for i, column in enumerate(SHARED_COLUMNS):
+            values = data[column].to_numpy()
+            if column == "Date":
+                values = values.astype("datetime64[ns]").view(np.int64)
+                block[i].view(np.int64)[:] = values
+            else:
+                block[i] = values
+        del block
+        self.spec = (self.shm.name, rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _frame_from_block(block) -> pd.DataFrame:
+    data = {column: block[i] for i, column in enumerate(SHARED_COLUMNS) if column != "Date"}
+    data["Date"] = block[SHARED_COLUMNS.index("Date")].view(np.int64).view("datetime64[ns]")
+    return pd.DataFrame(data, copy=False)
+
+
+def _family_columns(data: pd.DataFrame, family: str, periods: list[int]) -> dict:
+    method = getattr(Preprocessing_stock_data(data, periods), FEATURE_FAMILIES[family])
+    return {name: np.asarray(values) for name, values in method(as_columns=True).items()}
+
+
+def _shared_task(spec, family, periods):
+    name, rows = spec
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        block = np.ndarray((len(SHARED_COLUMNS), rows), dtype=np.float64, buffer=shm.buf)
+        columns = _family_columns(_frame_from_block(block), family, periods)
+        del block
+        return columns
+    finally:
+        shm.close()
+
+
+def feature_tasks(periods: list[int]) -> list:
+    """
+    Splits the feature families into independent (family, periods) tasks.
+    """
+    tasks = []
+    for family in FEATURE_FAMILIES:
+        if family in PERIOD_FAMILIES:
+            tasks += [(family, [period]) for period in periods]
+        else:
+            tasks.append((family, periods))
+    return tasks
+
+
+def _merge_period_columns(parts: list) -> dict:
+    # Columns without a period (APO, ADD, ...) are produced by every task and come last, as in the serial path
+    common = [name for name in parts[0] if all(name in part for part in parts)] if len(parts) > 1 else []
+    columns = {}
+    for part in parts:
+        columns.update({name: values for name, values in part.items() if name not in common})
+    columns.update({name: parts[0][name] for name in common})
+    return columns
+
+
+def parallel_feature_matrices(datasets: dict, periods: list[int] = None, max_workers: int = None,
+                              executor: str = "process") -> dict:
+    """
+    Computes `Preprocessing_stock_data.feature_matrix` of several symbols on a pool.
+
+    Every symbol, family and period is a separate task. With the process pool
+    the bars are passed through shared memory and only the indicator columns
+    are sent back, with the thread pool the workers read the frames directly.
+    The results are identical to the serial path.
+
+    Args:
+        datasets (dict): Symbol -> DataFrame of `get_historical_data`.
+        periods (list, optional): Indicator periods. Defaults to the periods of `Preprocessing_stock_data`.
+        max_workers (int, optional): Pool size. Defaults to the number of CPUs.
+        executor (str, optional): "process" or "thread". Defaults to "process".
+
+    Returns:
+        dict: Symbol -> feature matrix.
+    """
+    if not datasets:
+        return {}
+    periods = Preprocessing_stock_data(next(iter(datasets.values())), periods).periods
+    max_workers = max_workers if max_workers else os.cpu_count()
+    tasks = feature_tasks(periods)
+
+    shared = {}
+    try:
+        if executor == "process":
+            pool = ProcessPoolExecutor(max_workers=max_workers)
+            shared = {symbol: SharedBars(data) for symbol, data in datasets.items()}
+            submit = lambda symbol, family, task_periods: pool.submit(
+                _shared_task, shared[symbol].spec, family, task_periods)
+        elif executor == "thread":
+            pool = ThreadPoolExecutor(max_workers=max_workers)
+            submit = lambda symbol, family, task_periods: pool.submit(
+                _family_columns, datasets[symbol], family, task_periods)
+        else:
+            raise ValueError(f"Unknown executor {executor!r}, use 'process' or 'thread'.")
+
+        with pool:
+            futures = {symbol: [(family, submit(symbol, family, task_periods)) for family, task_periods in tasks]
+                       for symbol in datasets}
+
+            frames = {}
+            for symbol, data in datasets.items():
+                parts = {}
+                for family, future in futures[symbol]:
+                    parts.setdefault(family, []).append(future.result())
+                families = {family: _merge_period_columns(parts[family]) for family in FEATURE_FAMILIES}
+                frames[symbol] = Preprocessing_stock_data(data, periods).assemble_features(families)
+        return frames
+    finally:
+        for bars in shared.values():
+            bars.__exit__(None, None, None)
+
+
+def parallel_feature_matrix(data: pd.DataFrame, periods: list[int] = None, max_workers: int = None,
+                            executor: str = "process") -> pd.DataFrame:
+    """
+    Computes `Preprocessing_stock_data.feature_matrix` of one symbol on a pool, split by family and period.
+    """
+    return parallel_feature_matrices({"": data}, periods, max_workers, executor)[""]
@@ -0,0 +1,172 @@
+from import_libraries.libraries import *
+from function.preprocess_function import define_level, calculate_min_capital, symbol_info
+from function.rolling import ExtremaIndex
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from functools import partial
+from types import SimpleNamespace
+import os
+import time
+
+# Fields of `symbol_info` read by `calculate_min_capital`
+SNAPSHOT_FIELDS = ("volume_min", "ask", "bid", "swap_short", "swap_long")
+
+# State of a worker process, set once by `_init_worker`
+_worker = {}
+
+
+class SharedFrame:
+    """
+    Copies every column of a frame into one shared memory block.
+
+    Unlike `SharedBars` all columns are kept with their own dtype, because the
+    dropped rows of `define_level` depend on every column. Workers attach to the
+    block by name. Use as a context manager, the block is released on exit.
+
+    Attributes:
+        spec (tuple): (block name, number of rows, [(column, dtype, offset), ...]).
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        rows = len(data)
+        layout = []
+        offset = 0
+        for column in data.columns:
+            dtype = data[column].dtype
+            if not isinstance(dtype, np.dtype) or dtype.kind not in "biufcmM":
+                raise ValueError(f"Column {column!r} of dtype {dtype} cannot be shared, only numeric and datetime columns.")
+            layout.append((column, dtype.str, offset))
+            # 8-byte alignment of every column
+            offset += -(-rows * dtype.itemsize // 8) * 8
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, offset))
+        for column, dtype, start in layout:
+            target = np.ndarray(rows, dtype=dtype, buffer=self.shm.buf, offset=start)
+            target[:] = data[column].to_numpy()
+            del target
+        self.spec = (self.shm.name, rows, layout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(spec):
+    name, rows, layout = spec
+    shm = shared_memory.SharedMemory(name=name)
+    columns = {column: np.ndarray(rows, dtype=dtype, buffer=shm.buf, offset=start) for column, dtype, start in layout}
+    return shm, pd.DataFrame(columns, copy=False)
+
+
+def symbol_snapshot(symbol: str):
+    """
+    Plain copy of the `symbol_info` fields used by `calculate_min_capital`.
+
+    Workers score with this copy instead of asking the terminal, so every
+    combination uses the same bid / ask.
+
+    Returns:
+        SimpleNamespace: The fields of `SNAPSHOT_FIELDS`, or None if the symbol was not found.
+    """
+    info = symbol_info(symbol)
+    if info is None:
+        return None
+    return SimpleNamespace(**{field: getattr(info, field) for field in SNAPSHOT_FIELDS})
+
+
+def _init_worker(spec, analysis, calculate, symbol):
+    shm, data = _attach(spec)
+    _worker.update(shm=shm, data=data, extrema=ExtremaIndex.from_frame(data),
+                   analysis=analysis, calculate=calculate, symbol=symbol)
+
+
+def _score_chunk(parameters):
+    data, extrema = _worker["data"], _worker["extrema"]
+    analysis, calculate, symbol = _worker["analysis"], _worker["calculate"], _worker["symbol"]
+    return [calculate(analysis(define_level(data, window_size, bias, extrema)), symbol=symbol)
+            for window_size, bias in parameters]
+
+
+def parallel_optimize_parameters(data, analysis, calculate, window_size_range, bias_range, return_param=False,
+                                 symbol=None, max_workers: int = None, chunk_size: int = None):
+    """
+    `optimize_parameters` with the (window_size, bias) combinations scored on a process pool.
+
+    The frame is put into shared memory once and every worker builds its
+    `ExtremaIndex` once, so a task only carries a list of combinations and
+    returns their scores. With `calculate_min_capital` the symbol information
+    is read once (`symbol_snapshot`) and given to the workers at start-up.
+    The progress bar counts finished chunks. The scores are reduced in the
+    order of the serial loops, so the best combination is the same, the first
+    one with the highest score, and its data is computed again in the calling
+    process.
+
+    `analysis` and `calculate` must be importable module functions.
+
+    Args:
+        data (pd.DataFrame): The input DataFrame, numeric and datetime columns only.
+        analysis (function): The analysis function to be optimized.
+        calculate (function): The function to calculate the score.
+        window_size_range (tuple): Arguments of `range` for the window sizes.
+        bias_range (tuple): Arguments of `range` for the biases.
+        return_param (bool, optional): Return the parameters instead of the data. Defaults to False.
+        symbol (str, optional): The symbol passed to `calculate`. Defaults to None.
+        max_workers (int, optional): Pool size. Defaults to the number of CPUs.
+        chunk_size (int, optional): Combinations per task. Defaults to four tasks per worker.
+
+    Returns:
+        dict or pd.DataFrame: The best parameters, or the data of `optimize_parameters` for them.
+    """
+    parameters = [(window_size, bias) for window_size in range(*window_size_range) for bias in range(*bias_range)]
+    max_workers = max_workers if max_workers else os.cpu_count()
+    chunk_size = chunk_size if chunk_size else max(1, ceil(len(parameters) / (4 * max_workers)))
+    chunks = [parameters[i:i + chunk_size] for i in range(0, len(parameters), chunk_size)]
+
+    score_with = calculate
+    if calculate is calculate_min_capital:
+        score_with = partial(calculate_min_capital, info=symbol_snapshot(symbol))
+
+    scores = [None] * len(chunks)
+    if chunks:
+        with SharedFrame(data) as shared, \
+                ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                    initargs=(shared.spec, analysis, score_with, symbol)) as pool:
+            futures = {pool.submit(_score_chunk, chunk): i for i, chunk in enumerate(chunks)}
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                scores[futures[future]] = future.result()
+
+    best_score = float('-inf')
+    best_params = None
+    for (window_size, bias), current_score in zip(parameters, (score for chunk in scores for score in chunk)):
+        if current_score > best_score:
+            best_score = current_score
+            best_params = {'window_size': window_size, 'bias': bias}
+    print(best_params)
+
+    if return_param:
+        return best_params
+    if best_params is None:
+        return None
+    best_data = analysis(define_level(data, best_params["window_size"], best_params["bias"]))
+    # The serial loop returns the data after `calculate` ('Capital' column)
+    score_with(best_data, symbol=symbol)
+    return best_data
+
+
+def benchmark_parallel_search(data: pd.DataFrame, analysis, calculate, window_size_range=(5, 30), bias_range=(1, 10),
+                              workers=(1, 2, 4, 8), symbol=None) -> pd.DataFrame:
+    """
+    Seconds of `parallel_optimize_parameters` per pool size and the speed-up over one worker.
+    """
+    rows = []
+    for max_workers in workers:
+        start = time.perf_counter()
+        parallel_optimize_parameters(data, analysis, calculate, window_size_range, bias_range, True, symbol,
+                                     max_workers=max_workers)
+        rows.append({"workers": max_workers, "seconds": time.perf_counter() - start})
+    result = pd.DataFrame(rows).set_index("workers")
+    result["speedup"] = result["seconds"].iloc[0] / result["seconds"]
+    return result
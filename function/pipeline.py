@@ -0,0 +1,110 @@
+from import_libraries.libraries import *
+from contextlib import contextmanager, nullcontext
+import tracemalloc
+import time
+
+# Whether the strategy stages share the columns of their input instead of copying it
+_state = {"views": False}
+
+
+def views_enabled() -> bool:
+    """
+    Returns True inside `pipeline_mode`.
+    """
+    return _state["views"]
+
+
+def _copy_on_write():
+    # Always on since pandas 3, an option in pandas 2
+    major = int(pd.__version__.split(".")[0])
+    if major == 2:
+        return pd.option_context("mode.copy_on_write", True)
+    return nullcontext()
+
+
+@contextmanager
+def pipeline_mode():
+    """
+    Runs the strategy pipeline without defensive copies of the whole frame.
+
+    Inside the block `define_level`, `calculate_accumulated_price_changes`,
+    `prepare_data` and `Preprocessing_stock_data` take shallow copies of their
+    input: the new frame shares the OHLC columns and only the columns a stage
+    creates are allocated. Copy-on-Write keeps the input unchanged when a stage
+    writes to a shared column, and the shared arrays are read-only. Rows with
+    missing values are cut off by slicing when they only lead the frame, which
+    is the case for the rolling levels, instead of copying every column through
+    a mask.
+
+    Example:
+    ```
+    with pipeline_mode():
+        best = optimize_parameters(data, rebound_analysis, calculate_accumulated_price_changes, (5, 30), (1, 5))
+    ```
+    """
+    previous = _state["views"]
+    _state["views"] = True
+    try:
+        with _copy_on_write():
+            yield
+    finally:
+        _state["views"] = previous
+
+
+def own(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of a stage's input: deep by default, sharing the columns in `pipeline_mode`.
+    """
+    return data.copy(deep=not views_enabled())
+
+
+def drop_incomplete_rows(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns `data.dropna().reset_index(drop=True)`.
+
+    In `pipeline_mode`, when the missing values are only in the first rows, the
+    rest is returned as a slice that shares the columns.
+    """
+    if views_enabled():
+        complete = data.notna().all(axis=1).to_numpy()
+        first = int(np.argmax(complete)) if complete.any() else len(data)
+        if complete[first:].all():
+            data = data.iloc[first:]
+            data.index = pd.RangeIndex(len(data))
+            return data
+    return data.dropna(axis=0).reset_index(drop=True)
+
+
+def allocation_benchmark(data: pd.DataFrame, window_size_range=(5, 15), bias_range=(1, 3), symbol=None) -> pd.DataFrame:
+    """
+    Memory allocated by the grid of `optimize_parameters`, with and without `pipeline_mode`.
+
+    Every parameter combination runs `define_level`, `rebound_analysis` and
+    `calculate_accumulated_price_changes` under tracemalloc. Its allocation is
+    the peak of the traced memory above what was allocated before it started,
+    so every copy of the frame counts even if it is freed again.
+
+    Returns:
+        pd.DataFrame: Per mode: seconds, MB allocated per combination and per run, and the peak MB of the run.
+    """
+    from function.preprocess_function import define_level, rebound_analysis, calculate_accumulated_price_changes
+
+    rows = []
+    for mode, context in (("copy", nullcontext), ("pipeline", pipeline_mode)):
+        allocated = []
+        with context():
+            tracemalloc.start()
+            start = time.perf_counter()
+            for window_size in range(*window_size_range):
+                for bias in range(*bias_range):
+                    base = tracemalloc.get_traced_memory()[0]
+                    tracemalloc.reset_peak()
+                    calculate_accumulated_price_changes(rebound_analysis(define_level(data, window_size, bias)),
+                                                        symbol=symbol)
+                    allocated.append(tracemalloc.get_traced_memory()[1] - base)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        rows.append({"mode": mode, "seconds": seconds, "mb_per_combination": np.mean(allocated) / 1e6,
+                     "mb_per_run": np.sum(allocated) / 1e6, "peak_mb": peak / 1e6})
+    return pd.DataFrame(rows).set_index("mode")
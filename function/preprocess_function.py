@@ -1,292 +1,231 @@
 from import_libraries.libraries import  *
 from function.NN import * 
 from function.function_for_MT5 import *
+from function.indicator_registry import default_registry, BASE_COLUMNS
+from function.pipeline import own, views_enabled, drop_incomplete_rows
+from function.rolling import ExtremaIndex
+import hashlib
+import time
+
+# Indicator family -> method of Preprocessing_stock_data, in the column order of `all_`
+FEATURE_FAMILIES = {
+    "pattern": "add_indicators_pattern_recognition_functions",
+    "overlap": "calculate_overlap_studies",
+    "math_operator": "math_operator_functions",
+    "math_transform": "math_transform_functions",
+    "momentum": "momentum_indicator_functions",
+    "statistic": "statistic_functions",
+}
+
 # Ta-Lib
 class Preprocessing_stock_data:
     """
     A class to preprocess stock data by applying various technical indicators and mathematical transformations.
     """
-    def __init__ (self, data: pd.DataFrame, periods: list[int] = None):
+    def __init__ (self, data: pd.DataFrame, periods: list[int] = None, backend=None):
         """
         Initializes the Preprocessing_stock_data class.
 
         Args:
             data (pd.DataFrame): Input data to be processed.
             periods (list, optional): List of periods for calculations. Defaults to None.
+            backend (module, optional): Indicator implementations, e.g. `function.numpy_backend`. Defaults to TA-Lib.
 
         This function initializes the Preprocessing_stock_data class and sets the dataframe, columns, and periods to be used for processing.
         """
-        self.df = data.copy()
-        self.open = data["Open"].copy()
-        self.high = data["High"].copy()
-        self.low = data["Low"].copy()
-        self.close = data["Close"].copy()
-        self.volume = data["Volume"].copy()
-        self.date = data["Date"].copy()
+        self.df = own(data)
+        self.open = own(data["Open"])
+        self.high = own(data["High"])
+        self.low = own(data["Low"])
+        self.close = own(data["Close"])
+        self.volume = own(data["Volume"])
+        self.date = own(data["Date"])
         
         self.periods = periods if periods else [23,115,220]
+        self.registry = default_registry(self.periods)
+        self.backend = backend
 
-    def add_indicators_pattern_recognition_functions(self):
+    def add_indicators_pattern_recognition_functions(self, as_columns: bool = False):
         """
         Adds pattern recognition indicators to the dataframe.
 
+        Args:
+            as_columns (bool, optional): Return only the indicator columns as a dict of Series. Defaults to False.
+
         Returns:
             pd.DataFrame: Dataframe with added pattern recognition indicators.
 
         This function creates copies of the input data and adds pattern recognition indicators to the dataframe.
         """
-        df = pd.DataFrame()
-        df["Open"] =  self.open
-        df["High"] = self.high
-        df["Low"] = self.low
-        df["Close"] = self.close
-        df["Volume"] = self.volume
-        df["Date"] = self.date
-        
-
-        df["CDL2CROWS"] = tl.CDL2CROWS(self.open, self.high, self.low, self.close)
-        df["CDL3BLACKCROWS"] = tl.CDL3BLACKCROWS(self.open, self.high, self.low, self.close)
-        df["CDL3INSIDE"] = tl.CDL3INSIDE(self.open, self.high, self.low, self.close)
-        df["CDL3LINESTRIKE"] = tl.CDL3LINESTRIKE(self.open, self.high, self.low, self.close)
-        df["CDL3OUTSIDE"] = tl.CDL3OUTSIDE(self.open, self.high, self.low, self.close)
-        df["CDL3STARSINSOUTH"] = tl.CDL3STARSINSOUTH(self.open, self.high, self.low, self.close)
-        df["CDL3WHITESOLDIERS"] = tl.CDL3WHITESOLDIERS(self.open, self.high, self.low, self.close)
-        df["CDLABANDONEDBABY"] = tl.CDLABANDONEDBABY(self.open, self.high, self.low, self.close)
-        df["CDLADVANCEBLOCK"] = tl.CDLADVANCEBLOCK(self.open, self.high, self.low, self.close)
-        df["CDLBELTHOLD"] = tl.CDLBELTHOLD(self.open, self.high, self.low, self.close)
-        df["CDLBREAKAWAY"] = tl.CDLBREAKAWAY(self.open, self.high, self.low, self.close)
-        df["CDLCLOSINGMARUBOZU"] = tl.CDLCLOSINGMARUBOZU(self.open, self.high, self.low, self.close)
-        df["CDLCONCEALBABYSWALL"] = tl.CDLCONCEALBABYSWALL(self.open, self.high, self.low, self.close)
-        df["CDLCOUNTERATTACK"] = tl.CDLCOUNTERATTACK(self.open, self.high, self.low, self.close)
-        df["CDLDARKCLOUDCOVER"] = tl.CDLDARKCLOUDCOVER(self.open, self.high, self.low, self.close)
-        df["CDLDOJI"] = tl.CDLDOJI(self.open, self.high, self.low, self.close)
-        df["CDLDOJISTAR"] = tl.CDLDOJISTAR(self.open, self.high, self.low, self.close)
-        df["CDLDRAGONFLYDOJI"] = tl.CDLDRAGONFLYDOJI(self.open, self.high, self.low, self.close)
-        df["CDLENGULFING"] = tl.CDLENGULFING(self.open, self.high, self.low, self.close)
-        df["CDLEVENINGDOJISTAR"] = tl.CDLEVENINGDOJISTAR(self.open, self.high, self.low, self.close, penetration=0)
-        df["CDLEVENINGSTAR"] = tl.CDLEVENINGSTAR(self.open, self.high, self.low, self.close, penetration=0)
-        df["CDLGAPSIDESIDEWHITE"] = tl.CDLGAPSIDESIDEWHITE(self.open, self.high, self.low, self.close)
-        df["CDLGRAVESTONEDOJI"] = tl.CDLGRAVESTONEDOJI(self.open, self.high, self.low, self.close)
-        df["CDLHAMMER"] = tl.CDLHAMMER(self.open, self.high, self.low, self.close)
-        df["CDLHANGINGMAN"] = tl.CDLHANGINGMAN(self.open, self.high, self.low, self.close)
-        df["CDLHARAMI"] = tl.CDLHARAMI(self.open, self.high, self.low, self.close)
-        df["CDLHARAMICROSS"] = tl.CDLHARAMICROSS(self.open, self.high, self.low, self.close)
-        df["CDLHIGHWAVE"] = tl.CDLHIGHWAVE(self.open, self.high, self.low, self.close)
-        df["CDLHIKKAKE"] = tl.CDLHIKKAKE(self.open, self.high, self.low, self.close)
-        df["CDLHIKKAKEMOD"] = tl.CDLHIKKAKEMOD(self.open, self.high, self.low, self.close)
-        df["CDLHOMINGPIGEON"] = tl.CDLHOMINGPIGEON(self.open, self.high, self.low, self.close)
-        df["CDLIDENTICAL3CROWS"] = tl.CDLIDENTICAL3CROWS(self.open, self.high, self.low, self.close)
-        df["CDLINNECK"] = tl.CDLINNECK(self.open, self.high, self.low, self.close)
-        df["CDLINVERTEDHAMMER"] = tl.CDLINVERTEDHAMMER(self.open, self.high, self.low, self.close)
-        df["CDLKICKING"] = tl.CDLKICKING(self.open, self.high, self.low, self.close)
-        df["CDLKICKINGBYLENGTH"] = tl.CDLKICKINGBYLENGTH(self.open, self.high, self.low, self.close)
-        df["CDLLADDERBOTTOM"] = tl.CDLLADDERBOTTOM(self.open, self.high, self.low, self.close)
-        df["CDLLONGLEGGEDDOJI"] = tl.CDLLONGLEGGEDDOJI(self.open, self.high, self.low, self.close)
-        df["CDLLONGLINE"] = tl.CDLLONGLINE(self.open, self.high, self.low, self.close)
-        df["CDLMARUBOZU"] = tl.CDLMARUBOZU(self.open, self.high, self.low, self.close)
-        df["CDLMATCHINGLOW"] = tl.CDLMATCHINGLOW(self.open, self.high, self.low, self.close)
-        df["CDLMATHOLD"] = tl.CDLMATHOLD(self.open, self.high, self.low, self.close, penetration=0)
-        df["CDLMORNINGDOJISTAR"] = tl.CDLMORNINGDOJISTAR(self.open, self.high, self.low, self.close, penetration=0)
-        df["CDLMORNINGSTAR"] = tl.CDLMORNINGSTAR(self.open, self.high, self.low, self.close, penetration=0)
-        df["CDLONNECK"] = tl.CDLONNECK(self.open, self.high, self.low, self.close)
-        df["CDLPIERCING"] = tl.CDLPIERCING(self.open, self.high, self.low, self.close)
-        df["CDLRICKSHAWMAN"] = tl.CDLRICKSHAWMAN(self.open, self.high, self.low, self.close)
-        df["CDLRISEFALL3METHODS"] = tl.CDLRISEFALL3METHODS(self.open, self.high, self.low, self.close)
-        df["CDLSEPARATINGLINES"] = tl.CDLSEPARATINGLINES(self.open, self.high, self.low, self.close)
-        df["CDLSHOOTINGSTAR"] = tl.CDLSHOOTINGSTAR(self.open, self.high, self.low, self.close)
-        df["CDLSHORTLINE"] = tl.CDLSHORTLINE(self.open, self.high, self.low, self.close)
-        df["CDLSPINNINGTOP"] = tl.CDLSPINNINGTOP(self.open, self.high, self.low, self.close)
-        df["CDLSTALLEDPATTERN"] = tl.CDLSTALLEDPATTERN(self.open, self.high, self.low, self.close)
-        df["CDLSTICKSANDWICH"] = tl.CDLSTICKSANDWICH(self.open, self.high, self.low, self.close)
-        df["CDLTAKURI"] = tl.CDLTAKURI(self.open, self.high, self.low, self.close)
-        df["CDLTASUKIGAP"] = tl.CDLTASUKIGAP(self.open, self.high, self.low, self.close)
-        df["CDLTHRUSTING"] = tl.CDLTHRUSTING(self.open, self.high, self.low, self.close)
-        df["CDLTRISTAR"] = tl.CDLTRISTAR(self.open, self.high, self.low, self.close)
-        df["CDLUNIQUE3RIVER"] = tl.CDLUNIQUE3RIVER(self.open, self.high, self.low, self.close)
-        df["CDLUPSIDEGAP2CROWS"] = tl.CDLUPSIDEGAP2CROWS(self.open, self.high, self.low, self.close)
-        df["CDLXSIDEGAP3METHODS"] = tl.CDLXSIDEGAP3METHODS(self.open, self.high, self.low, self.close)
-
-        return df.fillna(0)
+        df = self.compute_columns(self.registry.names("pattern"))
+        return df if as_columns else self._family_frame(df)
     
-    def calculate_overlap_studies(self):
+    def calculate_overlap_studies(self, as_columns: bool = False):
         """
         Calculates various overlap studies for the input data.
 
+        Args:
+            as_columns (bool, optional): Return only the indicator columns as a dict of Series. Defaults to False.
+
         Returns:
             pd.DataFrame: Dataframe with calculated overlap studies.
 
         This function calculates various overlap studies based on the provided periods.
         """
-        df = pd.DataFrame()
-        df["Open"] =  self.open
-        df["High"] = self.high
-        df["Low"] = self.low
-        df["Close"] = self.close
-        df["Volume"] = self.volume
-        df["Date"] = self.date
+        df = self.compute_columns(self.registry.names("overlap"))
+        return df if as_columns else self._family_frame(df)
         
-        for i in self.periods: 
-            df["DEMA"+str(i)] = tl.DEMA(self.close, timeperiod=i)
-            df["EMA"+str(i)] = tl.EMA(self.close, timeperiod=i)
-            df["KAMA"+str(i)] = tl.KAMA(self.close, timeperiod=i)
-            df["MIDPOINT"+str(i)] = tl.MIDPOINT(self.close, timeperiod=i)
-            df["SMA"+str(i)] = tl.SMA(self.close, timeperiod=i)
-            df["TRIMA"+str(i)] = tl.TRIMA(self.close, timeperiod=i)
-            df["WMA"+str(i)] = tl.WMA(self.close, timeperiod=i)
-            df["T3"+str(i)] = tl.T3(self.close, timeperiod=i, vfactor=0)
-            df["TEMA"+str(i)] = tl.TEMA(self.close, timeperiod=i)
-            df["MA"+str(i)] = tl.MA(self.close, timeperiod=i, matype=0)
-            df["HT_TRENDLINE"+str(i)] = tl.HT_TRENDLINE(self.close)
-    
-        return df.fillna(0)
-        
-    def math_transform_functions(self):
+    def math_transform_functions(self, as_columns: bool = False):
         """
         Applies various mathematical transformation functions to the input data.
 
+        Args:
+            as_columns (bool, optional): Return only the indicator columns as a dict of Series. Defaults to False.
+
         Returns:
             pd.DataFrame: Dataframe with applied mathematical transformation functions.
 
         This function applies various mathematical transformation functions to the 'close' column.
         """
-        df = pd.DataFrame()
-        df["Open"] =  self.open
-        df["High"] = self.high
-        df["Low"] = self.low
-        df["Close"] = self.close
-        df["Volume"] = self.volume
-        df["Date"] = self.date
-        
-        df["ACOS"] = tl.ACOS(self.close)
-        df["ASIN"] = tl.ASIN(self.close)
-        df["ATAN"] = tl.ATAN(self.close)
-        df["CEIL"] = tl.CEIL(self.close)
-        df["COS"] = tl.COS(self.close)
-        # df["COSH"] = tl.COSH(self.close)
-        # df["EXP"] = tl.EXP(self.close)
-        df["FLOOR"] = tl.FLOOR(self.close)
-        df["LN"] = tl.LN(self.close)
-        df["LOG10"] = tl.LOG10(self.close)
-        df["SIN"] = tl.SIN(self.close)
-        # df["SINH"] = tl.SINH(self.close)
-        df["SQRT"] = tl.SQRT(self.close)
-        df["TAN"] = tl.TAN(self.close)
-        df["TANH"] = tl.TANH(self.close)
-    
-        return df.fillna(0)
+        df = self.compute_columns(self.registry.names("math_transform"))
+        return df if as_columns else self._family_frame(df)
     
-    def momentum_indicator_functions(self):
+    def momentum_indicator_functions(self, as_columns: bool = False):
         """
         Applies various momentum indicator functions to the input data.
 
+        Args:
+            as_columns (bool, optional): Return only the indicator columns as a dict of Series. Defaults to False.
+
         Returns:
             pd.DataFrame: Dataframe with applied momentum indicator functions.
 
         This function applies various momentum indicator functions to the columns such as 'open', 'high', 'low', 'close', and 'real_volume'.
         """
-        df = pd.DataFrame()
-        df["Open"] =  self.open
-        df["High"] = self.high
-        df["Low"] = self.low
-        df["Close"] = self.close
-        df["Volume"] = self.volume
-        df["Date"] = self.date
-        
-        for i in self.periods:
-            df["ADX" + str(i)] = tl.ADX(self.high, self.low, self.close, timeperiod=i)
-            df["ADXR" + str(i)] = tl.ADXR(self.high, self.low, self.close, timeperiod=i)
-            df["AROONOSC" + str(i)] = tl.AROONOSC(self.high, self.low, timeperiod=i)
-            df["CCI" + str(i)] = tl.CCI(self.high, self.low, self.close, timeperiod=i)
-            df["CMO" + str(i)] = tl.CMO(self.close, timeperiod=i)
-            df["DX" + str(i)] = tl.DX(self.high, self.low, self.close, timeperiod=i)
-            df["MFI" + str(i)] = tl.MFI(self.high, self.low, self.close, self.volume, timeperiod=i)
-            df["MINUS_DI" + str(i)] = tl.MINUS_DI(self.high, self.low, self.close, timeperiod=i)
-            df["MINUS_DM" + str(i)] = tl.MINUS_DM(self.high, self.low, timeperiod=i)
-            df["MOM" + str(i)] = tl.MOM(self.close, timeperiod=i)
-            df["PLUS_DI" + str(i)] = tl.PLUS_DI(self.high, self.low, self.close, timeperiod=i)
-            df["PLUS_DM" + str(i)] = tl.PLUS_DM(self.high, self.low, timeperiod=i)
-            df["ROC" + str(i)] = tl.ROC(self.close, timeperiod=i)
-            df["ROCP" + str(i)] = tl.ROCP(self.close, timeperiod=i)
-            df["ROCR" + str(i)] = tl.ROCR(self.close, timeperiod=i)
-            df["ROCR100" + str(i)] = tl.ROCR100(self.close, timeperiod=i)
-            df["RSI" + str(i)] = tl.RSI(self.close, timeperiod=i)
-            df["WILLR" + str(i)] = tl.WILLR(self.high, self.low, self.close, timeperiod=i)
-            df["TRIX" + str(i)] = tl.TRIX(self.close, timeperiod=i)
-
-        df["APO"] = tl.APO(self.close, fastperiod=12, slowperiod=26, matype=0)
-        df["PPO"] = tl.PPO(self.close, fastperiod=12, slowperiod=26, matype=0)
-        df["real"] = tl.ULTOSC(self.high, self.low, self.close, timeperiod1=7, timeperiod2=14, timeperiod3=28)
-        df["real"] = tl.ULTOSC(self.high, self.low, self.close, timeperiod1=7, timeperiod2=14, timeperiod3=28)
-        
-        return df.fillna(0)
+        df = self.compute_columns(self.registry.names("momentum"))
+        return df if as_columns else self._family_frame(df)
      
-    def statistic_functions(self):
+    def statistic_functions(self, as_columns: bool = False):
         """
         Applies various statistical functions to the input data.
 
+        Args:
+            as_columns (bool, optional): Return only the indicator columns as a dict of Series. Defaults to False.
+
         Returns:
             pd.DataFrame: Dataframe with applied statistical functions.
 
         This function applies various statistical functions to the columns such as 'high', 'low', and 'close'.
         """
-        df = pd.DataFrame()
-        df["Open"] =  self.open
-        df["High"] = self.high
-        df["Low"] = self.low
-        df["Close"] = self.close
-        df["Volume"] = self.volume
-        df["Date"] = self.date
-        
-        for i in self.periods:
-            df["BETA" + str(i)] = tl.BETA(self.high, self.low, timeperiod=i)
-            df["CORREL" + str(i)] = tl.CORREL(self.high, self.low, timeperiod=i)
-            df["LINEARREG" + str(i)] = tl.LINEARREG(self.close, timeperiod=i)
-            df["LINEARREG_ANGLE" + str(i)] = tl.LINEARREG_ANGLE(self.close, timeperiod=i)
-            df["LINEARREG_INTERCEPT" + str(i)] = tl.LINEARREG_INTERCEPT(self.close, timeperiod=i)
-            df["LINEARREG_SLOPE" + str(i)] = tl.LINEARREG_SLOPE(self.close, timeperiod=i)
-            df["STDDEV" + str(i)] = tl.STDDEV(self.close, timeperiod=i, nbdev=1)
-            df["TSF" + str(i)] = tl.TSF(self.close, timeperiod=i)
-            df["VAR" + str(i)] = tl.VAR(self.close, timeperiod=i, nbdev=1)
-            df["median" + str(i)] = self.close.rolling(window=i, min_periods=1).median()
-            df["mode" + str(i)] = self.close.rolling(window=i, min_periods=1).apply(lambda x: x.mode()[0])
-            df["std" + str(i)] = df["median" + str(i)].rolling(window=i, min_periods=1).std()
-        
-        return df.fillna(0)
+        df = self.compute_columns(self.registry.names("statistic"))
+        return df if as_columns else self._family_frame(df)
     
-    def math_operator_functions(self):
+    def math_operator_functions(self, as_columns: bool = False):
         """
         Applies various mathematical operator functions to the input data.
     
+        Args:
+            as_columns (bool, optional): Return only the indicator columns as a dict of Series. Defaults to False.
+
         Returns:
             pd.DataFrame: Dataframe with applied mathematical operator functions.
     
         This function creates copies of the input data and applies various mathematical operator functions to the columns such as 'high', 'low', and 'close'.
         """
-        
-        df = pd.DataFrame()
-        df["Open"] =  self.open
-        df["High"] = self.high
-        df["Low"] = self.low
-        df["Close"] = self.close
-        df["Volume"] = self.volume
-        df["Date"] = self.date
-        
-        for i in self.periods:
-            df["MAX"+str(i)] = tl.MAX(self.close, timeperiod=i)
-            df["MAXINDEX"+str(i)] = tl.MAXINDEX(self.close, timeperiod=i)
-            df["MIN"+str(i)] = tl.MIN(self.close, timeperiod=i)
-            df["MININDEX"+str(i)] = tl.MININDEX(self.close, timeperiod=i)
-            df["SUM"+str(i)] = tl.SUM(self.close, timeperiod=i)
-
-        # min, max = MINMAX(close, timeperiod=30)
-        # minidx, maxidx = MINMAXINDEX(close, timeperiod=30)
-    
-        df["ADD"] = tl.ADD(self.high, self.low)
-        df["DIV"] = tl.DIV(self.high, self.low)
-        df["SUB"] = tl.SUB(self.high, self.low)
-    
+        df = self.compute_columns(self.registry.names("math_operator"))
+        return df if as_columns else self._family_frame(df)
+
+    def compute_columns(self, names: list) -> dict:
+        """
+        Computes features of the registry and the features they depend on.
+
+        Returns:
+            dict: Feature name -> Series, in the order of `names`.
+        """
+        inputs = {"Open": self.open, "High": self.high, "Low": self.low, "Close": self.close, "Volume": self.volume}
+        return self.registry.compute(inputs, names, self.backend)
+
+    def features(self, names: list) -> pd.DataFrame:
+        """
+        Computes only the listed features, e.g. the columns kept by `GradientRFE`.
+
+        Args:
+            names (list): Feature names of `self.registry`. Base columns in the list are skipped.
+
+        Returns:
+            pd.DataFrame: Base columns and the listed features, NaN filled with 0 as in `all_`.
+        """
+        return self._family_frame(self.compute_columns([name for name in names if name not in BASE_COLUMNS]))
+
+    def _base_columns(self) -> dict:
+        return {"Open": self.open, "High": self.high, "Low": self.low,
+                "Close": self.close, "Volume": self.volume, "Date": self.date}
+
+    def _family_frame(self, columns: dict) -> pd.DataFrame:
+        """
+        Returns the base columns and the columns of one indicator family as a DataFrame, NaN filled with 0.
+        """
+        df = pd.DataFrame(self._base_columns(), copy=not views_enabled())
+        for name, values in columns.items():
+            df[name] = values
         return df.fillna(0)
 
+    def feature_matrix(self) -> pd.DataFrame:
+        """
+        Builds the same features as `all_` in a single pass.
+
+        Every family returns its columns as arrays, which are written into one
+        preallocated block per dtype (float64, and int32 for the candlestick
+        patterns), so the base columns are attached once instead of being merged
+        six times. Time spent per family is stored in `self.timings`.
+
+        Unlike the merge of `all_`, rows with duplicate base columns are not multiplied.
+
+        Returns:
+            pd.DataFrame: Base columns followed by the columns of every family in `all_` order.
+        """
+        self.timings = {}
+        families = {}
+        for family, method in FEATURE_FAMILIES.items():
+            start = time.perf_counter()
+            families[family] = getattr(self, method)(as_columns=True)
+            self.timings[family] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        frame = self.assemble_features(families)
+        self.timings["assemble"] = time.perf_counter() - start
+        return frame
+
+    def assemble_features(self, families: dict) -> pd.DataFrame:
+        """
+        Writes the base columns and the columns of every family into preallocated blocks.
+
+        Args:
+            families (dict): Family name -> dict of indicator columns, in column order.
+
+        Returns:
+            pd.DataFrame: The feature matrix, NaN filled with 0.
+        """
+        columns = {name: values for name, values in self._base_columns().items() if name != "Date"}
+        for family_columns in families.values():
+            columns.update(family_columns)
+
+        arrays = {name: np.asarray(values) for name, values in columns.items()}
+        blocks = {}
+        for dtype in (np.float64, np.int32):
+            names = [name for name, values in arrays.items() if (values.dtype == np.int32) == (dtype == np.int32)]
+            block = np.empty((len(self.close), len(names)), dtype=dtype, order='F')
+            for j, name in enumerate(names):
+                block[:, j] = arrays[name]
+            if dtype == np.float64:
+                block[np.isnan(block)] = 0
+            blocks.update({name: block[:, j] for j, name in enumerate(names)})
+
+        data = {name: blocks[name] for name in arrays}
+        data["Date"] = self.date.to_numpy()
+        order = list(self._base_columns()) + [name for family_columns in families.values() for name in family_columns]
+        return pd.DataFrame({name: data[name] for name in order}, copy=False)
+
     def all_ (self):
 
         data_indicators_pattern  =  self.add_indicators_pattern_recognition_functions()
@@ -321,7 +260,7 @@ class Preprocessing_stock_data:
 
     
 # manual strategy    
-def define_level(data: pd.DataFrame, window_size: int = 14, bias: int = 1) -> pd.DataFrame:
+def define_level(data: pd.DataFrame, window_size: int = 14, bias: int = 1, extrema: ExtremaIndex = None) -> pd.DataFrame:
     """
     Dodaje wartości maksimum i minimum przesuwające się do ramki danych na podstawie określonych parametrów.
 
@@ -329,11 +268,12 @@ def define_level(data: pd.DataFrame, window_size: int = 14, bias: int = 1) -> pd
     data (pd.DataFrame): Ramka danych wejściowych.
     window_size (list): Rozmiar okna używany do obliczania wartości maksimum i minimum. Domyślnie ustawiony na 14.
     bias (int): Wartość przesunięcia dla obliczeń. Domyślnie ustawiony na 1.
+    extrema (ExtremaIndex): Indeks ekstremów zbudowany raz dla `data` (ExtremaIndex.from_frame). Domyślnie None.
 
     Zwraca:
     pd.DataFrame: Zaktualizowana ramka danych zawierająca wartości maksimum i minimum.
     """
-    data = data.copy()
+    data = own(data)
     
     if not isinstance(window_size, int) or not isinstance(bias, int) or window_size <= 0 or bias < 0:
         window_size = ceil(abs(window_size))
@@ -343,16 +283,17 @@ def define_level(data: pd.DataFrame, window_size: int = 14, bias: int = 1) -> pd
 
     
     # Obliczenie wartości maksimum i minimum za pomocą przesuwającego się okna
-    data.loc[:, f'RollingMax'] = data['High'].rolling(window=window_size).max().shift(bias)
-    data.loc[:, f'RollingMin'] = data['Low'].rolling(window=window_size).min().shift(bias)
-
-    # Usunięcie wierszy zawierających wartości NaN
-    data.dropna(axis=0, inplace=True)
-    
-    # Zresetowanie indeksu ramki danych
-    data.reset_index(drop=True, inplace=True)
-    
-    return data
+    if extrema is not None and window_size >= 1:
+        if len(extrema) != len(data):
+            raise ValueError(f"ExtremaIndex has {len(extrema)} rows, the data {len(data)}.")
+        data.loc[:, f'RollingMax'] = pd.Series(extrema.rolling_max(window_size), index=data.index).shift(bias)
+        data.loc[:, f'RollingMin'] = pd.Series(extrema.rolling_min(window_size), index=data.index).shift(bias)
+    else:
+        data.loc[:, f'RollingMax'] = data['High'].rolling(window=window_size).max().shift(bias)
+        data.loc[:, f'RollingMin'] = data['Low'].rolling(window=window_size).min().shift(bias)
+
+    # Usunięcie wierszy zawierających wartości NaN i zresetowanie indeksu ramki danych
+    return drop_incomplete_rows(data)
 
     
 def rebound_analysis(data):
@@ -388,75 +329,226 @@ def rebound_analysis(data):
     data["Signal"] = data["Signal"].replace("0", np.nan).ffill()
     data = data.drop(["SELL","Buy"], axis=1)
 
-    # Usunięcie wierszy zawierających wartości NaN
-    data.dropna(axis=0, inplace=True)
-    
-    # Zresetowanie indeksu ramki danych
-    data.reset_index(drop=True, inplace=True)
-
-    return data
+    # Usunięcie wierszy zawierających wartości NaN i zresetowanie indeksu ramki danych
+    return drop_incomplete_rows(data)
 
     
 # calc
+# One record per closed trade of `trade_ledger`: positions of the entry and exit rows, side (1 buy, -1 sell), price change
+TRADE_DTYPE = np.dtype([("entry", np.int64), ("exit", np.int64), ("side", np.int8), ("pnl", np.float64)])
+
+
+def _ledger(data: pd.DataFrame):
+    # Trades between consecutive signal runs, and the accumulated column of `calculate_accumulated_price_changes`
+    signal = data['Signal'].to_numpy()
+    close = data['Close'].to_numpy(dtype=np.float64)
+    starts = np.flatnonzero(data['Signal'].ne(data['Signal'].shift()).to_numpy())
+
+    entry, exit_ = starts[:-1], starts[1:]
+    sell_to_buy = (signal[entry] == 'sell') & (signal[exit_] == 'buy')
+    buy_to_sell = (signal[entry] == 'buy') & (signal[exit_] == 'sell')
+    closed = sell_to_buy | buy_to_sell
+
+    trades = np.empty(int(closed.sum()), dtype=TRADE_DTYPE)
+    trades["entry"] = entry[closed]
+    trades["exit"] = exit_[closed]
+    trades["side"] = np.where(buy_to_sell[closed], 1, -1)
+    # A sell gains when the price falls, a buy when it rises
+    trades["pnl"] = (close[trades["exit"]] - close[trades["entry"]]) * trades["side"]
+
+    # The change is booked on the row before the exit, the last row of the trade
+    accumulated = np.zeros(len(data))
+    accumulated[trades["exit"] - 1] = trades["pnl"]
+    return trades, accumulated
+
+
+def trade_ledger(data: pd.DataFrame) -> np.ndarray:
+    """
+    Trades of the signals in `data`, as scored by `calculate_accumulated_price_changes`.
+
+    A trade opens at the first row of a 'sell' or 'buy' run and closes at the
+    first row of the next run when it has the opposite signal. Runs next to a
+    "3" (buy and sell) signal do not trade.
+
+    Args:
+        data (pd.DataFrame): Output of `rebound_analysis`, with 'Signal' and 'Close' columns.
+
+    Returns:
+        np.ndarray: Structured array of `TRADE_DTYPE` (entry, exit, side, pnl), entry and exit as row positions.
+    """
+    return _ledger(data)[0]
+
+
 def calculate_accumulated_price_changes(data, return_data=False, symbol = None):    
     """
     Calculates the accumulated price changes based on buy and sell signals in the given data.
 
     Args:
         data (pd.DataFrame): The input DataFrame.
-        princ (bool, optional): A boolean value indicating whether to return separate accumulated changes for buy and sell. Defaults to False.
+        return_data (bool, optional): Whether to return the data with the 'AccumulatedPriceChange' column. Defaults to False.
 
     Returns:
-        float or tuple: The accumulated price changes. If princ is True, the function returns separate changes for buy and sell.
+        float or pd.DataFrame: The accumulated price changes, or the data with the change of every trade on its last row.
 
     This function calculates the accumulated price changes based on buy and sell signals in the provided DataFrame.
-    It returns the total accumulated changes. If princ is True, the function returns separate changes for buy and sell.
+    The trades are found with array operations by `trade_ledger`, and the changes
+    are summed over the sell rows and over the buy rows.
     """
-    df = data.copy()
-    signal_changes = df['Signal'].ne(df['Signal'].shift())
-    
-    indices = df.index[signal_changes].tolist()
-    
-    df['AccumulatedPriceChange'] = 0.0
-    
-    
-    for i in range(0, len(indices) - 1):
-        accumulated_change = 0.0
-        if df.loc[indices[i], 'Signal'] == 'sell' and df.loc[indices[i + 1], 'Signal'] == 'buy':
-            start_sell_index = indices[i]
-            end_buy_index = indices[i + 1]
-    
-            start_sell_price = df.loc[start_sell_index, 'Close']
-            end_buy_price = df.loc[end_buy_index, 'Close']
-    
-            price_change_sell_to_buy = start_sell_price - end_buy_price
-    
-            accumulated_change += price_change_sell_to_buy
-            df.loc[indices[i + 1], 'AccumulatedPriceChange'] = accumulated_change
-    
-        elif df.loc[indices[i], 'Signal'] == 'buy' and df.loc[indices[i + 1], 'Signal'] == 'sell':
-            start_buy_index = indices[i]
-            end_sell_index = indices[i + 1]
-    
-            start_buy_price = df.loc[start_buy_index, 'Close']
-            end_sell_price = df.loc[end_sell_index, 'Close']
-    
-            price_change_buy_to_sell = end_sell_price - start_buy_price
-    
-            accumulated_change += price_change_buy_to_sell
-            df.loc[indices[i + 1], 'AccumulatedPriceChange'] = accumulated_change
-    
-    df["AccumulatedPriceChange"] = df["AccumulatedPriceChange"].shift(-1).fillna(0)
-    all_sell = df.loc[df["Signal"] == "sell", "AccumulatedPriceChange"].sum()
-    all_buy = df.loc[df["Signal"] == "buy", "AccumulatedPriceChange"].sum()
+    df = own(data)
+    trades, accumulated = _ledger(df)
+    df['AccumulatedPriceChange'] = accumulated
 
     if return_data:
         return df
 
+    signal = df['Signal'].to_numpy()
+    all_sell = accumulated[signal == 'sell'].sum()
+    all_buy = accumulated[signal == 'buy'].sum()
     return all_buy + all_sell
 
 
-def calculate_min_capital(data: pd.DataFrame, symbol: str, return_data: bool = False) -> float:
+# int8 codes of the signals in array form, 3 is the "3" (buy and sell) signal of `rebound_analysis`
+NO_SIGNAL, SELL, BUY, BOTH = 0, 1, 2, 3
+SIGNAL_NAMES = {SELL: "sell", BUY: "buy", BOTH: "3"}
+
+
+def encode_signals(signal) -> np.ndarray:
+    """
+    Converts a 'Signal' column into int8 codes: 1 sell, 2 buy, 3 any other value.
+    """
+    signal = np.asarray(signal, dtype=object)
+    return np.where(signal == "sell", SELL, np.where(signal == "buy", BUY, BOTH)).astype(np.int8)
+
+
+def capital_costs(info) -> dict:
+    """
+    Position portion and swaps of `calculate_min_capital` from a symbol specification.
+
+    Args:
+        info: Result of `symbol_info` (volume_min, ask, bid, swap_short, swap_long).
+
+    Returns:
+        dict: portion, swap_short and swap_long, the cost arguments of `simulate_capital`.
+    """
+    position_volume = info.volume_min
+    margin_requirement_percentage = 0.05
+    return {
+        "portion": (position_volume * ((info.ask + info.bid) / 2) * margin_requirement_percentage) / 100,
+        "swap_short": (position_volume * info.bid * info.swap_short) / 100,
+        "swap_long": (position_volume * info.ask * info.swap_long) / 100,
+    }
+
+
+def _simulate_row(signals: list, close: list, portion, swap_short, swap_long, capital, commission):
+    # One row of `simulate_capital` on Python floats, faster than array steps of a single element
+    equity = [np.nan] * len(signals)
+    minimum = np.nan
+    capital_now = float(capital)
+    signal_now = None
+    for i, code in enumerate(signals):
+        if code == NO_SIGNAL:
+            continue
+        if signal_now is None:
+            signal_now, price_now = code, close[i]
+        elif code == signal_now:
+            capital_now -= swap_short if signal_now == SELL else swap_long
+        else:
+            change_now = (close[i] - price_now) / price_now
+            total = capital_now * portion
+            capital_now -= total
+            open_commission = total * commission
+            total *= (1 + change_now) if signal_now == BUY else (1 - change_now)
+            close_commission = total * commission
+            total -= open_commission + close_commission
+            capital_now += total
+            signal_now, price_now = code, close[i]
+        equity[i] = capital_now
+        minimum = capital_now if not capital_now >= minimum else minimum
+    return minimum, equity
+
+
+def simulate_capital(signals, close, portion: float, swap_short: float, swap_long: float,
+                     capital: float = 1_000.0, commission: float = 0.0005, curves: bool = True):
+    """
+    Capital of the strategy of `calculate_min_capital` for many signal rows at once.
+
+    Every row is a separate backtest over the same time axis. It starts at its
+    first non-zero signal, with the initial capital, and skips positions with
+    a 0 signal, so rows of different parameter sets can start at different
+    bars. The loop runs over time and handles all rows in every step, with the
+    same arithmetic as `calculate_min_capital`, so the values are equal.
+
+    Args:
+        signals (array-like): int8 codes (see `encode_signals`), one row per signal set, or a single row.
+        close (array-like): Close prices of the time axis, shared (1-D) or per row (2-D).
+        portion, swap_short, swap_long (float): Costs, see `capital_costs`.
+        capital (float, optional): Initial capital. Defaults to 1_000.0.
+        commission (float, optional): Commission of opening and of closing a position. Defaults to 0.0005.
+        curves (bool, optional): Return the capital of every bar. Defaults to True.
+
+    Returns:
+        tuple: Minimum capital per row (NaN for rows without signals) and, with `curves`,
+        the capital matrix (rows x bars, NaN at skipped positions), else None.
+    """
+    signals = np.atleast_2d(np.asarray(signals, dtype=np.int8))
+    rows, n = signals.shape
+    close = np.broadcast_to(np.asarray(close, dtype=np.float64), (rows, n))
+    if rows == 1:
+        minimum, equity = _simulate_row(signals[0].tolist(), close[0].tolist(), portion, swap_short, swap_long,
+                                        capital, commission)
+        return np.array([minimum]), np.array([equity]) if curves else None
+
+    equity = np.full((rows, n), np.nan) if curves else None
+    minimum = np.full(rows, np.nan)
+    capital_now = np.full(rows, float(capital))
+    signal_now = np.zeros(rows, dtype=np.int8)
+    price_now = np.ones(rows)
+    started = np.zeros(rows, dtype=bool)
+
+    for i in range(n):
+        code = signals[:, i]
+        active = code != NO_SIGNAL
+        if not active.any():
+            continue
+        price = close[:, i]
+        step = active & started
+
+        first = active & ~started
+        if first.any():
+            signal_now[first] = code[first]
+            price_now[first] = price[first]
+            started |= first
+            minimum[first] = np.fmin(minimum[first], capital)
+            if curves:
+                equity[first, i] = capital
+        if not step.any():
+            continue
+
+        # Same signal: the position pays its swap
+        hold = step & (code == signal_now)
+        capital_now = np.where(hold, capital_now - np.where(signal_now == SELL, swap_short, swap_long), capital_now)
+
+        # New signal: the position is closed with its price change and commissions
+        trade = step & ~hold
+        if trade.any():
+            change_now = (price - price_now) / price_now
+            total = capital_now * portion
+            rest = capital_now - total
+            open_commission = total * commission
+            total = total * np.where(signal_now == BUY, 1 + change_now, 1 - change_now)
+            close_commission = total * commission
+            total = total - (open_commission + close_commission)
+            capital_now = np.where(trade, rest + total, capital_now)
+            signal_now = np.where(trade, code, signal_now)
+            price_now = np.where(trade, price, price_now)
+
+        minimum[step] = np.fmin(minimum[step], capital_now[step])
+        if curves:
+            equity[step, i] = capital_now[step]
+    return minimum, equity
+
+
+def calculate_min_capital(data: pd.DataFrame, symbol: str, return_data: bool = False, info=None) -> float:
     """
     Calculates the minimum capital required for a trading strategy based on the provided data.
 
@@ -464,76 +556,24 @@ def calculate_min_capital(data: pd.DataFrame, symbol: str, return_data: bool = F
     - data (pd.DataFrame): DataFrame with backtesting data, containing 'Signal' and 'Close' columns.
     - symbol (str): Symbol or instrument used in the trading strategy.
     - return_data (bool, optional): Flag to return the modified data. Default is False.
+    - info (optional): Symbol information used instead of `symbol_info(symbol)`, e.g. a snapshot
+      shared with worker processes. Default is None.
 
     Returns:
     - float: Minimum capital achieved during the backtest.
 
+    The capital curve is computed by `simulate_capital` and added to `data` as the 'Capital' column.
     """
     # Getting information about the symbol
-    info = symbol_info(symbol)
-
-    # Initial values
-    CAPITAL = 1_000.0  # Initial capital size
-    balance = [CAPITAL]
-    capital_now = CAPITAL
-    signal_now = data["Signal"][0]
-    price_now = data['Close'][0]
-    position_volume = info.volume_min
-    
-    # Parameters for calculating the capital portion and commission
-    margin_requirement_percentage = 0.05
-    PORTION = (position_volume * ((info.ask + info.bid) / 2) * margin_requirement_percentage) / 100
-    COMMISSION = 0.0005
-
-    # Calculation of swaps for short and long positions
-    swap_short = (position_volume * info.bid * info.swap_short) / 100
-    swap_long = (position_volume * info.ask * info.swap_long) / 100
-
-    # Iteration through backtesting data
-    for i in range(1, len(data)): 
-        if signal_now == data['Signal'][i]: 
-            # Handling swaps
-            if signal_now == "sell": 
-                swap = swap_short
-            else: 
-                swap = swap_long
-            capital_now -= swap
-            balance.append(capital_now)
-        else:
-            # Calculation of price change
-            change_now = (data['Close'][i] - price_now) / price_now
-            
-            # Handling buy operations
-            if signal_now == "buy": 
-                total = capital_now * PORTION 
-                capital_now -= total
-                open_commission = total * COMMISSION 
-                total *= (1 + change_now)
-                close_commission = total * COMMISSION 
-                total -= open_commission + close_commission 
-                capital_now += total
-                balance.append(capital_now)
-                
-                # Updating the current signal and price
-                signal_now = data['Signal'][i] 
-                price_now = data['Close'][i]
-            else: 
-                # Handling sell operations
-                total = capital_now * PORTION 
-                capital_now -= total 
-                open_commission = total * COMMISSION 
-                total *= (1 - change_now) 
-                close_commission = total * COMMISSION 
-                total -= open_commission + close_commission 
-                capital_now += total 
-                balance.append(capital_now)
-
-                # Updating the current signal and price
-                signal_now = data['Signal'][i] 
-                price_now = data['Close'][i]
-    
+    if info is None:
+        info = symbol_info(symbol)
+
+    # Capital after every bar
+    _, balance = simulate_capital(encode_signals(data["Signal"]), data["Close"].to_numpy(dtype=np.float64),
+                                  **capital_costs(info))
+
     # Adding the 'Capital' column to the data
-    data['Capital'] = pd.DataFrame(balance)
+    data['Capital'] = pd.DataFrame(balance[0])
 
     # Returning the modified data if the return_data flag is set
     if return_data:
@@ -566,9 +606,10 @@ def optimize_parameters(data, analysis, calculate, window_size_range,
     best_score = float('-inf')
     best_params = None
     return_data = None
+    extrema = ExtremaIndex.from_frame(data)
     for window_size in tqdm(range(*window_size_range)):
         for bias in range(*bias_range):
-            current_data = define_level(data, window_size, bias)
+            current_data = define_level(data, window_size, bias, extrema)
             rebound_data = analysis(current_data)
             current_score = calculate(rebound_data, symbol= symbol )
 
@@ -615,6 +656,7 @@ def cross_validate_on_periods(data, analysis, calculate, window_size_range,
     start = 0
     best_score = float('-inf')
     best_params = None
+    extrema = ExtremaIndex.from_frame(data)
 
     # Iterate through the range of window sizes using tqdm for progress visualization
     for window_size in tqdm(range(*window_size_range)):
@@ -632,7 +674,7 @@ def cross_validate_on_periods(data, analysis, calculate, window_size_range,
                 # print(start, start + step)
                 
                 # Transform the training data based on the current window size and bias
-                current_train_data = define_level(train_data, window_size, bias)
+                current_train_data = define_level(train_data, window_size, bias, extrema.slice(start, start + step))
                 
                 # Apply the analysis function to the transformed training data
                 rebound_train_data = analysis(current_train_data)
@@ -654,7 +696,7 @@ def cross_validate_on_periods(data, analysis, calculate, window_size_range,
                 best_score = average_score
                 best_params = {'window_size': window_size, 'bias': bias}
                 # Calculate the best data using the provided analysis and define_level functions
-                best_data = calculate(analysis(define_level(data, window_size, bias)))
+                best_data = calculate(analysis(define_level(data, window_size, bias, extrema)))
 
     # Print the best parameters and return the best data
     print(best_params)
@@ -707,6 +749,7 @@ class GeneticAlgorithm:
         self.window_sizes = window_sizes
         self.biases = biases
         self.best_individual = None
+        self.extrema = ExtremaIndex.from_frame(data)
 
         # Problem Definition
         # Define the problem as a maximization problem
@@ -797,7 +840,7 @@ class GeneticAlgorithm:
             float: The calculated score.
         """
         
-        current_data = define_level(self.data, params['window_size'], params['bias'])
+        current_data = define_level(self.data, params['window_size'], params['bias'], self.extrema)
         rebound_data = self.analysis(current_data)
         return self.calculate(rebound_data)
 
@@ -844,30 +887,148 @@ class GeneticAlgorithm:
 # preparing data for a neural network
 
     
-def cleaned_data(df: pd.DataFrame, variance_threshold: float = 0.1) ->  pd.DataFrame :
+def _complete_rows(df: pd.DataFrame, columns, chunk_size: int) -> np.ndarray:
+    # Rows without a missing value in `columns`, checked a chunk of columns at a time
+    missing = np.zeros(len(df), dtype=bool)
+    for i in range(0, len(columns), chunk_size):
+        missing |= df[columns[i:i + chunk_size]].isna().to_numpy().any(axis=1)
+    return ~missing
+
+
+def _column_block(df: pd.DataFrame, columns, rows) -> np.ndarray:
+    # float64 copy of some columns on the kept rows, -0.0 turned into 0.0 so equal values have equal bytes
+    block = np.empty((len(rows), len(columns)), dtype=np.float64, order='F')
+    for i, column in enumerate(columns):
+        block[:, i] = df[column].to_numpy(dtype=np.float64)[rows]
+    block += 0.0
+    return block
+
+
+def screen_columns(df: pd.DataFrame, columns=None, correlation_threshold: float = None,
+                   chunk_size: int = 256, variance_threshold: float = None) -> pd.DataFrame:
     """
-    Perform data cleaning on a collection of DataFrames.
+    Screens feature columns for `cleaned_data` without copying the whole frame.
+
+    Rows with a missing value in any of the columns are left out, as `dropna` does.
+    The columns are then read in blocks of `chunk_size`. One pass over each block
+    computes the variance, whether the column is constant and a hash of its
+    values. Columns with the same hash are compared value by value, and a column
+    equal to an earlier one is marked as its duplicate. With
+    `correlation_threshold`, every remaining column is compared with the earlier
+    kept ones through blocked products of the standardized columns. It is marked
+    as correlated with the first one whose |correlation| is at least the threshold.
+    Columns below `variance_threshold` take no part in this comparison, so a
+    column is never dropped in favour of one that the variance filter removes.
 
-    Parameters:
-    - data (dict): A dictionary where keys are names (strings) and values are DataFrames to be cleaned.
+    Args:
+        df (pd.DataFrame): Feature frame.
+        columns (list, optional): Columns to screen, in the order that decides which duplicate is kept.
+            Defaults to every column of `df`.
+        correlation_threshold (float, optional): |correlation| at which a column counts as a near duplicate.
+            Defaults to None, no correlation screening.
+        chunk_size (int, optional): Columns held in memory at a time. Defaults to 256.
+        variance_threshold (float, optional): Columns with a lower variance are left out of the correlation
+            screening. Defaults to None, every column takes part.
 
     Returns:
-    - dict: A dictionary containing cleaned DataFrames, where keys are names and values are corresponding cleaned DataFrames.
+        pd.DataFrame: Per column: variance, constant, duplicate_of and correlated_with (None when not applicable).
+    """
+    columns = list(df.columns if columns is None else columns)
+    chunks = [columns[i:i + chunk_size] for i in range(0, len(columns), chunk_size)]
+    rows = np.flatnonzero(_complete_rows(df, columns, chunk_size))
+
+    variance, constant, duplicate_of = {}, {}, {}
+    first_by_hash = {}
+    for chunk in chunks:
+        block = _column_block(df, chunk, rows)
+        for i, column in enumerate(chunk):
+            values = block[:, i]
+            variance[column] = values.var(ddof=1) if len(rows) > 1 else np.nan
+            constant[column] = len(values) == 0 or bool((values == values[0]).all())
+            if constant[column]:
+                continue
+            # Only the names are kept, an earlier column is read again when the hashes match
+            candidates = first_by_hash.setdefault(hashlib.sha1(values.tobytes()).digest(), [])
+            for earlier in candidates:
+                earlier_values = block[:, chunk.index(earlier)] if earlier in chunk else \
+                    _column_block(df, [earlier], rows)[:, 0]
+                if np.array_equal(values, earlier_values):
+                    duplicate_of[column] = earlier
+                    break
+            else:
+                candidates.append(column)
+        del block, values
+
+    correlated_with = {}
+    if correlation_threshold is not None and len(rows) > 1:
+        survivors = [column for column in columns if not constant[column] and column not in duplicate_of
+                     and (variance_threshold is None or variance[column] >= variance_threshold)]
+        kept_blocks = []
+        for start in range(0, len(survivors), chunk_size):
+            chunk = survivors[start:start + chunk_size]
+            z = _standardized_block(df, chunk, rows)
+            dropped = np.zeros(len(chunk), dtype=bool)
+            for kept_columns in kept_blocks:
+                corr = np.abs(_standardized_block(df, kept_columns, rows).T @ z)
+                hits = corr >= correlation_threshold
+                for j in np.flatnonzero(hits.any(axis=0) & ~dropped):
+                    correlated_with[chunk[j]] = kept_columns[int(np.argmax(hits[:, j]))]
+                    dropped[j] = True
+
+            corr = np.abs(z.T @ z)
+            kept = []
+            for j, column in enumerate(chunk):
+                if dropped[j]:
+                    continue
+                kept.append(column)
+                later = np.flatnonzero((corr[j, j + 1:] >= correlation_threshold) & ~dropped[j + 1:]) + j + 1
+                for k in later:
+                    correlated_with[chunk[k]] = column
+                dropped[later] = True
+            kept_blocks.append(kept)
+
+    return pd.DataFrame({
+        "variance": pd.Series(variance, dtype=np.float64),
+        "constant": pd.Series(constant, dtype=bool),
+        "duplicate_of": pd.Series({column: duplicate_of.get(column) for column in columns}, dtype=object),
+        "correlated_with": pd.Series({column: correlated_with.get(column) for column in columns}, dtype=object),
+    }).loc[columns]
+
+
+def _standardized_block(df: pd.DataFrame, columns, rows) -> np.ndarray:
+    # Columns scaled so that z.T @ z is their correlation matrix
+    block = _column_block(df, columns, rows)
+    block -= block.mean(axis=0)
+    norms = np.sqrt((block * block).sum(axis=0))
+    block /= np.where(norms == 0, 1.0, norms)
+    return block
+
+
+def cleaned_data(df: pd.DataFrame, variance_threshold: float = 0.1, correlation_threshold: float = None,
+                 chunk_size: int = 256) ->  pd.DataFrame :
+    """
+    Removes rows with missing values and uninformative columns from a feature frame.
 
-    The function performs the following steps for each DataFrame in the input dictionary:
-    1. Separates datetime columns and non-datetime columns.
-    2. Handles non-datetime columns by removing rows with missing values and keeping columns with more than one unique value.
-    3. Drops duplicate columns in the cleaned DataFrame.
-    4. Adds a 'Date' column to the cleaned DataFrame containing datetime values.
+    Parameters:
+    - df (pd.DataFrame): Feature frame with one datetime column ('Date').
+    - variance_threshold (float): Columns with a lower variance are removed. Defaults to 0.1.
+    - correlation_threshold (float, optional): Also removes columns whose |correlation| with an earlier kept
+      column reaches this value. Defaults to None.
+    - chunk_size (int): Columns screened at a time, see `screen_columns`. Defaults to 256.
 
-    Example:
-    ```
-    data_dict = {'df1': pd.DataFrame(...), 'df2': pd.DataFrame(...)}
-    cleaned_data_dict = cleaned_data(data_dict)
-    ```
+    Returns:
+    - pd.DataFrame: The cleaned frame with the 'Date' column last.
 
-    Note:
-    - The function uses the tqdm library to display a progress bar during the cleaning process.
+    The function performs the following steps:
+    1. Separates datetime columns and non-datetime columns.
+    2. Removes rows with missing values and keeps columns with more than one unique value.
+    3. Drops duplicate columns, the first one (in sorted column order) is kept.
+    4. Removes columns with a variance below `variance_threshold`.
+    5. With `correlation_threshold`, removes the remaining columns correlated with an earlier remaining one.
+    6. Adds a 'Date' column to the cleaned DataFrame containing datetime values.
+
+    The columns are screened in chunks by `screen_columns`, so only the kept
+    columns are copied.
     """
 
     # Separate datetime columns
@@ -875,17 +1036,11 @@ def cleaned_data(df: pd.DataFrame, variance_threshold: float = 0.1) ->  pd.DataF
     
     other_columns = df.columns.difference(datetime_columns)
 
-    # Handle non-datetime columns
-    df_cleaned = df[other_columns].dropna()
-    df_cleaned = df_cleaned.loc[:, df_cleaned.nunique() > 1]
-
-    # Drop duplicate columns
-    duplicate_columns = df_cleaned.columns[df_cleaned.T.duplicated()].tolist()
-    df_cleaned = df_cleaned.drop(columns=duplicate_columns, axis=1)
+    screen = screen_columns(df, other_columns, correlation_threshold, chunk_size, variance_threshold)
+    keep = (~screen["constant"]) & screen["duplicate_of"].isna() & screen["correlated_with"].isna() \
+        & (screen["variance"] >= variance_threshold)
 
-    # Calculate variance and remove columns with low variance
-    variances = df_cleaned.var()
-    df_cleaned = df_cleaned.loc[:, variances >= variance_threshold]
+    df_cleaned = df.loc[_complete_rows(df, list(other_columns), chunk_size), screen.index[keep]]
 
     df_cleaned["Date"] = df[datetime_columns]
     
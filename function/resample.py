@@ -0,0 +1,173 @@
+from import_libraries.libraries import *
+from function.function_for_MT5 import *
+from function.mt5_replay import RATES_DTYPE, ReplayMT5
+from function.streaming import bar_open_time
+from function.bar_store import BarStore
+
+
+def _check_timeframes(base_timeframe, timeframe):
+    base_seconds = ReplayMT5.TIMEFRAME_SECONDS[base_timeframe]
+    seconds = ReplayMT5.TIMEFRAME_SECONDS[timeframe]
+    if seconds < base_seconds or seconds % base_seconds:
+        raise ValueError(f"Timeframe {timeframe} can not be built from timeframe {base_timeframe}.")
+
+
+def resample_rates(rates: np.ndarray, timeframe: int, session_offset: int = 0) -> np.ndarray:
+    """
+    Builds bars of a higher timeframe from bars of a lower one.
+
+    Bars are grouped by the MetaTrader 5 bar boundaries of `timeframe` in server
+    time, shifted by `session_offset` for brokers whose session does not start at
+    midnight. Open is the first open, High/Low the extremes, Close the last close,
+    volumes are summed and the spread is the smallest one, as in the terminal.
+
+    Args:
+        rates (np.ndarray): Bars of the base timeframe (`RATES_DTYPE`), oldest first.
+        timeframe (int): Target MetaTrader 5 timeframe.
+        session_offset (int, optional): Session start relative to the bar boundary, in seconds. Defaults to 0.
+
+    Returns:
+        np.ndarray: Bars of the target timeframe (`RATES_DTYPE`). The last one may still be forming.
+    """
+    if len(rates) == 0:
+        return np.empty(0, dtype=RATES_DTYPE)
+
+    bar_times = bar_open_time(rates['time'] - session_offset, timeframe) + session_offset
+
+    # Index of the first base bar of every target bar
+    starts = np.flatnonzero(np.r_[True, bar_times[1:] != bar_times[:-1]])
+    ends = np.r_[starts[1:], len(rates)] - 1
+
+    resampled = np.empty(len(starts), dtype=RATES_DTYPE)
+    resampled['time'] = bar_times[starts]
+    resampled['open'] = rates['open'][starts]
+    resampled['high'] = np.maximum.reduceat(rates['high'], starts)
+    resampled['low'] = np.minimum.reduceat(rates['low'], starts)
+    resampled['close'] = rates['close'][ends]
+    resampled['tick_volume'] = np.add.reduceat(rates['tick_volume'], starts)
+    resampled['spread'] = np.minimum.reduceat(rates['spread'], starts)
+    resampled['real_volume'] = np.add.reduceat(rates['real_volume'], starts)
+    return resampled
+
+
+class Resampler:
+    """
+    Keeps a higher timeframe up to date from new bars of a base timeframe.
+
+    Only the base bars of the newest (possibly still forming) target bar are
+    kept, so every update recomputes that bar and appends the new ones instead
+    of resampling the whole history.
+
+    Attributes:
+        base_timeframe (int): Timeframe of the incoming bars.
+        timeframe (int): Timeframe of the built bars.
+        session_offset (int): Session start relative to the bar boundary, in seconds.
+    """
+
+    def __init__(self, base_timeframe: int, timeframe: int, session_offset: int = 0, capacity: int = 1_024):
+        _check_timeframes(base_timeframe, timeframe)
+        self.base_timeframe = base_timeframe
+        self.timeframe = timeframe
+        self.session_offset = session_offset
+
+        self._bars = np.empty(capacity, dtype=RATES_DTYPE)
+        self._count = 0
+        # Base bars of the newest target bar
+        self._tail = np.empty(0, dtype=RATES_DTYPE)
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def bars(self) -> np.ndarray:
+        """
+        Returns a view of all built bars, the last one may still be forming.
+        """
+        return self._bars[:self._count]
+
+    def update(self, rates: np.ndarray) -> np.ndarray:
+        """
+        Adds new base bars.
+
+        Base bars older than the last one already seen are ignored. A base bar with
+        the same time as the last one replaces it, as it may have been forming.
+
+        Args:
+            rates (np.ndarray): New bars of the base timeframe (`RATES_DTYPE`), oldest first.
+
+        Returns:
+            np.ndarray: View of the target bars changed or added by this update.
+        """
+        rates = np.asarray(rates).astype(RATES_DTYPE, copy=False)
+        if len(self._tail):
+            rates = rates[rates['time'] >= self._tail['time'][-1]]
+        if len(rates) == 0:
+            return self._bars[self._count:self._count]
+
+        tail = self._tail
+        if len(tail) and rates['time'][0] == tail['time'][-1]:
+            tail = tail[:-1]
+        tail = np.concatenate([tail, rates])
+
+        resampled = resample_rates(tail, self.timeframe, self.session_offset)
+
+        # The first resampled bar replaces the stored newest bar
+        start = self._count - 1 if len(self._tail) else self._count
+        self.__reserve(start + len(resampled))
+        self._bars[start:start + len(resampled)] = resampled
+        self._count = start + len(resampled)
+
+        newest = bar_open_time(tail['time'] - self.session_offset, self.timeframe) + self.session_offset
+        self._tail = tail[newest == resampled['time'][-1]].copy()
+
+        return self._bars[start:self._count]
+
+    def __reserve(self, size):
+        if size > len(self._bars):
+            bars = np.empty(max(size, 2 * len(self._bars)), dtype=RATES_DTYPE)
+            bars[:self._count] = self._bars[:self._count]
+            self._bars = bars
+
+    def frame(self, last: int = None) -> pd.DataFrame:
+        """
+        Returns the built bars as the DataFrame produced by `get_historical_data`.
+        """
+        bars = self.bars if last is None else self.bars[-(last + 1):]
+        return rates_to_frame(bars).reset_index(drop=True)
+
+
+def get_resampled_historical_data(symbol="GER30", timeframe=mt5.TIMEFRAME_D1, base_timeframe=mt5.TIMEFRAME_M5,
+                                  count=30_000, store: BarStore = None, sync: bool = True, session_offset: int = 0):
+    """
+     Retrieves historical data of a timeframe built from the stored base timeframe.
+
+     Only the base timeframe is downloaded (incrementally, through the bar store),
+     so studying H1, H4 and D1 of one symbol needs a single history.
+
+     Arguments:
+     symbol (str): The symbol for which you want to get historical data.
+     timeframe (int): Time frame of the returned data.
+     base_timeframe (int): Stored time frame the data is built from.
+     count (int): Number of candles of `timeframe` requested.
+     store (BarStore): Store with the base bars. Defaults to BarStore().
+     sync (bool): Whether to download new base bars first.
+     session_offset (int): Session start relative to the bar boundary, in seconds.
+
+     Returns:
+     pd.DataFrame: DataFrame with the same columns as `get_historical_data`.
+     """
+    _check_timeframes(base_timeframe, timeframe)
+    store = store if store else BarStore()
+
+    # Enough base bars for `count` target bars plus the previous close
+    ratio = ReplayMT5.TIMEFRAME_SECONDS[timeframe] // ReplayMT5.TIMEFRAME_SECONDS[base_timeframe]
+    base_count = (count + 1) * ratio
+
+    # An empty store is filled with as many base bars as are read below
+    if sync and store.sync(symbol, base_timeframe, count=base_count) is None:
+        print("Bar store sync failed, using stored bars.")
+
+    rates = store.read(symbol, base_timeframe, last=base_count)
+
+    resampled = resample_rates(rates, timeframe, session_offset)
+    return rates_to_frame(resampled[-(count + 1):]).reset_index(drop=True)
@@ -0,0 +1,328 @@
+from import_libraries.libraries import *
+from collections import deque
+import heapq
+import time
+
+NAN = float("nan")
+
+
+class StreamingMode:
+    """
+    Mode of the last `window` values, updated one value at a time.
+
+    The window keeps a count per value and a heap of (-count, value) entries.
+    Every step pushes the new counts of the values that entered and left, and
+    stale entries are dropped when they reach the top, so a step costs
+    amortized O(log w). Ties go to the smallest value and NaN is ignored, as
+    in pandas `mode()`.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.counts = {}
+        self.heap = []
+        self.size = 0
+
+    def update(self, value) -> float:
+        """
+        Adds a value and returns the mode of the window, NaN while it holds no values.
+        """
+        values, counts = self.values, self.counts
+        values.append(value)
+        if value == value:
+            counts[value] = counts.get(value, 0) + 1
+            self.size += 1
+            heapq.heappush(self.heap, (-counts[value], value))
+
+        if len(values) > self.window:
+            old = values.popleft()
+            if old == old:
+                counts[old] -= 1
+                self.size -= 1
+                if counts[old]:
+                    heapq.heappush(self.heap, (-counts[old], old))
+                else:
+                    del counts[old]
+
+        # Keep the heap proportional to the window, rebuilt from the values in the window only
+        if len(self.heap) > 4 * self.window + 64:
+            self.heap = [(-count, value) for value, count in counts.items()]
+            heapq.heapify(self.heap)
+
+        heap = self.heap
+        while heap and counts.get(heap[0][1], 0) != -heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][1] if self.size else NAN
+
+
+class StreamingMedian:
+    """
+    Median of the last `window` values, updated one value at a time.
+
+    The lower half is a max-heap and the upper half a min-heap. Values that
+    leave the window are deleted lazily, when they reach the top of their heap,
+    so a step costs amortized O(log w). With an even count the median is the
+    mean of the two middle values, as in pandas `rolling().median()`. NaN is
+    ignored.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        # Max-heap stored negated; per heap the live size and the values waiting for deletion
+        self.low, self.high = [], []
+        self.low_size = self.high_size = 0
+        self.low_delayed, self.high_delayed = {}, {}
+
+    @staticmethod
+    def __prune(heap, delayed, sign):
+        while heap and delayed.get(sign * heap[0]):
+            value = sign * heapq.heappop(heap)
+            delayed[value] -= 1
+
+    def __balance(self):
+        if self.low_size > self.high_size + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.low_size -= 1
+            self.high_size += 1
+        elif self.low_size < self.high_size:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.high_size -= 1
+            self.low_size += 1
+        self.__prune(self.low, self.low_delayed, -1)
+        self.__prune(self.high, self.high_delayed, 1)
+
+    def update(self, value) -> float:
+        """
+        Adds a value and returns the median of the window, NaN while it holds no values.
+        """
+        self.values.append(value)
+        if value == value:
+            if not self.low or value <= -self.low[0]:
+                heapq.heappush(self.low, -value)
+                self.low_size += 1
+            else:
+                heapq.heappush(self.high, value)
+                self.high_size += 1
+            self.__balance()
+
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old == old:
+                # Every value of the lower half is <= its live top, every value of the upper half >= it
+                if old <= -self.low[0]:
+                    self.low_delayed[old] = self.low_delayed.get(old, 0) + 1
+                    self.low_size -= 1
+                else:
+                    self.high_delayed[old] = self.high_delayed.get(old, 0) + 1
+                    self.high_size -= 1
+                self.__prune(self.low, self.low_delayed, -1)
+                self.__prune(self.high, self.high_delayed, 1)
+                self.__balance()
+
+        if not self.low_size:
+            return NAN
+        if self.low_size > self.high_size:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+
+def rolling_mode(values, window: int, min_periods: int = 1) -> np.ndarray:
+    """
+    Rolling mode of an array, equal to `pd.Series(values).rolling(window, min_periods).apply(lambda x: x.mode()[0])`.
+
+    Values are mapped to integer codes in sorted order, so the smallest code
+    is the smallest value, and run through `StreamingMode`.
+
+    Args:
+        values (array-like): Input values, oldest first.
+        window (int): Window size.
+        min_periods (int, optional): Minimum number of non-NaN values for a result. Defaults to 1.
+
+    Returns:
+        np.ndarray: float64 array of the same length, NaN where the window has too few values.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    result = np.full(n, np.nan)
+    if n == 0:
+        return result
+
+    valid = ~np.isnan(values)
+    uniques, codes = np.unique(values[valid], return_inverse=True)
+    # Missing values become NaN codes, which `StreamingMode` skips
+    all_codes = np.full(n, np.nan)
+    all_codes[valid] = codes
+    all_codes = [code if code != code else int(code) for code in all_codes.tolist()]
+
+    mode = StreamingMode(window)
+    minimum = max(min_periods, 1)
+    for i, code in enumerate(all_codes):
+        code = mode.update(code)
+        if mode.size >= minimum:
+            result[i] = uniques[code]
+    return result
+
+
+def benchmark_rolling_mode(sizes=(10_000, 100_000, 1_000_000), window: int = 23, pandas_limit: int = None,
+                           seed: int = 0) -> pd.DataFrame:
+    """
+    Compares `rolling_mode` with the rolling apply of `statistic_functions` on random closes.
+
+    Every size is run on closes rounded to 0.1, with repeated values in the
+    windows, and on unrounded closes, where every value is unique.
+
+    Args:
+        sizes (tuple, optional): Numbers of bars. Defaults to 10k, 100k and 1M.
+        window (int, optional): Window size. Defaults to 23.
+        pandas_limit (int, optional): Skip the pandas apply above this size, as it takes minutes on 1M bars. Defaults to None.
+        seed (int, optional): Seed of the random closes. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: Seconds per size and input for both implementations, their ratio and whether the results are equal.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for size, values in ((size, values) for size in sizes for values in ("rounded", "unique")):
+        close = 100 + np.cumsum(rng.normal(0, 0.1, size))
+        close = pd.Series(np.round(close, 1) if values == "rounded" else close)
+
+        start = time.perf_counter()
+        fast = rolling_mode(close.to_numpy(), window)
+        fast_time = time.perf_counter() - start
+
+        pandas_time, equal = np.nan, None
+        if pandas_limit is None or size <= pandas_limit:
+            start = time.perf_counter()
+            expected = close.rolling(window=window, min_periods=1).apply(lambda x: x.mode()[0])
+            pandas_time = time.perf_counter() - start
+            equal = bool(np.array_equal(fast, expected.to_numpy(), equal_nan=True))
+
+        rows.append({"bars": size, "values": values, "rolling_mode": fast_time, "pandas_apply": pandas_time,
+                     "speedup": pandas_time / fast_time, "equal": equal})
+    return pd.DataFrame(rows)
+
+
+class SparseTable:
+    """
+    Range maximum (or minimum) index of a growing array.
+
+    Level k holds the extreme of every run of 2 ** k values, so the extreme of
+    any window is the extreme of two overlapping runs. Building costs
+    O(n log n) once; the extremes of the last `window` values at every
+    position then take O(n) for any window, without scanning the windows.
+    Appending bars fills only the new entries of every level.
+
+    NaN propagates as in pandas `rolling(window).max()`: a window holding a
+    NaN has no value.
+    """
+
+    def __init__(self, values=(), maximum: bool = True):
+        self.function = np.maximum if maximum else np.minimum
+        self._levels = [np.empty(16)]
+        self._size = 0
+        self.append(values)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, values) -> None:
+        """
+        Appends values and extends every level.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        old, new = self._size, self._size + len(values)
+        if len(values) == 0:
+            return
+        if new > len(self._levels[0]):
+            capacity = max(new, 2 * len(self._levels[0]))
+            for k, level in enumerate(self._levels):
+                grown = np.empty(capacity)
+                grown[:old] = level[:old]
+                self._levels[k] = grown
+        self._levels[0][old:new] = values
+        self._size = new
+
+        k = 1
+        while (1 << k) <= new:
+            span = 1 << k
+            if k == len(self._levels):
+                self._levels.append(np.empty(len(self._levels[0])))
+            lower, level = self._levels[k - 1], self._levels[k]
+            # Runs ending at the new values, the older ones are already filled
+            first, last = max(old - span + 1, 0), new - span + 1
+            level[first:last] = self.function(lower[first:last], lower[first + span // 2:last + span // 2])
+            k += 1
+
+    def rolling(self, window: int, start: int = 0, stop: int = None) -> np.ndarray:
+        """
+        Extreme of the last `window` values at every position of `[start, stop)`.
+
+        The window does not reach before `start`, so the result is that of
+        `rolling(window)` on the slice: NaN for its first `window - 1` positions.
+        """
+        stop = self._size if stop is None else stop
+        out = np.full(max(stop - start, 0), np.nan)
+        if window < 1 or stop - start < window:
+            return out
+        k = window.bit_length() - 1
+        level = self._levels[k]
+        ends = np.arange(start + window - 1, stop)
+        out[window - 1:] = self.function(level[ends - window + 1], level[ends - (1 << k) + 1])
+        return out
+
+
+class ExtremaIndex:
+    """
+    Rolling High maximum and Low minimum of a dataset for any window, from two `SparseTable`s.
+
+    Built once per dataset and passed to `define_level` (`extrema=`), so the
+    optimizers do not recompute the rolling extremes for every candidate window.
+    `slice` gives the index of a row range, e.g. a cross-validation period,
+    without copying the tables.
+    """
+
+    def __init__(self, high=(), low=()):
+        self.high = SparseTable(high, maximum=True)
+        self.low = SparseTable(low, maximum=False)
+        self._start, self._stop = 0, None
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "ExtremaIndex":
+        return cls(data["High"].to_numpy(dtype=np.float64), data["Low"].to_numpy(dtype=np.float64))
+
+    def __len__(self):
+        stop = len(self.high) if self._stop is None else self._stop
+        return stop - self._start
+
+    def append(self, high, low) -> None:
+        """
+        Appends new bars.
+        """
+        if self._stop is not None:
+            raise ValueError("Bars cannot be appended to a slice of an ExtremaIndex.")
+        self.high.append(high)
+        self.low.append(low)
+
+    def slice(self, start: int, stop: int) -> "ExtremaIndex":
+        """
+        Index of the rows `data.iloc[start:stop]`, sharing the tables.
+        """
+        rows = range(self._start, self._start + len(self))[start:stop]
+        view = ExtremaIndex.__new__(ExtremaIndex)
+        view.high, view.low = self.high, self.low
+        view._start, view._stop = rows.start, max(rows.start, rows.stop)
+        return view
+
+    def rolling_max(self, window: int) -> np.ndarray:
+        """
+        Equal to `data['High'].rolling(window).max()`.
+        """
+        return self.high.rolling(window, self._start, self._start + len(self))
+
+    def rolling_min(self, window: int) -> np.ndarray:
+        """
+        Equal to `data['Low'].rolling(window).min()`.
+        """
+        return self.low.rolling(window, self._start, self._start + len(self))
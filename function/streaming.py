@@ -0,0 +1,296 @@
+from import_libraries.libraries import *
+from function.function_for_MT5 import *
+import time
+from function.mt5_replay import ReplayMT5
+
+# Columns of every closed bar, the same as `get_historical_data` derives
+BAR_FIELDS = ("Open", "High", "Low", "Close", "Tick_volume",
+              "Volume", "MaxPositivePriceChange", "MaxNegativePriceChange", "PriceChange")
+
+# Epoch 0 was a Thursday, MetaTrader 5 weeks start on Sunday
+_WEEK_OFFSET = 3 * 86_400
+
+
+def bar_open_time(times, timeframe: int):
+    """
+    Returns the open time of the bar each timestamp belongs to.
+
+    Args:
+        times (int | np.ndarray): Epoch seconds (server time).
+        timeframe (int): MetaTrader 5 timeframe up to TIMEFRAME_W1.
+
+    Returns:
+        int | np.ndarray: Epoch seconds of the bar open.
+    """
+    seconds = ReplayMT5.TIMEFRAME_SECONDS[timeframe]
+    if timeframe == ReplayMT5.TIMEFRAME_W1:
+        return (times - _WEEK_OFFSET) // seconds * seconds + _WEEK_OFFSET
+    return times // seconds * seconds
+
+
+class BarRingBuffer:
+    """
+    Fixed-size buffer of the most recent closed bars.
+
+    Every bar is written twice, at `i` and `i + capacity`, so the last `n` bars
+    are always one contiguous slice and `last(n)` returns a view without copying.
+
+    Attributes:
+        capacity (int): Maximum number of bars kept.
+        count (int): Number of bars written so far.
+    """
+
+    def __init__(self, capacity: int = 1_000):
+        self.capacity = capacity
+        self.count = 0
+        self._times = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.zeros((len(BAR_FIELDS), 2 * capacity), dtype=np.float64)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, bar_time: int, values) -> None:
+        """
+        Adds a closed bar.
+
+        Args:
+            bar_time (int): Bar open time in epoch seconds.
+            values: Values in `BAR_FIELDS` order.
+        """
+        i = self.count % self.capacity
+        self._times[i] = self._times[i + self.capacity] = bar_time
+        self._values[:, i] = self._values[:, i + self.capacity] = values
+        self.count += 1
+
+    def __slice(self, n):
+        n = len(self) if n is None else min(n, len(self))
+        end = (self.count - 1) % self.capacity + self.capacity + 1 if self.count else 0
+        return slice(end - n, end)
+
+    def last(self, n: int = None) -> np.ndarray:
+        """
+        Returns a read-only (fields x n) view of the last `n` bars, oldest first.
+        """
+        view = self._values[:, self.__slice(n)]
+        view.flags.writeable = False
+        return view
+
+    def times(self, n: int = None) -> np.ndarray:
+        """
+        Returns a read-only view of the open times of the last `n` bars.
+        """
+        view = self._times[self.__slice(n)]
+        view.flags.writeable = False
+        return view
+
+    def column(self, name: str, n: int = None) -> np.ndarray:
+        """
+        Returns a read-only view of one `BAR_FIELDS` column of the last `n` bars.
+        """
+        return self.last(n)[BAR_FIELDS.index(name)]
+
+    def last_close(self):
+        """
+        Returns the close of the last bar, or None if the buffer is empty.
+        """
+        if not self.count:
+            return None
+        return self._values[BAR_FIELDS.index("Close"), (self.count - 1) % self.capacity]
+
+    def to_frame(self, n: int = None) -> pd.DataFrame:
+        """
+        Returns the last `n` bars as a DataFrame like `get_historical_data` (off the hot path).
+        """
+        frame = pd.DataFrame(self.last(n).T, columns=BAR_FIELDS)
+        frame.insert(0, "Date", pd.to_datetime(self.times(n), unit='s'))
+        return frame
+
+
+class TickBarAggregator:
+    """
+    Builds OHLC bars of several timeframes from a stream of ticks.
+
+    Bars are built on the bid price, as MetaTrader 5 does. A bar is closed when
+    the first tick of a later bar arrives and is then written with its derived
+    columns into the ring buffer of its symbol and timeframe.
+
+    Attributes:
+        timeframes (list): MetaTrader 5 timeframes to build.
+        capacity (int): Size of every ring buffer.
+        on_bar (callable): Optional callback `on_bar(symbol, timeframe, buffer)` run after a bar closes.
+    """
+
+    def __init__(self, timeframes=(ReplayMT5.TIMEFRAME_M1,), capacity: int = 1_000, on_bar=None):
+        self.timeframes = list(timeframes)
+        self.capacity = capacity
+        self.on_bar = on_bar
+        self.buffers = {}
+        # (symbol, timeframe) -> [open time, open, high, low, close, tick count] of the forming bar
+        self._forming = {}
+
+    def buffer(self, symbol: str, timeframe: int) -> BarRingBuffer:
+        """
+        Returns the ring buffer of closed bars of the symbol and timeframe.
+        """
+        key = (symbol, timeframe)
+        if key not in self.buffers:
+            self.buffers[key] = BarRingBuffer(self.capacity)
+        return self.buffers[key]
+
+    def bars(self, symbol: str, timeframe: int, n: int = None) -> np.ndarray:
+        """
+        Returns a (fields x n) view of the last `n` closed bars.
+        """
+        return self.buffer(symbol, timeframe).last(n)
+
+    def forming(self, symbol: str, timeframe: int):
+        """
+        Returns the bar that is still forming as a dict, or None.
+        """
+        bar = self._forming.get((symbol, timeframe))
+        if bar is None:
+            return None
+        return dict(zip(("Date", "Open", "High", "Low", "Close", "Tick_volume"), bar))
+
+    def update(self, symbol: str, ticks: np.ndarray) -> int:
+        """
+        Adds a batch of ticks of one symbol.
+
+        Args:
+            symbol (str): The symbol of the ticks.
+            ticks (np.ndarray): Ticks returned by `copy_ticks_*`, oldest first.
+
+        Returns:
+            int: Number of bars closed by this batch over all timeframes.
+        """
+        if ticks is None or len(ticks) == 0:
+            return 0
+
+        ticks = ticks[ticks['bid'] > 0]
+        if len(ticks) == 0:
+            return 0
+        prices = ticks['bid']
+        times = ticks['time_msc'] // 1000
+
+        closed = 0
+        for timeframe in self.timeframes:
+            bar_times = bar_open_time(times, timeframe)
+
+            # One segment per bar inside the batch
+            starts = np.flatnonzero(np.r_[True, bar_times[1:] != bar_times[:-1]])
+            ends = np.r_[starts[1:], len(prices)]
+            highs = np.maximum.reduceat(prices, starts)
+            lows = np.minimum.reduceat(prices, starts)
+
+            for k, start in enumerate(starts):
+                closed += self.__add_segment(symbol, timeframe, int(bar_times[start]), prices[start],
+                                             highs[k], lows[k], prices[ends[k] - 1], ends[k] - start)
+        return closed
+
+    def __add_segment(self, symbol, timeframe, bar_time, open_, high, low, close, count):
+        key = (symbol, timeframe)
+        bar = self._forming.get(key)
+
+        if bar is not None and bar_time == bar[0]:
+            bar[2] = max(bar[2], high)
+            bar[3] = min(bar[3], low)
+            bar[4] = close
+            bar[5] += count
+            return 0
+
+        if bar is not None and bar_time < bar[0]:
+            # Late tick of an already closed bar
+            return 0
+
+        closed = 0
+        if bar is not None:
+            self.__close(symbol, timeframe, bar)
+            closed = 1
+        self._forming[key] = [bar_time, open_, high, low, close, count]
+        return closed
+
+    def __close(self, symbol, timeframe, bar):
+        buffer = self.buffer(symbol, timeframe)
+        bar_time, open_, high, low, close, count = bar
+        previous = buffer.last_close()
+        price_change = abs(close - previous) if previous is not None else np.nan
+
+        buffer.append(bar_time, (open_, high, low, close, count,
+                                 high - low, high - open_, open_ - low, price_change))
+        if self.on_bar is not None:
+            self.on_bar(symbol, timeframe, buffer)
+
+
+class TickPoller:
+    """
+    Polls `mt5.copy_ticks_from` and feeds new ticks into a `TickBarAggregator`.
+
+    Works with the terminal as well as with the replay backend.
+
+    Attributes:
+        symbols (list): Symbols to poll.
+        aggregator (TickBarAggregator): Aggregator receiving the ticks.
+        batch (int): Maximum number of ticks requested per symbol and poll.
+    """
+
+    def __init__(self, symbols, aggregator: TickBarAggregator, batch: int = 10_000, start_time: int = None):
+        self.symbols = list(symbols)
+        self.aggregator = aggregator
+        self.batch = batch
+        # Last processed tick time per symbol, in milliseconds
+        self._last_msc = {symbol: (start_time or int(time.time())) * 1000 for symbol in self.symbols}
+
+    def poll(self) -> int:
+        """
+        Requests new ticks for every symbol once.
+
+        Returns:
+            int: Number of bars closed during this poll.
+        """
+        if not connect_to_mt5():
+            print("Error connecting to MetaTrader 5.")
+            return 0
+
+        closed = 0
+        for symbol in self.symbols:
+            last_msc = self._last_msc[symbol]
+            count = self.batch
+            while True:
+                ticks = mt5.copy_ticks_from(symbol, last_msc // 1000, count, mt5.COPY_TICKS_ALL)
+                if ticks is None or len(ticks) == 0:
+                    break
+                # copy_ticks_from has second resolution, drop what was already processed
+                new = ticks[ticks['time_msc'] > last_msc]
+                # A full batch of old ticks only: the second of `last_msc` holds more than `count` ticks
+                if len(new) == 0 and len(ticks) == count:
+                    count *= 2
+                    continue
+                ticks = new
+                break
+            if ticks is None or len(ticks) == 0:
+                continue
+            self._last_msc[symbol] = int(ticks['time_msc'][-1])
+            closed += self.aggregator.update(symbol, ticks)
+        return closed
+
+    def run(self, interval: float = 0.1, duration: float = None, iterations: int = None) -> int:
+        """
+        Polls repeatedly.
+
+        Args:
+            interval (float, optional): Seconds between polls. Defaults to 0.1.
+            duration (float, optional): Stop after this many seconds. Defaults to None.
+            iterations (int, optional): Stop after this many polls. Defaults to None.
+
+        Returns:
+            int: Number of bars closed.
+        """
+        closed = 0
+        start = time.perf_counter()
+        done = 0
+        while (duration is None or time.perf_counter() - start < duration) and \
+                (iterations is None or done < iterations):
+            closed += self.poll()
+            done += 1
+            time.sleep(interval)
+        return closed
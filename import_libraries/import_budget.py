@@ -0,0 +1,80 @@
+import subprocess
+import sys
+import json
+
+# Entry point -> (import time budget in seconds, heavy modules that must stay unloaded)
+IMPORT_BUDGETS = {
+    "function.mt5_replay": (0.25, ["pandas", "talib", "tensorflow"]),
+    "function.function_for_MT5": (1.0, ["talib", "tensorflow", "keras_tuner", "deap", "plotly",
+                                        "seaborn", "matplotlib", "ipywidgets", "yfinance", "sklearn"]),
+    "function.bar_store": (1.0, ["talib", "tensorflow", "deap", "plotly", "matplotlib"]),
+    "function.preprocess_function": (1.0, ["talib", "tensorflow", "deap", "plotly", "matplotlib"]),
+    "function.NN": (1.0, ["tensorflow", "keras_tuner", "sklearn"]),
+    "function.vizualization": (1.0, ["plotly", "tensorflow"]),
+    "import_libraries.project_functions": (1.0, ["tensorflow", "keras_tuner", "plotly", "matplotlib"]),
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted({{name.split('.')[0] for name in sys.modules}})}}))
+"""
+
+
+def measure_import_time(module: str, repeat: int = 3) -> dict:
+    """
+    Measures how long importing a module takes in a fresh interpreter.
+
+    Args:
+        module (str): The module to import, e.g. "function.function_for_MT5".
+        repeat (int, optional): Number of fresh interpreters; the fastest run is kept. Defaults to 3.
+
+    Returns:
+        dict: 'seconds' of the fastest import and the top level 'modules' loaded by it.
+    """
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def check_import_budget(budgets: dict = None, repeat: int = 3) -> dict:
+    """
+    Checks every entry point against its import time budget.
+
+    Args:
+        budgets (dict, optional): Entry point -> (seconds, forbidden modules). Defaults to IMPORT_BUDGETS.
+        repeat (int, optional): Number of measurements per entry point. Defaults to 3.
+
+    Returns:
+        dict: Entry point -> {'seconds', 'budget', 'loaded_heavy', 'ok'}.
+    """
+    budgets = budgets if budgets else IMPORT_BUDGETS
+    results = {}
+    for module, (budget, forbidden) in budgets.items():
+        try:
+            measured = measure_import_time(module, repeat=repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{module}: import failed\n{e.stderr}")
+            results[module] = {"seconds": None, "budget": budget, "loaded_heavy": [], "ok": False}
+            continue
+
+        loaded_heavy = [name for name in forbidden if name in measured["modules"]]
+        ok = measured["seconds"] <= budget and not loaded_heavy
+        results[module] = {"seconds": measured["seconds"], "budget": budget, "loaded_heavy": loaded_heavy, "ok": ok}
+
+        status = "ok" if ok else "OVER BUDGET"
+        print(f"{module}: {measured['seconds'] * 1000:.0f} ms (budget {budget * 1000:.0f} ms) {status}"
+              + (f", loaded {', '.join(loaded_heavy)}" if loaded_heavy else ""))
+    return results
+
+
+if __name__ == "__main__":
+    results = check_import_budget()
+    sys.exit(0 if all(result["ok"] for result in results.values()) else 1)
@@ -0,0 +1,68 @@
+import importlib
+import threading
+
+
+class LazyImport:
+    """
+    Placeholder for a module or a module attribute that is imported on first use.
+
+    `LazyImport("tensorflow")` behaves like `import tensorflow` and
+    `LazyImport("tensorflow.keras.layers", "LSTM")` like
+    `from tensorflow.keras.layers import LSTM`, but nothing is imported until an
+    attribute is read or the object is called.
+    """
+
+    def __init__(self, module: str, attribute: str = None):
+        self._module = module
+        self._attribute = attribute
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """
+        Imports the module (and reads the attribute) once and returns it.
+        """
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    target = importlib.import_module(self._module)
+                    if self._attribute is not None:
+                        target = getattr(target, self._attribute)
+                    self._target = target
+        return self._target
+
+    @property
+    def loaded(self) -> bool:
+        """
+        True, if the import has already happened.
+        """
+        return self._target is not None
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        name = f"{self._module}.{self._attribute}" if self._attribute else self._module
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyImport {name} ({state})>"
+
+
+def lazy_import(module: str, *attributes: str):
+    """
+    Returns lazy placeholders for a module or for some of its attributes.
+
+    Args:
+        module (str): The module name, e.g. "tensorflow.keras.layers".
+        *attributes (str): Attribute names, as in `from module import a, b`.
+
+    Returns:
+        LazyImport | tuple: A single placeholder, or one per attribute.
+    """
+    if not attributes:
+        return LazyImport(module)
+    if len(attributes) == 1:
+        return LazyImport(module, attributes[0])
+    return tuple(LazyImport(module, attribute) for attribute in attributes)
@@ -1,39 +1,52 @@
-import requests
+# Core libraries, imported eagerly by every layer
 import pandas as pd
 import numpy as np
-from tqdm.notebook import tqdm
-import yfinance as yf
 from datetime import datetime
 from math import ceil
 import random
 import json
-
-import talib as tl
-import MetaTrader5 as mt5
-
-import matplotlib.pyplot as plt 
-import seaborn as sns
-from plotly import graph_objs as go
-from plotly.offline import init_notebook_mode
-
-import ipywidgets as widgets
-from ipywidgets import interact, interact_manual
-
 import warnings
 
-from deap import base, creator, tools, algorithms
-
-import tensorflow as tf
-from tensorflow.keras.models import Model, clone_model
-from tensorflow.keras.layers import Input, LSTM, Flatten, Dense, Attention
-from keras_tuner.tuners import Hyperband
-from keras_tuner.engine.hyperparameters import HyperParameters
-from tensorflow.keras import layers
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import ReduceLROnPlateau, ModelCheckpoint
-from tensorflow.keras.models import load_model
-
-
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error
+from import_libraries.lazy import lazy_import
+
+try:
+    # Private name, so that star imports never rebind the `mt5` broker of function_for_MT5
+    import MetaTrader5 as _MetaTrader5
+except ImportError:
+    # The terminal package exists only on Windows, function_for_MT5 then waits for `set_backend()`
+    _MetaTrader5 = None
+
+# Everything below is imported on first use, so e.g. the trading path never loads TensorFlow
+
+# Data layer
+requests = lazy_import("requests")
+yf = lazy_import("yfinance")
+tqdm = lazy_import("tqdm.notebook", "tqdm")
+
+# Strategy layer
+tl = lazy_import("talib")
+base, creator, tools, algorithms = (lazy_import(f"deap.{name}") for name in ("base", "creator", "tools", "algorithms"))
+
+# Visualization layer
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
+go = lazy_import("plotly.graph_objs")
+init_notebook_mode = lazy_import("plotly.offline", "init_notebook_mode")
+
+widgets = lazy_import("ipywidgets")
+interact, interact_manual = lazy_import("ipywidgets", "interact", "interact_manual")
+
+# NN layer
+tf = lazy_import("tensorflow")
+Model, clone_model, load_model = lazy_import("tensorflow.keras.models", "Model", "clone_model", "load_model")
+Input, LSTM, Flatten, Dense, Attention = lazy_import("tensorflow.keras.layers",
+                                                     "Input", "LSTM", "Flatten", "Dense", "Attention")
+Hyperband = lazy_import("keras_tuner.tuners", "Hyperband")
+HyperParameters = lazy_import("keras_tuner.engine.hyperparameters", "HyperParameters")
+layers = lazy_import("tensorflow.keras.layers")
+Adam = lazy_import("tensorflow.keras.optimizers", "Adam")
+ReduceLROnPlateau, ModelCheckpoint = lazy_import("tensorflow.keras.callbacks", "ReduceLROnPlateau", "ModelCheckpoint")
+
+MinMaxScaler = lazy_import("sklearn.preprocessing", "MinMaxScaler")
+train_test_split = lazy_import("sklearn.model_selection", "train_test_split")
+mean_squared_error = lazy_import("sklearn.metrics", "mean_squared_error")
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from function.preprocess_function import calculate_min_capital, capital_costs, encode_signals, simulate_capital
+
+INFO = SimpleNamespace(volume_min=0.01, ask=1.1002, bid=1.1, swap_short=-2.5, swap_long=-1.3)
+
+
+def _old_min_capital(data, info, return_data=False):
+    # `calculate_min_capital` before `simulate_capital`, with the symbol information passed in
+    CAPITAL = 1_000.0
+    balance = [CAPITAL]
+    capital_now = CAPITAL
+    signal_now = data["Signal"][0]
+    price_now = data['Close'][0]
+    position_volume = info.volume_min
+    margin_requirement_percentage = 0.05
+    PORTION = (position_volume * ((info.ask + info.bid) / 2) * margin_requirement_percentage) / 100
+    COMMISSION = 0.0005
+    swap_short = (position_volume * info.bid * info.swap_short) / 100
+    swap_long = (position_volume * info.ask * info.swap_long) / 100
+
+    for i in range(1, len(data)):
+        if signal_now == data['Signal'][i]:
+            capital_now -= swap_short if signal_now == "sell" else swap_long
+            balance.append(capital_now)
+        else:
+            change_now = (data['Close'][i] - price_now) / price_now
+            total = capital_now * PORTION
+            capital_now -= total
+            open_commission = total * COMMISSION
+            total *= (1 + change_now) if signal_now == "buy" else (1 - change_now)
+            close_commission = total * COMMISSION
+            total -= open_commission + close_commission
+            capital_now += total
+            balance.append(capital_now)
+            signal_now = data['Signal'][i]
+            price_now = data['Close'][i]
+
+    data['Capital'] = pd.DataFrame(balance)
+    if return_data:
+        return data
+    return data['Capital'].min()
+
+
+def _signals(seed, bars):
+    rng = np.random.default_rng(seed)
+    runs = rng.choice(["sell", "buy", "3"], size=bars, p=[0.45, 0.45, 0.1])
+    signal = np.repeat(runs, rng.integers(1, 8, bars))[:bars]
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, bars))
+    return pd.DataFrame({"Close": close, "Signal": signal})
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_old_loop(seed):
+    data = _signals(seed, 500)
+
+    capital, expected = calculate_min_capital(data.copy(), None, info=INFO), _old_min_capital(data.copy(), INFO)
+    assert capital == expected and type(capital) is type(expected)
+    pd.testing.assert_frame_equal(calculate_min_capital(data.copy(), None, return_data=True, info=INFO),
+                                  _old_min_capital(data.copy(), INFO, return_data=True))
+
+
+def test_batch_rows_match_old_loop():
+    # Rows of a parameter grid: 0 where the row has no signal (before its first one or dropped)
+    data = _signals(10, 400)
+    rng = np.random.default_rng(0)
+    signals = np.tile(encode_signals(data["Signal"]), (6, 1))
+    for row, start in enumerate(rng.integers(0, 50, len(signals))):
+        signals[row, :start] = 0
+        signals[row, rng.choice(400, 40, replace=False)] = 0
+    signals[-1] = 0
+
+    minimum, equity = simulate_capital(signals, data["Close"], **capital_costs(INFO))
+    for row in range(len(signals) - 1):
+        kept = signals[row] != 0
+        expected = _old_min_capital(data[kept].reset_index(drop=True), INFO, return_data=True)
+        assert minimum[row] == expected["Capital"].min()
+        np.testing.assert_array_equal(equity[row, kept], expected["Capital"].to_numpy())
+        assert np.isnan(equity[row, ~kept]).all()
+    assert np.isnan(minimum[-1]) and np.isnan(equity[-1]).all()
+
+    without_curves, curves = simulate_capital(signals, data["Close"], curves=False, **capital_costs(INFO))
+    np.testing.assert_array_equal(without_curves, minimum)
+    assert curves is None
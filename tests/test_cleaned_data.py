@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from function.preprocess_function import Preprocessing_stock_data, cleaned_data
+
+BARS = 2_000
+
+
+def _old_cleaned_data(df, variance_threshold=0.1):
+    # `cleaned_data` before the chunked screening
+    datetime_columns = df.select_dtypes(include=['datetime64']).columns
+    other_columns = df.columns.difference(datetime_columns)
+    df_cleaned = df[other_columns].dropna()
+    df_cleaned = df_cleaned.loc[:, df_cleaned.nunique() > 1]
+    df_cleaned = df_cleaned.drop(columns=df_cleaned.columns[df_cleaned.T.duplicated()].tolist())
+    df_cleaned = df_cleaned.loc[:, df_cleaned.var() >= variance_threshold]
+    df_cleaned["Date"] = df[datetime_columns]
+    return df_cleaned
+
+
+@pytest.fixture(scope="module")
+def features():
+    pytest.importorskip("talib")
+    rng = np.random.default_rng(0)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, BARS))
+    high = close + rng.uniform(0, 0.002, BARS)
+    low = close - rng.uniform(0, 0.002, BARS)
+    open_ = low + (high - low) * rng.uniform(0, 1, BARS)
+    data = pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": rng.integers(1, 100, BARS),
+                         "Date": pd.date_range("2024-01-01", periods=BARS, freq="h")})
+    return Preprocessing_stock_data(data).all_()
+
+
+@pytest.mark.parametrize("chunk_size", [256, 7])
+def test_matches_old_cleaned_data(features, chunk_size):
+    pd.testing.assert_frame_equal(cleaned_data(features, chunk_size=chunk_size), _old_cleaned_data(features))
+
+
+def test_correlation_ignores_low_variance_columns():
+    rng = np.random.default_rng(0)
+    a = rng.normal(0, 0.01, 500)
+    data = pd.DataFrame({"A": a, "B": 1000 * a, "Date": pd.date_range("2024-01-01", periods=500, freq="h")})
+
+    assert list(_old_cleaned_data(data).columns) == ["B", "Date"]
+    assert list(cleaned_data(data, correlation_threshold=0.95).columns) == ["B", "Date"]
+    assert list(cleaned_data(data, variance_threshold=0.0, correlation_threshold=0.95).columns) == ["A", "Date"]
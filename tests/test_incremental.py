@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from function.incremental import IncrementalFeatures, compare_incremental_features
+from function.preprocess_function import Preprocessing_stock_data
+
+pytest.importorskip("talib")
+
+PERIODS = [5, 23]
+BARS, SEED_BARS = 400, 150
+# Relative to max(1, |batch|), the largest difference is ~5e-9 (std of nearly flat windows)
+TOLERANCE = 1e-7
+
+
+def _data(flat=False, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, BARS))
+    high = close + rng.uniform(0, 0.002, BARS)
+    low = close - rng.uniform(0, 0.002, BARS)
+    open_ = low + (high - low) * rng.uniform(0, 1, BARS)
+    data = pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": high - low,
+                         "Date": pd.date_range("2024-01-01", periods=BARS, freq="h")})
+    if flat:
+        # No trade for a while: every price equal and no volume
+        data.loc[200:260, ["Open", "High", "Low", "Close"]] = close[200]
+        data.loc[200:260, "Volume"] = 0.0
+    return data
+
+
+@pytest.mark.parametrize("flat", [False, True])
+def test_matches_feature_matrix(flat):
+    difference = compare_incremental_features(_data(flat), PERIODS, SEED_BARS)
+    assert difference.max() < TOLERANCE, difference.sort_values().tail()
+
+
+def test_row_has_feature_matrix_columns():
+    data = _data()
+    batch = Preprocessing_stock_data(data, PERIODS).feature_matrix()
+    engine = IncrementalFeatures(data.iloc[:-1], PERIODS)
+    row = engine.update(data.iloc[-1])
+
+    assert list(row.index) == list(batch.columns)
+    assert row["Date"] == batch["Date"].iloc[-1]
+
+
+def test_selected_columns():
+    data = _data()
+    columns = ["Close", "CDLDOJI", "KAMA23", "median5", "HT_TRENDLINE5"]
+    engine = IncrementalFeatures(data.iloc[:-1], PERIODS, columns=columns)
+    full = IncrementalFeatures(data.iloc[:-1], PERIODS)
+
+    assert list(engine.update(data.iloc[-1]).index) == columns
+    assert len(engine.indicators) < len(full.indicators)
+    pd.testing.assert_series_equal(engine.row(), full.update(data.iloc[-1])[columns], check_dtype=False)
+    with pytest.raises(ValueError):
+        IncrementalFeatures(periods=PERIODS, columns=["unknown"])
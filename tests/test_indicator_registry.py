@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from function.feature_cache import FeatureCache
+from function.indicator_registry import default_registry, _default_registry, rolling_median
+from function.preprocess_function import Preprocessing_stock_data
+
+PERIODS = [5]
+BARS = 200
+
+
+def _data():
+    rng = np.random.default_rng(0)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, BARS))
+    high = close + rng.uniform(0, 0.002, BARS)
+    low = close - rng.uniform(0, 0.002, BARS)
+    open_ = low + (high - low) * rng.uniform(0, 1, BARS)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": high - low,
+                         "Date": pd.date_range("2024-01-01", periods=BARS, freq="h")})
+
+
+def test_register_does_not_leak_into_other_instances():
+    data = _data()
+    first = Preprocessing_stock_data(data, PERIODS)
+    first.registry.register("median3", rolling_median, family="statistic", window=3)
+
+    assert "median3" in first.registry
+    assert "median3" not in Preprocessing_stock_data(data, PERIODS).registry
+    assert "median3" not in default_registry(PERIODS)
+    assert "median3" not in _default_registry(tuple(PERIODS))
+
+
+def test_cache_key_includes_registered_features(tmp_path):
+    pytest.importorskip("talib")
+    data = _data()
+    cache = FeatureCache(str(tmp_path))
+    plain = cache.feature_matrix(data, PERIODS)
+
+    base = _default_registry(tuple(PERIODS))
+    base.register("median3", rolling_median, family="statistic", window=3)
+    try:
+        extended = cache.feature_matrix(data, PERIODS)
+    finally:
+        del base.specs["median3"]
+
+    assert cache.misses == 2
+    assert "median3" in extended.columns and "median3" not in plain.columns
+    pd.testing.assert_frame_equal(cache.feature_matrix(data, PERIODS), plain)
+    assert cache.hits == 1
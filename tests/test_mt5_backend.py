@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from function import function_for_MT5
+from function.function_for_MT5 import BrokerBackend, mt5, set_backend
+from function.mt5_replay import ReplayMT5, synthetic_rates
+
+
+@pytest.fixture
+def restore_backend():
+    backend = mt5.backend
+    yield
+    set_backend(backend)
+
+
+def test_project_functions_keep_the_broker():
+    namespace = {}
+    exec("from import_libraries.project_functions import *", namespace)
+    assert namespace["mt5"] is mt5
+    assert isinstance(mt5, BrokerBackend)
+
+
+def test_no_backend_raises(restore_backend):
+    set_backend(None)
+    assert mt5.TIMEFRAME_D1 == ReplayMT5.TIMEFRAME_D1
+    with pytest.raises(RuntimeError):
+        mt5.order_send({})
+    with pytest.raises(RuntimeError):
+        function_for_MT5.connect_to_mt5()
+
+
+def test_replay_backend_is_opt_in(restore_backend):
+    set_backend(ReplayMT5())
+    assert function_for_MT5.connect_to_mt5()
+
+
+def test_concurrent_orders_get_their_own_tickets():
+    replay = ReplayMT5()
+    replay.add_symbol("EURUSD", {ReplayMT5.TIMEFRAME_M1: synthetic_rates(100, ReplayMT5.TIMEFRAME_M1)})
+    request = {"action": ReplayMT5.TRADE_ACTION_DEAL, "symbol": "EURUSD", "volume": 0.1,
+               "type": ReplayMT5.ORDER_TYPE_BUY}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: replay.order_send(request), range(2_000)))
+
+    tickets = [result.order for result in results]
+    assert all(result.retcode == ReplayMT5.TRADE_RETCODE_DONE for result in results)
+    assert len(set(tickets)) == len(tickets)
+    assert sorted(position.ticket for position in replay.positions_get()) == sorted(tickets)
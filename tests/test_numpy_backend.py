@@ -0,0 +1,131 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from function import numpy_backend
+from function.indicator_registry import default_registry, _default_registry
+
+talib = pytest.importorskip("talib")
+
+PERIODS = [2, 3, 5, 23]
+SYMBOLS, BARS = 3, 1_500
+# Relative to max(1, |talib|), the largest difference is ~5e-9 (BETA2)
+TOLERANCE = 1e-8
+
+
+def _inputs(seed=0, flat=False):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, (SYMBOLS, BARS)), axis=1)
+    high = close + rng.uniform(0, 0.002, (SYMBOLS, BARS))
+    low = close - rng.uniform(0, 0.002, (SYMBOLS, BARS))
+    open_ = low + (high - low) * rng.uniform(0, 1, (SYMBOLS, BARS))
+    inputs = {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": high - low}
+    if flat:
+        # No trade for a while, at another time in every row: equal prices and no volume
+        for row in range(SYMBOLS):
+            stretch = slice(300 + 200 * row, 360 + 200 * row)
+            for column in ("Open", "High", "Low", "Close"):
+                inputs[column][row, stretch] = close[row, stretch.start]
+            inputs["Volume"][row, stretch] = 0.0
+    return inputs
+
+
+INPUTS = _inputs()
+FLAT_INPUTS = _inputs(flat=True)
+SPECS = [spec for spec in default_registry(PERIODS).specs.values()
+         if isinstance(spec.function, str) and numpy_backend.available(spec.function)]
+
+
+def _assert_close(actual, expected):
+    actual = np.asarray(actual, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    assert actual.shape == expected.shape
+    assert np.array_equal(np.isnan(actual), np.isnan(expected))
+    valid = ~np.isnan(expected)
+    difference = np.abs(actual[valid] - expected[valid]) / np.maximum(1.0, np.abs(expected[valid]))
+    assert difference.max(initial=0.0) <= TOLERANCE
+
+
+@pytest.mark.parametrize("inputs", [INPUTS, FLAT_INPUTS], ids=["random", "flat"])
+@pytest.mark.parametrize("spec", SPECS, ids=[spec.name for spec in SPECS])
+def test_matches_talib(spec, inputs):
+    numpy_function = getattr(numpy_backend, spec.function)
+    talib_function = getattr(talib, spec.function)
+    batch = numpy_function(*(inputs[column] for column in spec.inputs), **spec.params)
+    assert batch.shape == (SYMBOLS, BARS)
+    for row in range(SYMBOLS):
+        arguments = [inputs[column][row] for column in spec.inputs]
+        expected = talib_function(*arguments, **spec.params)
+        _assert_close(numpy_function(*arguments, **spec.params), expected)
+        _assert_close(batch[row], expected)
+
+
+def test_leading_nan_matches_talib():
+    close = INPUTS["Close"][0].copy()
+    close[:7] = np.nan
+    for name in ("EMA", "RSI", "SMA", "KAMA"):
+        _assert_close(getattr(numpy_backend, name)(close, timeperiod=5), getattr(talib, name)(close, timeperiod=5))
+
+
+@pytest.mark.parametrize("periods", [(23, 115, 220), (2, 3, 14)])
+def test_static_lookbacks_match_talib(periods):
+    from talib import abstract
+
+    for spec in _default_registry.__wrapped__(periods).specs.values():
+        if not isinstance(spec.function, str):
+            continue
+        indicator = abstract.Function(spec.function)
+        defaults = indicator.parameters
+        indicator.parameters = {key: type(defaults[key])(value) for key, value in spec.params.items()}
+        assert spec.warmup == indicator.lookback, spec.name
+
+
+def test_runs_without_talib():
+    # A fresh interpreter with `import talib` blocked
+    script = textwrap.dedent("""
+        import sys
+        sys.modules["talib"] = None
+        import numpy as np
+        from function import numpy_backend
+        from function.indicator_registry import default_registry
+        from function.preprocess_function import Preprocessing_stock_data
+        from function.mt5_replay import synthetic_rates
+        from function.function_for_MT5 import rates_to_frame
+
+        registry = default_registry()
+        names = [name for name in registry.names()
+                 if isinstance(registry.specs[name].function, str) and name not in numpy_backend.talib_only()]
+        rng = np.random.default_rng(0)
+        close = 1 + np.cumsum(rng.normal(0, 0.01, (2, 600)), axis=1)
+        inputs = {"Open": close, "High": close + 0.01, "Low": close - 0.01, "Close": close, "Volume": close * 0 + 1}
+        columns = numpy_backend.compute_universe(inputs, names)
+        assert len(columns) == len(names) and all(values.shape == (2, 600) for values in columns.values())
+
+        data = rates_to_frame(synthetic_rates(600)).reset_index(drop=True)
+        preprocessing = Preprocessing_stock_data(data, backend=numpy_backend)
+        for family in ("momentum_indicator_functions", "statistic_functions", "math_operator_functions",
+                       "math_transform_functions"):
+            getattr(preprocessing, family)()
+        try:
+            preprocessing.add_indicators_pattern_recognition_functions()
+        except ImportError as e:
+            assert "TA-Lib is not installed" in str(e)
+        else:
+            raise AssertionError("candlestick patterns need TA-Lib")
+        assert "talib" not in {name for name, module in sys.modules.items() if module is not None}
+        print("ok")
+    """)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parents[1])
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("ok")
+
+
+def test_benchmark_backend_runs():
+    result = numpy_backend.benchmark_backend(symbols=(1, 2), bars=500)
+    assert list(result["symbols"]) == [1, 2]
+    assert (result[["numpy", "talib"]] > 0).all().all()
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from function.parallel_features import parallel_feature_matrices, parallel_feature_matrix
+from function.preprocess_function import Preprocessing_stock_data
+
+pytest.importorskip("talib")
+
+PERIODS = [5, 23]
+BARS = 500
+
+
+def _data(seed):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, BARS))
+    high = close + rng.uniform(0, 0.002, BARS)
+    low = close - rng.uniform(0, 0.002, BARS)
+    open_ = low + (high - low) * rng.uniform(0, 1, BARS)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": high - low,
+                         "Date": pd.date_range("2024-01-01", periods=BARS, freq="h")})
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_matches_serial_feature_matrix(executor):
+    datasets = {"EURUSD": _data(0), "GBPUSD": _data(1)}
+    frames = parallel_feature_matrices(datasets, PERIODS, max_workers=2, executor=executor)
+
+    assert list(frames) == list(datasets)
+    for symbol, data in datasets.items():
+        pd.testing.assert_frame_equal(frames[symbol], Preprocessing_stock_data(data, PERIODS).feature_matrix())
+
+
+def test_single_symbol_and_unknown_executor():
+    data = _data(2)
+    pd.testing.assert_frame_equal(parallel_feature_matrix(data, PERIODS, max_workers=2, executor="thread"),
+                                  Preprocessing_stock_data(data, PERIODS).feature_matrix())
+    assert parallel_feature_matrices({}) == {}
+    with pytest.raises(ValueError):
+        parallel_feature_matrices({"": data}, PERIODS, executor="fiber")
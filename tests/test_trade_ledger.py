@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from function.preprocess_function import calculate_accumulated_price_changes, trade_ledger
+
+
+def _old_accumulated_price_changes(data, return_data=False):
+    # `calculate_accumulated_price_changes` before the trade ledger
+    df = data.copy()
+    indices = df.index[df['Signal'].ne(df['Signal'].shift())].tolist()
+    df['AccumulatedPriceChange'] = 0.0
+    for i in range(0, len(indices) - 1):
+        if df.loc[indices[i], 'Signal'] == 'sell' and df.loc[indices[i + 1], 'Signal'] == 'buy':
+            df.loc[indices[i + 1], 'AccumulatedPriceChange'] = \
+                0.0 + (df.loc[indices[i], 'Close'] - df.loc[indices[i + 1], 'Close'])
+        elif df.loc[indices[i], 'Signal'] == 'buy' and df.loc[indices[i + 1], 'Signal'] == 'sell':
+            df.loc[indices[i + 1], 'AccumulatedPriceChange'] = \
+                0.0 + (df.loc[indices[i + 1], 'Close'] - df.loc[indices[i], 'Close'])
+    df["AccumulatedPriceChange"] = df["AccumulatedPriceChange"].shift(-1).fillna(0)
+    all_sell = df.loc[df["Signal"] == "sell", "AccumulatedPriceChange"].sum()
+    all_buy = df.loc[df["Signal"] == "buy", "AccumulatedPriceChange"].sum()
+    if return_data:
+        return df
+    return all_buy + all_sell
+
+
+def _signals(seed, bars, index=None):
+    # Runs of 'sell', 'buy' and "3" (buy and sell) signals
+    rng = np.random.default_rng(seed)
+    runs = rng.choice(["sell", "buy", "3"], size=bars, p=[0.45, 0.45, 0.1])
+    signal = np.repeat(runs, rng.integers(1, 8, bars))[:bars]
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, bars))
+    return pd.DataFrame({"Close": close, "Signal": signal}, index=index)
+
+
+CASES = [(seed, 300, None) for seed in range(20)] + [
+    (20, 0, None),
+    (21, 1, None),
+    (22, 300, pd.RangeIndex(1_000, 1_600, 2)),
+    (23, 300, pd.date_range("2024-01-01", periods=300, freq="h")),
+]
+
+
+@pytest.mark.parametrize("seed, bars, index", CASES)
+def test_matches_old_loop(seed, bars, index):
+    data = _signals(seed, bars, index)
+
+    score, expected = calculate_accumulated_price_changes(data), _old_accumulated_price_changes(data)
+    assert score == expected and type(score) is type(expected)
+    pd.testing.assert_frame_equal(calculate_accumulated_price_changes(data, return_data=True),
+                                  _old_accumulated_price_changes(data, return_data=True))
+    assert "AccumulatedPriceChange" not in data
+
+
+def test_ledger_trades():
+    data = pd.DataFrame({"Close": [1.0, 2.0, 4.0, 3.0, 5.0, 6.0],
+                         "Signal": ["buy", "buy", "sell", "3", "sell", "buy"]})
+    trades = trade_ledger(data)
+
+    assert trades[["entry", "exit", "side"]].tolist() == [(0, 2, 1), (4, 5, -1)]
+    np.testing.assert_array_equal(trades["pnl"], [3.0, -1.0])